@@ -0,0 +1,151 @@
+"""Batched ``project sync`` across many projects in one invocation.
+
+Monorepos with hundreds of sub-projects previously paid interpreter start-up,
+imports and pack discovery once per project. :func:`sync_projects` resolves the
+project list once, preloads the built-in pack rules into the shared content
+store and fans the projects out over a process pool; each worker keeps its
+content store between projects, so packs installed in many projects are only
+read once per worker.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import glob
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import rule_index
+from .core import TARGET_INTERNAL_STATE_DIR, RuleManager
+from .state import open_store
+
+
+@dataclass
+class ProjectSyncResult:
+    project: str
+    status: str  # "ok", "failed" or "skipped"
+    returncode: int
+    seconds: float
+    output: str
+
+
+def resolve_projects(spec: str) -> List[Path]:
+    """Resolve ``--projects-from``: a file listing one project per line, or a glob.
+
+    Blank lines and ``#`` comments are ignored. Entries pointing at a
+    ``.rulebook-ai`` directory are mapped to the project that contains it.
+    """
+    source = Path(spec)
+    if source.is_file():
+        entries = [
+            line.strip()
+            for line in source.read_text().splitlines()
+            if line.strip() and not line.strip().startswith("#")
+        ]
+    else:
+        entries = sorted(glob.glob(spec, recursive=True))
+
+    projects: List[Path] = []
+    seen = set()
+    for entry in entries:
+        path = Path(entry).expanduser().absolute()
+        if path.name == TARGET_INTERNAL_STATE_DIR:
+            path = path.parent
+        if path in seen or not path.is_dir():
+            continue
+        seen.add(path)
+        projects.append(path)
+    return projects
+
+
+def _builtin_contents(source_packs_dir: Path) -> Dict[Tuple[str, int, int], bytes]:
+    contents: Dict[Tuple[str, int, int], bytes] = {}
+    if not source_packs_dir.is_dir():
+        return contents
+    for pack_dir in source_packs_dir.iterdir():
+        for rule in rule_index.RuleIndex.scan(pack_dir / "rules").files:
+            contents[(rule.rel_path, rule.size, rule.mtime_ns)] = rule.path.read_bytes()
+    return contents
+
+
+def _init_worker(contents: Dict[Tuple[str, int, int], bytes]) -> None:
+    rule_index.preload_contents(contents)
+
+
+def _sync_one(project: str, link_mode: Optional[str], sync_kwargs: Dict[str, Any]) -> ProjectSyncResult:
+    start = time.perf_counter()
+    root = Path(project)
+    if not open_store(root / TARGET_INTERNAL_STATE_DIR).exists():
+        return ProjectSyncResult(project, "skipped", 0, 0.0, "No pack selection found in .rulebook-ai/.\n")
+
+    buffer = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buffer):
+            rc = RuleManager(project, link_mode=link_mode).project_sync(project_dir=project, **sync_kwargs)
+    except Exception as e:  # pragma: no cover - reported per project
+        buffer.write(f"An unexpected error occurred: {e}\n")
+        rc = 1
+    return ProjectSyncResult(
+        project,
+        "ok" if rc == 0 else "failed",
+        rc,
+        time.perf_counter() - start,
+        buffer.getvalue(),
+    )
+
+
+def sync_projects(
+    projects: List[Path],
+    workers: Optional[int] = None,
+    link_mode: Optional[str] = None,
+    **sync_kwargs: Any,
+) -> List[ProjectSyncResult]:
+    """Run ``RuleManager.project_sync`` for every project, in project order.
+
+    ``workers`` defaults to the CPU count; ``workers <= 1`` syncs in-process.
+    ``sync_kwargs`` are forwarded to ``project_sync`` (assistants, profile,
+    packs, force, jobs, debug_staging, plan_only).
+    """
+    contents = _builtin_contents(RuleManager().source_packs_dir)
+    names = [str(p) for p in projects]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(names) <= 1:
+        _init_worker(contents)
+        return [_sync_one(name, link_mode, sync_kwargs) for name in names]
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(names)),
+        initializer=_init_worker,
+        initargs=(contents,),
+    ) as pool:
+        futures = [pool.submit(_sync_one, name, link_mode, sync_kwargs) for name in names]
+        return [f.result() for f in futures]
+
+
+def print_report(results: List[ProjectSyncResult], elapsed: float, planned: bool = False) -> int:
+    """Print per-project timing and status; return a CLI exit code.
+
+    With ``planned`` (``--plan``) every project's sync plan is printed.
+    """
+    failed = 0
+    for result in results:
+        print(f"  {result.status:<7} {result.seconds:6.2f}s  {result.project}")
+        if result.status == "failed":
+            failed += 1
+            for line in result.output.rstrip().splitlines()[-5:]:
+                print(f"      {line}")
+        elif planned and result.status == "ok":
+            for line in result.output.rstrip().splitlines():
+                print(f"      {line}")
+    synced = sum(1 for r in results if r.status == "ok")
+    skipped = sum(1 for r in results if r.status == "skipped")
+    print(
+        f"{'Planned' if planned else 'Synced'} {synced} project(s), {failed} failed, "
+        f"{skipped} skipped in {elapsed:.2f}s."
+    )
+    return 1 if failed else 0
@@ -1,13 +1,41 @@
-"""Command line interface for rulebook-ai."""
+"""Command line interface for rulebook-ai.
+
+The CLI is run from git hooks and editor integrations, so startup time
+matters: argument parsing only needs the light modules imported here, and
+each command imports what it uses (``core`` for everything but ``--help``;
+YAML, git, HTTP and archive support only in the commands that need them).
+Set ``RULEBOOK_AI_IMPORT_PROFILE=1`` to print the startup time and any heavy
+modules a command loaded to stderr.
+"""
 
 from __future__ import annotations
 
 import argparse
+import os
 import sys
-from typing import List, Optional
+import time
+from typing import Callable, List, Optional
 
 from .assistants import SUPPORTED_ASSISTANTS
-from .core import RuleManager
+from .file_ops import LINK_MODES
+
+_START = time.perf_counter()
+
+IMPORT_PROFILE_ENV = "RULEBOOK_AI_IMPORT_PROFILE"
+
+# Modules that most commands should never load.
+HEAVY_MODULES = (
+    "yaml",
+    "sqlite3",
+    "subprocess",
+    "tarfile",
+    "zipfile",
+    "webbrowser",
+    "tempfile",
+    "concurrent.futures",
+    "urllib.request",
+    "rulebook_ai.community_packs",
+)
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -27,9 +55,29 @@ def create_parser() -> argparse.ArgumentParser:
     list_parser = packs_sub.add_parser("list", help="List available packs")
     list_parser.add_argument("--project-dir", "-p")
 
+    search_parser = packs_sub.add_parser("search", help="Search the community pack index")
+    search_parser.add_argument("query")
+    search_parser.add_argument(
+        "--limit", type=int, default=20, metavar="N", help="Show at most N matches (default: 20)"
+    )
+
     add_parser = packs_sub.add_parser("add", help="Add pack(s) to the library")
     add_parser.add_argument("names", nargs="+")
     add_parser.add_argument("--project-dir", "-p")
+    add_parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        help="How pack files are copied into .rulebook-ai/packs (default: auto, "
+        "or $RULEBOOK_AI_LINK_MODE)",
+    )
+    add_parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Fetch and validate up to N community packs concurrently (default: 4)",
+    )
 
     remove_parser = packs_sub.add_parser("remove", help="Remove pack(s) from the library")
     remove_parser.add_argument("names", nargs="+")
@@ -40,6 +88,33 @@ def create_parser() -> argparse.ArgumentParser:
     )
     update_parser.add_argument("--project-dir", "-p")
 
+    outdated_parser = packs_sub.add_parser(
+        "outdated", help="List community packs with newer upstream commits"
+    )
+    outdated_parser.add_argument("--project-dir", "-p")
+    outdated_parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=8,
+        metavar="N",
+        help="Check up to N repositories concurrently (default: 8)",
+    )
+
+    upgrade_parser = packs_sub.add_parser(
+        "upgrade", help="Update community packs to their latest upstream commit"
+    )
+    upgrade_parser.add_argument("names", nargs="*", help="Packs to upgrade (default: all)")
+    upgrade_parser.add_argument("--project-dir", "-p")
+    upgrade_parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=8,
+        metavar="N",
+        help="Check and fetch up to N packs concurrently (default: 8)",
+    )
+
     status_parser = packs_sub.add_parser("status", help="Show configured packs and profiles")
     status_parser.add_argument("--project-dir", "-p")
 
@@ -50,21 +125,21 @@ def create_parser() -> argparse.ArgumentParser:
     profiles_parser = subparsers.add_parser("profiles", help="Manage pack profiles")
     profiles_sub = profiles_parser.add_subparsers(dest="profiles_command", required=True)
 
-    create_p = profiles_sub.add_parser("create", help="Create a profile")
-    create_p.add_argument("name")
+    create_p = profiles_sub.add_parser("create", help="Create profile(s)")
+    create_p.add_argument("names", nargs="+")
     create_p.add_argument("--project-dir", "-p")
 
-    delete_p = profiles_sub.add_parser("delete", help="Delete a profile")
-    delete_p.add_argument("name")
+    delete_p = profiles_sub.add_parser("delete", help="Delete profile(s)")
+    delete_p.add_argument("names", nargs="+")
     delete_p.add_argument("--project-dir", "-p")
 
-    add_to = profiles_sub.add_parser("add", help="Add pack to profile")
-    add_to.add_argument("pack")
+    add_to = profiles_sub.add_parser("add", help="Add pack(s) to a profile")
+    add_to.add_argument("packs", nargs="+")
     add_to.add_argument("--to", dest="profile", required=True)
     add_to.add_argument("--project-dir", "-p")
 
-    remove_from = profiles_sub.add_parser("remove", help="Remove pack from profile")
-    remove_from.add_argument("pack")
+    remove_from = profiles_sub.add_parser("remove", help="Remove pack(s) from a profile")
+    remove_from.add_argument("packs", nargs="+")
     remove_from.add_argument("--from", dest="profile", required=True)
     remove_from.add_argument("--project-dir", "-p")
 
@@ -82,6 +157,52 @@ def create_parser() -> argparse.ArgumentParser:
     sync_parser.add_argument("--project-dir", "-p")
     sync_parser.add_argument("--profile")
     sync_parser.add_argument("--pack", action="append", dest="packs")
+    sync_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate every assistant even if its inputs are unchanged",
+    )
+    sync_parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Generate rules for up to N assistants concurrently (default: 1)",
+    )
+    sync_parser.add_argument(
+        "--debug-staging",
+        action="store_true",
+        help="Also write the composed rules to .rulebook-ai/project_rules for inspection",
+    )
+    sync_parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the planned file operations and bytes to write without changing anything",
+    )
+    sync_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and re-sync whenever installed or local pack sources change",
+    )
+    sync_parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="Polling interval for --watch (default: 1.0)",
+    )
+    sync_parser.add_argument(
+        "--projects-from",
+        metavar="FILE|GLOB",
+        help="Sync every project listed in FILE (one per line) or matched by GLOB",
+    )
+    sync_parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="Number of worker processes for --projects-from (default: CPU count)",
+    )
     assist_group = sync_parser.add_argument_group("assistant selection")
     assist_group.add_argument(
         "--assistant",
@@ -102,6 +223,11 @@ def create_parser() -> argparse.ArgumentParser:
     status_p = project_sub.add_parser("status", help="Show last sync info")
     status_p.add_argument("--project-dir", "-p")
 
+    drift_p = project_sub.add_parser(
+        "drift", help="Report modified, missing and pristine starter files"
+    )
+    drift_p.add_argument("--project-dir", "-p")
+
     clean_p = project_sub.add_parser("clean", help="Remove all rulebook-ai artifacts")
     clean_p.add_argument("--project-dir", "-p")
 
@@ -115,6 +241,21 @@ def create_parser() -> argparse.ArgumentParser:
     clean_ctx.add_argument("--action", choices=["delete", "keep"])
     clean_ctx.add_argument("--force", action="store_true")
 
+    # ------------------------------------------------------------------
+    # Cache commands
+    # ------------------------------------------------------------------
+
+    cache_parser = subparsers.add_parser("cache", help="Manage the user-level pack cache")
+    cache_sub = cache_parser.add_subparsers(dest="cache_command", required=True)
+    cache_sub.add_parser("stats", help="Show cache location, entries and size")
+    prune_p = cache_sub.add_parser("prune", help="Evict least recently used packs")
+    prune_p.add_argument(
+        "--max-size",
+        metavar="SIZE",
+        help="Shrink the cache to SIZE (e.g. 100M); defaults to the configured limit",
+    )
+    prune_p.add_argument("--all", dest="clear", action="store_true", help="Remove every cached pack")
+
     # ------------------------------------------------------------------
     # Utility commands
     # ------------------------------------------------------------------
@@ -125,9 +266,21 @@ def create_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def _for_each(items: List[str], action: Callable[[str], int]) -> int:
+    """Apply ``action`` to every item; return the last non-zero exit code."""
+    rc = 0
+    for item in items:
+        result = action(item)
+        if result != 0:
+            rc = result
+    return rc
+
+
 def handle_command(args: argparse.Namespace) -> int:
+    from .core import RuleManager
+
     project_dir = getattr(args, "project_dir", None)
-    rm = RuleManager(project_dir)
+    rm = RuleManager(project_dir, link_mode=getattr(args, "link_mode", None))
 
     if args.command == "packs":
         cmd = args.packs_command
@@ -135,48 +288,74 @@ def handle_command(args: argparse.Namespace) -> int:
             rm.list_packs()
             return 0
         if cmd == "add":
-            rc = 0
-            for name in args.names:
-                result = rm.add_pack(name, project_dir)
-                if result != 0:
-                    rc = result
-            return rc
+            return rm.add_packs(args.names, project_dir, jobs=args.jobs)
         if cmd == "remove":
-            rc = 0
-            for name in args.names:
-                result = rm.remove_pack(name, project_dir)
-                if result != 0:
-                    rc = result
-            return rc
+            with rm.session(project_dir):
+                return _for_each(args.names, lambda name: rm.remove_pack(name, project_dir))
+        if cmd == "search":
+            return rm.search_packs(args.query, args.limit)
         if cmd == "update":
             return rm.update_community_index()
+        if cmd == "outdated":
+            return rm.packs_outdated(project_dir, jobs=args.jobs)
+        if cmd == "upgrade":
+            return rm.upgrade_packs(args.names or None, project_dir, jobs=args.jobs)
         if cmd == "status":
             return rm.packs_status(project_dir)
 
     elif args.command == "profiles":
         cmd = args.profiles_command
-        if cmd == "create":
-            return rm.create_profile(args.name, project_dir)
-        if cmd == "delete":
-            return rm.delete_profile(args.name, project_dir)
-        if cmd == "add":
-            return rm.add_pack_to_profile(args.pack, args.profile, project_dir)
-        if cmd == "remove":
-            return rm.remove_pack_from_profile(args.pack, args.profile, project_dir)
+        with rm.session(project_dir):
+            if cmd == "create":
+                return _for_each(args.names, lambda name: rm.create_profile(name, project_dir))
+            if cmd == "delete":
+                return _for_each(args.names, lambda name: rm.delete_profile(name, project_dir))
+            if cmd == "add":
+                return _for_each(
+                    args.packs, lambda pack: rm.add_pack_to_profile(pack, args.profile, project_dir)
+                )
+            if cmd == "remove":
+                return _for_each(
+                    args.packs, lambda pack: rm.remove_pack_from_profile(pack, args.profile, project_dir)
+                )
         if cmd == "list":
             return rm.list_profiles(project_dir)
 
     elif args.command == "project":
         cmd = args.project_command
+        if cmd == "sync" and args.watch and (args.plan or args.projects_from):
+            print("Cannot combine --watch with --plan or --projects-from.")
+            return 1
+        if cmd == "sync" and args.projects_from:
+            return _sync_many(args)
+        if cmd == "sync" and args.watch:
+            from .watch import watch_project
+
+            return watch_project(
+                rm,
+                project_dir,
+                interval=args.interval,
+                assistants=getattr(args, "assistants", None),
+                profile=args.profile,
+                packs=getattr(args, "packs", None),
+                jobs=args.jobs,
+                debug_staging=args.debug_staging,
+            )
         if cmd == "sync":
             return rm.project_sync(
                 assistants=getattr(args, "assistants", None),
                 profile=args.profile,
                 packs=getattr(args, "packs", None),
                 project_dir=project_dir,
+                force=args.force,
+                jobs=args.jobs,
+                debug_staging=args.debug_staging,
+                plan_only=args.plan,
             )
         if cmd == "status":
             return rm.project_status(project_dir)
+        if cmd == "drift":
+            return rm.project_drift(project_dir)
         if cmd == "clean":
             print(
                 "WARNING: This will remove .rulebook-ai/, memory/, tools/, and generated rules."
@@ -197,6 +376,12 @@ def handle_command(args: argparse.Namespace) -> int:
                 project_dir=project_dir, action=args.action, force=args.force
             )
 
+    elif args.command == "cache":
+        if args.cache_command == "stats":
+            return rm.cache_stats()
+        if args.cache_command == "prune":
+            return rm.cache_prune(args.max_size, args.clear)
+
     elif args.command == "bug-report":
         return rm.report_bug()
     elif args.command == "rate-ruleset":
@@ -205,14 +390,57 @@ def handle_command(args: argparse.Namespace) -> int:
     return 1
 
 
+def _sync_many(args: argparse.Namespace) -> int:
+    from . import batch_sync
+
+    if args.project_dir:
+        print("Cannot specify both --project-dir and --projects-from.")
+        return 1
+    projects = batch_sync.resolve_projects(args.projects_from)
+    if not projects:
+        print(f"No projects found for '{args.projects_from}'.")
+        return 1
+
+    print(f"{'Planning' if args.plan else 'Syncing'} {len(projects)} project(s)...")
+    start = time.perf_counter()
+    results = batch_sync.sync_projects(
+        projects,
+        workers=args.workers,
+        link_mode=getattr(args, "link_mode", None),
+        assistants=getattr(args, "assistants", None),
+        profile=args.profile,
+        packs=getattr(args, "packs", None),
+        force=args.force,
+        jobs=args.jobs,
+        debug_staging=args.debug_staging,
+        plan_only=args.plan,
+    )
+    return batch_sync.print_report(results, time.perf_counter() - start, planned=args.plan)
+
+
+def _report_imports(dispatched: float) -> None:
+    now = time.perf_counter()
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+    print(
+        f"[import profile] startup {(dispatched - _START) * 1000:.1f} ms, "
+        f"command {(now - dispatched) * 1000:.1f} ms, {len(sys.modules)} modules; "
+        f"heavy: {', '.join(heavy) or 'none'}",
+        file=sys.stderr,
+    )
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     parser = create_parser()
     args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+    dispatched = time.perf_counter()
     try:
         return handle_command(args)
     except Exception as e:  # pragma: no cover - top level safety
         print(f"An unexpected error occurred: {e}")
         return 1
+    finally:
+        if os.environ.get(IMPORT_PROFILE_ENV):
+            _report_imports(dispatched)
 
 
 if __name__ == "__main__":
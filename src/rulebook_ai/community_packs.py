@@ -2,21 +2,42 @@ from __future__ import annotations
 
 import json
 import os
-import re
 import shutil
-import subprocess
-import tempfile
-import urllib.request
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
-import yaml
+from . import file_ops, pack_cache
+from .locking import project_lock
+from .pack_catalog import PackCatalog
+from .pack_validation import validate_pack
 
+# subprocess, tarfile, tempfile and urllib are imported where they are used:
+# listing and searching packs never need git or the network.
+if TYPE_CHECKING:
+    import subprocess
 
-INDEX_CACHE_PATH = Path(__file__).parent / "community" / "index_cache" / "packs.json"
+# Snapshot of the community index shipped with the package. It is only read,
+# as a fallback until the user cache has been populated.
+SEED_INDEX_PATH = Path(__file__).parent / "community" / "index_cache" / "packs.json"
 DEFAULT_INDEX_URL = (
     "https://raw.githubusercontent.com/botingw/community-index/main/packs.json"
 )
+INDEX_TIMEOUT_ENV = "RULEBOOK_AI_INDEX_TIMEOUT"
+DEFAULT_INDEX_TIMEOUT = 10.0
+INDEX_RETRIES = 4
+INDEX_RETRY_DELAY = 0.5
+
+# How long a fetched index is considered fresh, and how often a stale one may
+# trigger a background refresh (so an offline machine does not spawn a
+# refresh on every command).
+INDEX_TTL_ENV = "RULEBOOK_AI_INDEX_TTL"
+DEFAULT_INDEX_TTL = 24 * 60 * 60
+INDEX_AUTO_REFRESH_ENV = "RULEBOOK_AI_INDEX_AUTO_REFRESH"
+REFRESH_RETRY_INTERVAL = 5 * 60
 
 
 def parse_slug(slug: str) -> tuple[str, str, str]:
@@ -31,100 +52,152 @@ def parse_slug(slug: str) -> tuple[str, str, str]:
 def validate_pack_structure(
     pack_root: Path, expected_name: Optional[str] = None
 ) -> tuple[str, Dict[str, Any]]:
-    """Validate pack structure and optional name, returning name and manifest."""
-    manifest_path = pack_root / "manifest.yaml"
-    readme_path = pack_root / "README.md"
-    rules_dir = pack_root / "rules"
-
-    if not manifest_path.is_file() or not readme_path.is_file() or not rules_dir.is_dir():
-        raise ValueError("Invalid pack structure.")
-
-    allowed_root = {
-        "manifest.yaml",
-        "README.md",
-        "rules",
-        "memory_starters",
-        "tool_starters",
-    }
-    for item in pack_root.iterdir():
-        if item.name not in allowed_root and not item.name.startswith("."):
-            raise ValueError(f"Unexpected item in pack root: {item.name}")
-
-    manifest = yaml.safe_load(manifest_path.read_text()) or {}
-    for field in ["name", "version", "summary"]:
-        if not manifest.get(field):
-            raise ValueError(f"manifest.yaml missing '{field}'.")
-    name = manifest["name"]
-    if not re.fullmatch(r"[A-Za-z0-9-]+", name):
-        raise ValueError(
-            "manifest name must be a slug: letters, digits, and dashes"
-        )
-    if expected_name and name != expected_name:
-        raise ValueError(f"name mismatch: {name} != {expected_name}")
-
-    rule_dirs = [d for d in rules_dir.iterdir() if d.is_dir()]
-    if not rule_dirs:
-        raise ValueError("rules/ must contain at least one numbered directory.")
-    prefixes: set[str] = set()
-    total_files = 0
-    for d in rule_dirs:
-        m = re.fullmatch(r"(\d{2})-rules(?:-([a-z0-9-]+))?", d.name)
-        if not m:
-            raise ValueError(f"Invalid rules directory name: {d.name}")
-        prefix, mode = m.groups()
-        if prefix in prefixes:
-            raise ValueError(f"Duplicate rules directory prefix: {prefix}")
-        prefixes.add(prefix)
-        if mode is None and d.name != "01-rules":
-            raise ValueError("Generic rules directory must be named '01-rules'.")
-
-        files = [f for f in d.iterdir() if f.is_file()]
-        if not files:
-            raise ValueError(f"{d.name} must contain at least one rule file.")
-        file_prefixes: set[str] = set()
-        for f in files:
-            if f.name.startswith("."):
-                raise ValueError(f"Hidden files not allowed: {f.name}")
-            if not f.suffix == ".md":
-                raise ValueError(f"Rule files must use .md extension: {f.name}")
-            mf = re.fullmatch(r"(\d{2})-.*\.md", f.name)
-            if not mf:
-                raise ValueError(f"Invalid rule file name: {f.name}")
-            fprefix = mf.group(1)
-            if fprefix in file_prefixes:
-                raise ValueError(
-                    f"Duplicate rule file prefix in {d.name}: {f.name}"
-                )
-            file_prefixes.add(fprefix)
-            try:
-                f.read_text(encoding="utf-8")
-            except UnicodeDecodeError:
-                raise ValueError(f"Rule file not UTF-8 encoded: {f.name}")
-        total_files += len(files)
-
-    if total_files == 0:
-        raise ValueError("rules/ directories must contain at least one rule file.")
-
-    return name, manifest
+    """Validate pack structure and optional name, returning name and manifest.
+
+    Raises ``ValueError`` listing every problem; see
+    :func:`pack_validation.validate_pack` for the full report.
+    """
+    report = validate_pack(pack_root, expected_name)
+    report.raise_for_errors()
+    return report.name, report.manifest
+
+
+def index_cache_path() -> Path:
+    """Return the user-level community index cache."""
+    return pack_cache.cache_root() / "index" / "packs.json"
+
+
+def _index_source() -> Path:
+    cache = index_cache_path()
+    return cache if cache.exists() else SEED_INDEX_PATH
 
 
 def _load_index_cache() -> Dict[str, List[Dict[str, str]]]:
-    if INDEX_CACHE_PATH.exists():
+    source = _index_source()
+    if source.exists():
         try:
-            return json.loads(INDEX_CACHE_PATH.read_text())
+            return json.loads(source.read_text())
         except Exception:
             pass
     return {"packs": []}
 
 
 def load_index_cache() -> Dict[str, List[Dict[str, str]]]:
-    """Return the cached community index."""
+    """Return the cached community index, or the bundled one if never fetched."""
     return _load_index_cache()
 
 
+def _catalog_path() -> Path:
+    return index_cache_path().with_name("packs.catalog.json")
+
+
+def _index_signature() -> Optional[List[Any]]:
+    source = _index_source()
+    try:
+        st = source.stat()
+    except FileNotFoundError:
+        return None
+    return [str(source), st.st_size, st.st_mtime_ns]
+
+
+# (index cache signature, catalog) of the last catalog loaded by this process.
+_catalog_memo: Optional[Tuple[Optional[List[Any]], PackCatalog]] = None
+
+
+def index_is_stale() -> bool:
+    """True if the index was never fetched or not checked within the TTL."""
+    ttl = float(os.environ.get(INDEX_TTL_ENV, DEFAULT_INDEX_TTL))
+    try:
+        checked = _index_meta_path().stat().st_mtime
+    except FileNotFoundError:
+        return True
+    return time.time() - checked > ttl
+
+
+def refresh_index_in_background() -> bool:
+    """Start a detached ``packs update`` if the index is stale.
+
+    Returns immediately; callers keep using the cached (or bundled) index.
+    Disabled when ``RULEBOOK_AI_INDEX_AUTO_REFRESH`` is ``0``.
+    """
+    if os.environ.get(INDEX_AUTO_REFRESH_ENV, "1").lower() in {"0", "false", "no"}:
+        return False
+    if not index_is_stale():
+        return False
+    marker = index_cache_path().with_name(".refresh-attempt")
+    try:
+        if time.time() - marker.stat().st_mtime < REFRESH_RETRY_INTERVAL:
+            return False
+    except FileNotFoundError:
+        pass
+    try:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+    except OSError:
+        return False
+
+    import subprocess
+
+    env = os.environ.copy()
+    package_parent = str(Path(__file__).resolve().parent.parent)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_parent, env.get("PYTHONPATH")]))
+    kwargs: Dict[str, Any] = {}
+    if os.name == "posix":
+        kwargs["start_new_session"] = True
+    else:  # pragma: no cover - Windows
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    try:
+        subprocess.Popen(
+            [sys.executable, "-c", "from rulebook_ai.community_packs import update_index_cache; "
+             "update_index_cache()"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            close_fds=True,
+            **kwargs,
+        )
+    except OSError:
+        return False
+    return True
+
+
+def load_catalog() -> PackCatalog:
+    """Return the compiled catalog of the cached community index.
+
+    The catalog written by :func:`_save_index_cache` is used while it matches
+    the index cache; otherwise (e.g. the bundled or a hand-edited index) it is
+    compiled in memory. A stale index is served as is while a background
+    refresh runs.
+    """
+    global _catalog_memo
+    signature = _index_signature()
+    if _catalog_memo is not None and _catalog_memo[0] == signature:
+        return _catalog_memo[1]
+    refresh_index_in_background()
+    catalog = None
+    try:
+        data = json.loads(_catalog_path().read_text())
+        if data.get("source") == signature:
+            catalog = PackCatalog.from_json(data)
+    except (OSError, ValueError, KeyError):
+        pass
+    if catalog is None:
+        catalog = PackCatalog.build(load_index_cache().get("packs", []))
+    _catalog_memo = (signature, catalog)
+    return catalog
+
+
 def _save_index_cache(data: Dict[str, List[Dict[str, str]]]) -> None:
-    INDEX_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    INDEX_CACHE_PATH.write_text(json.dumps(data, indent=2))
+    index_cache_path().parent.mkdir(parents=True, exist_ok=True)
+    file_ops.atomic_write_bytes(
+        index_cache_path(), json.dumps(data, separators=(",", ":")).encode("utf-8")
+    )
+    catalog = PackCatalog.build(data.get("packs", []))
+    file_ops.atomic_write_bytes(
+        _catalog_path(),
+        json.dumps(catalog.to_json(_index_signature()), separators=(",", ":")).encode("utf-8"),
+    )
 
 
 def _validate_index(data: Dict[str, List[Dict[str, str]]]) -> List[Dict[str, str]]:
@@ -134,9 +207,9 @@ def _validate_index(data: Dict[str, List[Dict[str, str]]]) -> List[Dict[str, str
     if not isinstance(packs, list):
         raise ValueError("Index missing 'packs' list")
     for entry in packs:
-        for field in ["name", "username", "repo", "description"]:
-            if field not in entry or not isinstance(entry[field], str):
-                raise ValueError(f"Index entry missing '{field}'")
+        for key in ["name", "username", "repo", "description"]:
+            if key not in entry or not isinstance(entry[key], str):
+                raise ValueError(f"Index entry missing '{key}'")
         if "path" in entry and not isinstance(entry["path"], str):
             raise ValueError("Index 'path' must be string")
         if "commit" in entry and not isinstance(entry["commit"], str):
@@ -144,169 +217,537 @@ def _validate_index(data: Dict[str, List[Dict[str, str]]]) -> List[Dict[str, str
     return packs
 
 
+def _index_meta_path() -> Path:
+    return index_cache_path().with_name("packs.meta.json")
+
+
+def _load_index_meta(url: str) -> Dict[str, str]:
+    """Return the validators of the cached index if it was fetched from ``url``."""
+    if not index_cache_path().exists():
+        return {}
+    try:
+        meta = json.loads(_index_meta_path().read_text())
+    except (OSError, ValueError):
+        return {}
+    return meta if meta.get("url") == url else {}
+
+
+def _fetch_index(url: str, meta: Dict[str, str]) -> Tuple[Optional[bytes], Dict[str, str]]:
+    """GET ``url`` conditionally. Returns ``(None, meta)`` when not modified."""
+    import gzip
+    import urllib.error
+    import urllib.request
+
+    request = urllib.request.Request(url, headers={"Accept-Encoding": "gzip"})
+    if meta.get("etag"):
+        request.add_header("If-None-Match", meta["etag"])
+    if meta.get("last_modified"):
+        request.add_header("If-Modified-Since", meta["last_modified"])
+    timeout = float(os.environ.get(INDEX_TIMEOUT_ENV, DEFAULT_INDEX_TIMEOUT))
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as resp:
+            body = resp.read()
+            headers = resp.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, meta
+        raise
+    if headers.get("Content-Encoding", "").lower() == "gzip":
+        body = gzip.decompress(body)
+    new_meta = {"url": url}
+    if headers.get("ETag"):
+        new_meta["etag"] = headers["ETag"]
+    if headers.get("Last-Modified"):
+        new_meta["last_modified"] = headers["Last-Modified"]
+    return body, new_meta
+
+
+def _is_transient(error: Exception) -> bool:
+    import urllib.error
+
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code >= 500 or error.code == 429
+    return isinstance(error, (urllib.error.URLError, OSError))
+
+
 def update_index_cache() -> int:
+    """Refresh the community index, downloading it only if it changed.
+
+    The ETag/Last-Modified validators are kept in ``packs.meta.json`` next to
+    the cache, so an unchanged index costs one conditional request and no
+    write. Network errors are retried with exponential backoff.
+    """
     url = os.environ.get("RULEBOOK_AI_INDEX_URL", DEFAULT_INDEX_URL)
+    meta = _load_index_meta(url)
+    delay = INDEX_RETRY_DELAY
     last_err: Optional[str] = None
-    for _ in range(2):
+    for attempt in range(INDEX_RETRIES):
         try:
-            with urllib.request.urlopen(url) as resp:
-                raw = resp.read().decode("utf-8")
-            data = json.loads(raw)
+            body, new_meta = _fetch_index(url, meta)
+            if body is None:
+                # Record the successful check so the TTL starts over.
+                os.utime(_index_meta_path())
+                print("Community index is up to date.")
+                return 0
+            data = json.loads(body.decode("utf-8"))
             _validate_index(data)
             _save_index_cache(data)
+            file_ops.atomic_write_bytes(_index_meta_path(), json.dumps(new_meta).encode("utf-8"))
             print("Community index updated.")
             return 0
         except Exception as e:  # pragma: no cover - network errors vary
             last_err = str(e)
+            if not _is_transient(e) or attempt == INDEX_RETRIES - 1:
+                break
+            time.sleep(delay)
+            delay *= 2
     print(f"Failed to update community index: {last_err}")
     return 1
 
 
-def add_pack_from_index(
-    name: str,
-    project_root: Path,
-    source_packs_dir: Path,
-    load_selection: Callable[[Path], object],
-    save_selection: Callable[[Path, object], None],
-) -> int:
-    index = load_index_cache().get("packs", [])
-    entry = next((p for p in index if p.get("name") == name), None)
+def _git(*args: str) -> subprocess.CompletedProcess:
+    import subprocess
+
+    return subprocess.run(["git", *args], capture_output=True, text=True)
+
+
+def _shallow_checkout(repo_url: str, subpath: str, ref: Optional[str], clone_dir: Path) -> bool:
+    """Fetch only ``ref`` (or the default branch) at depth 1, without blobs
+    outside ``subpath``. Returns False if the server refuses the request."""
+    clone_dir.mkdir(parents=True)
+    steps = [
+        ("init", "-q", str(clone_dir)),
+        ("-C", str(clone_dir), "remote", "add", "origin", repo_url),
+    ]
+    if subpath:
+        steps.append(("-C", str(clone_dir), "sparse-checkout", "set", subpath.strip("/")))
+    steps += [
+        ("-C", str(clone_dir), "fetch", "-q", "--depth", "1", "--filter=blob:none", "origin", ref or "HEAD"),
+        ("-C", str(clone_dir), "checkout", "-q", "FETCH_HEAD"),
+    ]
+    return all(_git(*step).returncode == 0 for step in steps)
+
+
+# Each fetched ref is kept under refs/rulebook/ (the default branch as
+# refs/rulebook/HEAD, pins as refs/rulebook/pins/<ref>) so that its commit is
+# never garbage-collected and a pinned install can reuse it without a fetch.
+_MIRROR_REFSPECS = (
+    "+HEAD:refs/rulebook/HEAD",
+    "+refs/heads/*:refs/heads/*",
+    "+refs/tags/*:refs/tags/*",
+)
+
+
+def _mirror_ref(ref: Optional[str]) -> str:
+    return f"refs/rulebook/pins/{ref}" if ref else "refs/rulebook/HEAD"
+
+
+def _resolve_commit(mirror: Path, ref: Optional[str]) -> Optional[str]:
+    spec = f"{ref or 'refs/rulebook/HEAD'}^{{commit}}"
+    result = _git("-C", str(mirror), "rev-parse", "--verify", "-q", spec)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def _extract(mirror: Path, commit: str, subpath: str, dest: Path) -> Optional[str]:
+    import io
+    import subprocess
+    import tarfile
+
+    paths = [subpath.strip("/")] if subpath else []
+    result = subprocess.run(
+        ["git", "-C", str(mirror), "archive", "--format=tar", commit, *paths],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        return result.stderr.decode("utf-8", "replace").strip()
+    dest.mkdir(parents=True, exist_ok=True)
+    with tarfile.open(fileobj=io.BytesIO(result.stdout)) as archive:
+        if hasattr(tarfile, "data_filter"):
+            archive.extractall(dest, filter="data")
+        else:  # pragma: no cover - Python < 3.12 without the backport
+            archive.extractall(dest)
+    return None
+
+
+def checkout_from_mirror(
+    repo_url: str, subpath: str, ref: Optional[str], dest: Path
+) -> Tuple[Optional[str], Optional[str]]:
+    """Extract the pack at ``ref`` into ``dest`` from a persistent bare mirror.
+
+    Each repository has one shallow, blobless bare mirror in the user cache.
+    A pinned commit that is already in the mirror needs no network.
+    Otherwise only ``ref`` (or the default branch) is fetched at depth 1, so
+    a big monorepo costs one commit's trees. ``git archive`` then fetches
+    just the blobs under ``subpath``. Refs the server will not serve that way
+    (e.g. an abbreviated SHA) fall back to fetching the commit history of
+    every branch and tag without trees or blobs. Returns ``(commit, error)``.
+    """
+    mirror = pack_cache.mirror_path(repo_url)
+    mirror.mkdir(parents=True, exist_ok=True)
+    with project_lock(mirror):
+        created = not (mirror / "HEAD").exists()
+        if created:
+            for step in (
+                ("init", "-q", "--bare", str(mirror)),
+                ("-C", str(mirror), "remote", "add", "origin", repo_url),
+            ):
+                result = _git(*step)
+                if result.returncode != 0:
+                    return None, result.stderr.strip()
+
+        commit = _resolve_commit(mirror, ref) if pack_cache.is_commit_sha(ref) else None
+        if commit is None:
+            target = f"+{ref or 'HEAD'}:{_mirror_ref(ref)}"
+            result = _git(
+                "-C", str(mirror), "fetch", "-q", "--depth", "1", "--filter=blob:none",
+                "origin", target,
+            )
+            if result.returncode == 0:
+                commit = _resolve_commit(mirror, _mirror_ref(ref))
+            elif ref:
+                fetch = ["-C", str(mirror), "fetch", "-q", "--filter=tree:0"]
+                shallow = _git("-C", str(mirror), "rev-parse", "--is-shallow-repository")
+                if shallow.stdout.strip() == "true":
+                    fetch.append("--unshallow")
+                result = _git(*fetch, "origin", *_MIRROR_REFSPECS)
+                if result.returncode == 0:
+                    commit = _resolve_commit(mirror, ref)
+            if result.returncode != 0:
+                if created:
+                    shutil.rmtree(mirror, ignore_errors=True)
+                return None, result.stderr.strip()
+        if commit is None:
+            return None, f"Could not find '{ref}' in {repo_url}."
+
+        error = _extract(mirror, commit, subpath, dest)
+        return (None, error) if error else (commit, None)
+
+
+def fetch_pack_checkout(
+    repo_url: str, subpath: str, ref: Optional[str], clone_dir: Path
+) -> Optional[str]:
+    """Check out the pack repository at ``ref`` into ``clone_dir``.
+
+    Tries a shallow (``--depth 1``), blobless (``--filter=blob:none``) fetch
+    of just the requested commit with a sparse checkout of ``subpath``, so
+    only the pack's files are downloaded. Servers that cannot serve a single
+    commit (e.g. an abbreviated SHA) fall back to a full clone. Returns an
+    error message, or None on success.
+    """
+    if _shallow_checkout(repo_url, subpath, ref, clone_dir):
+        return None
+
+    shutil.rmtree(clone_dir, ignore_errors=True)
+    result = _git("clone", repo_url, str(clone_dir))
+    if result.returncode != 0:
+        return result.stderr.strip()
+    if ref:
+        checkout = _git("-C", str(clone_dir), "checkout", ref)
+        if checkout.returncode != 0:
+            return checkout.stderr.strip()
+    return None
+
+
+@dataclass
+class PackRequest:
+    """A community pack to install: a ``username/repo[/path]`` slug and optional pin."""
+
+    slug: str
+    ref: Optional[str] = None
+    expected_name: Optional[str] = None
+
+
+@dataclass
+class PreparedPack:
+    """A community pack fetched and validated, ready to be installed."""
+
+    request: PackRequest
+    pack_name: str = ""
+    manifest: Dict[str, Any] = field(default_factory=dict)
+    pack_root: Optional[Path] = None
+    commit: str = ""
+    error: Optional[str] = None
+
+
+def request_from_index(name: str) -> Optional[PackRequest]:
+    """Return the install request for community index pack ``name``."""
+    entry = load_catalog().get(name)
     if not entry:
-        print(f"Pack '{name}' not found in community index.")
-        return 1
+        return None
     slug_parts = [entry["username"], entry["repo"]]
     if entry.get("path"):
         slug_parts.append(entry["path"])
-    slug = "/".join(slug_parts)
-    ref = entry.get("commit")
-    return add_pack_from_slug(
-        slug,
-        project_root,
-        source_packs_dir,
-        load_selection,
-        save_selection,
-        ref=ref,
-        expected_name=entry["name"],
-    )
+    return PackRequest("/".join(slug_parts), entry.get("commit"), entry["name"])
 
 
-def add_pack_from_slug(
-    slug: str,
-    project_root: Path,
-    source_packs_dir: Path,
-    load_selection: Callable[[Path], object],
-    save_selection: Callable[[Path, object], None],
-    ref: Optional[str] = None,
-    expected_name: Optional[str] = None,
-) -> int:
-    try:
-        username, repo, subpath = parse_slug(slug)
-    except ValueError:
-        print(f"Invalid slug '{slug}'.")
-        return 1
-
+def _repo_url(username: str, repo: str) -> str:
     base = os.environ.get("RULEBOOK_AI_GIT_BASE", "https://github.com")
     if base.startswith("http://") or base.startswith("https://"):
-        repo_url = f"{base.rstrip('/')}/{username}/{repo}"
-    else:
-        repo_url = str(Path(base) / username / repo)
+        return f"{base.rstrip('/')}/{username}/{repo}"
+    return str(Path(base) / username / repo)
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        clone_dir = Path(tmpdir) / "repo"
-        result = subprocess.run(
-            ["git", "clone", repo_url, str(clone_dir)],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode != 0:
-            print(result.stderr.strip())
-            return 1
 
-        if ref:
-            checkout = subprocess.run(
-                ["git", "-C", str(clone_dir), "checkout", ref],
-                capture_output=True,
-                text=True,
-            )
-            if checkout.returncode != 0:
-                print(checkout.stderr.strip())
-                return 1
+def prepare_pack(request: PackRequest, source_packs_dir: Path, workdir: Path) -> PreparedPack:
+    """Fetch and validate ``request``. Safe to run concurrently.
 
-        pack_root = clone_dir / subpath if subpath else clone_dir
+    The pack tree comes from the user cache when possible; otherwise it is
+    extracted into ``workdir``, which must outlive the returned value.
+    """
+    prepared = PreparedPack(request)
+    try:
+        username, repo, subpath = parse_slug(request.slug)
+    except ValueError:
+        prepared.error = f"Invalid slug '{request.slug}'."
+        return prepared
+    repo_url = _repo_url(username, repo)
+    ref = request.ref
+
+    # A cached tree for this exact commit makes git unnecessary.
+    commit = ref if pack_cache.is_commit_sha(ref) else None
+    cached = pack_cache.lookup(repo_url, commit, subpath) if commit else None
+    if cached is not None:
+        pack_root = cached
+    else:
+        clone_dir = workdir / "repo"
         try:
-            pack_name, manifest = validate_pack_structure(
-                pack_root, expected_name
-            )
-        except ValueError as e:
-            print(str(e))
-            return 1
-
-        builtins = {d.name for d in source_packs_dir.iterdir() if d.is_dir()}
-        if pack_name in builtins:
-            print(f"Pack name '{pack_name}' conflicts with built-in pack names.")
-            return 1
-
-        dest_dir = project_root / ".rulebook-ai" / "packs" / pack_name
-
-        if dest_dir.exists():
-            meta_path = dest_dir / "pack.json"
-            if meta_path.exists():
-                meta = json.loads(meta_path.read_text())
-                if meta.get("slug") != slug:
-                    print(
-                        f"Pack '{pack_name}' already installed from a different source."
-                    )
-                    return 1
-                shutil.rmtree(dest_dir)
-            else:
-                print(f"Pack '{pack_name}' already installed as built-in pack.")
-                return 1
-
-        commit = (
-            subprocess.run(
-                ["git", "-C", str(clone_dir), "rev-parse", "HEAD"],
-                capture_output=True,
-                text=True,
-            ).stdout.strip()
-        )
+            commit, error = checkout_from_mirror(repo_url, subpath, ref, clone_dir)
+        except OSError:
+            # The user cache is not writable: fetch a one-off checkout.
+            shutil.rmtree(clone_dir, ignore_errors=True)
+            error = fetch_pack_checkout(repo_url, subpath, ref, clone_dir)
+            commit = _git("-C", str(clone_dir), "rev-parse", "HEAD").stdout.strip()
+        if error is not None:
+            prepared.error = error
+            return prepared
+        pack_root = clone_dir / subpath if subpath else clone_dir
+        if pack_root.is_dir():
+            pack_root = pack_cache.store(repo_url, commit, subpath, pack_root)
 
+    try:
+        pack_name, manifest = validate_pack_structure(pack_root, request.expected_name)
+    except ValueError as e:
+        prepared.error = str(e)
+        return prepared
+
+    builtins = {d.name for d in source_packs_dir.iterdir() if d.is_dir()}
+    if pack_name in builtins:
+        prepared.error = f"Pack name '{pack_name}' conflicts with built-in pack names."
+        return prepared
+
+    prepared.pack_name = pack_name
+    prepared.manifest = manifest
+    prepared.pack_root = pack_root
+    prepared.commit = commit or ""
+    return prepared
+
+
+def prepare_packs(
+    requests: List[PackRequest], source_packs_dir: Path, workdir: Path, jobs: int = 4
+) -> List[PreparedPack]:
+    """Fetch and validate ``requests`` in a pool of ``jobs`` workers, in order."""
+    dirs = [workdir / str(i) for i in range(len(requests))]
+    if jobs <= 1 or len(requests) <= 1:
+        return [prepare_pack(r, source_packs_dir, d) for r, d in zip(requests, dirs)]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(lambda rd: prepare_pack(rd[0], source_packs_dir, rd[1]), zip(requests, dirs)))
+
+
+def check_destination(prepared: PreparedPack, project_root: Path) -> Optional[str]:
+    """Return an error if ``prepared`` would overwrite a pack from another source."""
+    dest_dir = project_root / ".rulebook-ai" / "packs" / prepared.pack_name
+    if not dest_dir.exists():
+        return None
+    meta_path = dest_dir / "pack.json"
+    if not meta_path.exists():
+        return f"Pack '{prepared.pack_name}' already installed as built-in pack."
+    if json.loads(meta_path.read_text()).get("slug") != prepared.request.slug:
+        return f"Pack '{prepared.pack_name}' already installed from a different source."
+    return None
+
+
+def confirm_install(packs: List[PreparedPack]) -> Optional[bool]:
+    """Warn about every community pack and ask once. None means aborted."""
+    for prepared in packs:
+        ref = prepared.request.ref
         warning = (
-            f"WARNING: You are installing a community pack from {slug}"
+            f"WARNING: You are installing a community pack from {prepared.request.slug}"
             + (f"@{ref}" if ref else "")
             + ". This code is not audited."
         )
         if not ref:
             warning += " Installing without a pinned commit may change unexpectedly."
         print(warning)
-        try:
-            resp = input("Proceed? (yes/No): ").strip().lower()
-        except (EOFError, KeyboardInterrupt):
-            print("\nInstallation cancelled.")
-            return 1
-        if resp not in {"y", "yes"}:
-            print("Installation cancelled by user.")
-            return 0
+    try:
+        resp = input("Proceed? (yes/No): ").strip().lower()
+    except (EOFError, KeyboardInterrupt):
+        print("\nInstallation cancelled.")
+        return None
+    if resp not in {"y", "yes"}:
+        print("Installation cancelled by user.")
+        return False
+    return True
+
+
+def install_prepared(
+    prepared: PreparedPack,
+    project_root: Path,
+    load_selection: Callable[[Path], object],
+    save_selection: Callable[[Path, object], None],
+    link_mode: str = "auto",
+) -> int:
+    """Copy a confirmed pack into the project and record it in the selection.
 
+    Only this step holds the project lock; fetching and confirming do not.
+    """
+    dest_dir = project_root / ".rulebook-ai" / "packs" / prepared.pack_name
+    with project_lock(project_root):
+        if dest_dir.exists():
+            shutil.rmtree(dest_dir)
         dest_dir.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copytree(pack_root, dest_dir)
+        pack_cache.copy_out(prepared.pack_root, dest_dir, link_mode)
 
-        meta = {"name": pack_name, "slug": slug, "commit": commit}
+        meta = {"name": prepared.pack_name, "slug": prepared.request.slug, "commit": prepared.commit}
         (dest_dir / "pack.json").write_text(json.dumps(meta, indent=2))
 
         selection = load_selection(project_root)
-        version = manifest.get("version", "0.0.0")
         entry = {
-            "name": pack_name,
-            "version": version,
-            "slug": slug,
-            "commit": commit,
+            "name": prepared.pack_name,
+            "version": prepared.manifest.get("version", "0.0.0"),
+            "slug": prepared.request.slug,
+            "commit": prepared.commit,
         }
-        existing = next((p for p in selection.packs if p["name"] == pack_name), None)
+        existing = next((p for p in selection.packs if p["name"] == prepared.pack_name), None)
         if existing:
             existing.update(entry)
         else:
             selection.packs.append(entry)
         save_selection(project_root, selection)
 
-        print(f"Added community pack '{pack_name}'.")
-        return 0
+    print(f"Added community pack '{prepared.pack_name}'.")
+    return 0
+
+
+@dataclass
+class OutdatedPack:
+    """An installed community pack and the upstream commit it could move to."""
+
+    name: str
+    slug: str
+    current: str
+    latest: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def outdated(self) -> bool:
+        return bool(self.latest) and self.latest != self.current
+
+
+def remote_head(repo_url: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return ``(commit, error)`` for the default branch of ``repo_url``."""
+    result = _git("ls-remote", repo_url, "HEAD")
+    if result.returncode != 0:
+        return None, result.stderr.strip() or f"Could not reach {repo_url}."
+    for line in result.stdout.splitlines():
+        commit, _, ref = line.partition("\t")
+        if ref == "HEAD":
+            return commit, None
+    return None, f"{repo_url} has no default branch."
+
+
+def _indexed_commit(repo_url: str, ref: str, current: str) -> str:
+    """Return the full commit id of an index pin, which may be abbreviated.
+
+    A pin that is a prefix of the installed commit is that commit; anything
+    else is resolved in the repository's mirror when one exists. A pin that
+    cannot be resolved is returned unchanged.
+    """
+    if pack_cache.is_commit_sha(ref):
+        return ref
+    if current and current.startswith(ref.lower()):
+        return current
+    mirror = pack_cache.mirror_path(repo_url)
+    if (mirror / "HEAD").exists():
+        return _resolve_commit(mirror, ref) or ref
+    return ref
+
+
+def find_outdated(entries: List[Dict[str, Any]], jobs: int = 8) -> List[OutdatedPack]:
+    """Compare installed community packs with their upstream commits.
+
+    A pack listed in the community index under the same slug follows the
+    index's pinned commit, which needs no network. Every other pack follows
+    its repository's default branch, checked with one ``git ls-remote`` per
+    repository (packs at different paths of one repository share it), run
+    concurrently.
+    """
+    packs: List[OutdatedPack] = []
+    by_repo: Dict[str, List[OutdatedPack]] = {}
+    for entry in entries:
+        slug = entry.get("slug")
+        if not slug:
+            continue
+        pack = OutdatedPack(entry["name"], slug, entry.get("commit", ""))
+        packs.append(pack)
+        indexed = request_from_index(pack.name)
+        username, repo, _ = parse_slug(slug)
+        if indexed is not None and indexed.slug == slug and indexed.ref:
+            pack.latest = _indexed_commit(_repo_url(username, repo), indexed.ref, pack.current)
+            continue
+        by_repo.setdefault(_repo_url(username, repo), []).append(pack)
+
+    if by_repo:
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(by_repo)))) as pool:
+            heads = dict(zip(by_repo, pool.map(remote_head, by_repo)))
+        for repo_url, repo_packs in by_repo.items():
+            commit, error = heads[repo_url]
+            for pack in repo_packs:
+                pack.latest, pack.error = commit, error
+    return packs
+
+
+def add_pack_from_index(
+    name: str,
+    project_root: Path,
+    source_packs_dir: Path,
+    load_selection: Callable[[Path], object],
+    save_selection: Callable[[Path, object], None],
+    link_mode: str = "auto",
+) -> int:
+    request = request_from_index(name)
+    if request is None:
+        print(f"Pack '{name}' not found in community index.")
+        return 1
+    return add_pack_from_slug(
+        request.slug,
+        project_root,
+        source_packs_dir,
+        load_selection,
+        save_selection,
+        ref=request.ref,
+        expected_name=request.expected_name,
+        link_mode=link_mode,
+    )
+
+
+def add_pack_from_slug(
+    slug: str,
+    project_root: Path,
+    source_packs_dir: Path,
+    load_selection: Callable[[Path], object],
+    save_selection: Callable[[Path, object], None],
+    ref: Optional[str] = None,
+    expected_name: Optional[str] = None,
+    link_mode: str = "auto",
+) -> int:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        prepared = prepare_pack(PackRequest(slug, ref, expected_name), source_packs_dir, Path(tmpdir))
+        error = prepared.error or check_destination(prepared, project_root)
+        if error:
+            print(error)
+            return 1
+        confirmed = confirm_install([prepared])
+        if not confirmed:
+            return 1 if confirmed is None else 0
+        return install_prepared(prepared, project_root, load_selection, save_selection, link_mode)
@@ -2,20 +2,28 @@
 
 from __future__ import annotations
 
+import dataclasses
+import filecmp
+import functools
+import hashlib
+import inspect
 import json
+import os
 import re
 import shutil
 import sys
+from contextlib import ExitStack, contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
-
-import webbrowser
-import yaml
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
 
+from . import file_ops
 from .assistants import ASSISTANT_MAP, SUPPORTED_ASSISTANTS, AssistantSpec
-from .community_packs import validate_pack_structure
+from .locking import project_lock
+from .rule_index import RuleFile, RuleIndex, known_digest
+from .state import StateStore, open_store
+from .sync_plan import FileOp, SyncPlan, execute_ops
 
 # --------------------------------------------------------------------------- 
 # Constants
@@ -27,6 +35,10 @@ TARGET_MEMORY_BANK_DIR = "memory"
 TARGET_TOOLS_DIR = "tools"
 TARGET_INTERNAL_STATE_DIR = ".rulebook-ai"
 
+# Bump when the generation strategies change so existing fingerprints are
+# invalidated and every assistant is regenerated on the next sync.
+SYNC_FORMAT_VERSION = 1
+
 BUG_REPORT_URL = "https://github.com/botingw/rulebook-ai/issues"
 RATINGS_REVIEWS_URL = (
     "https://github.com/botingw/rulebook-ai/wiki/Ratings-%26-Reviews-(Rulesets)"
@@ -37,12 +49,44 @@ RATINGS_REVIEWS_URL = (
 # Helper data structures
 # --------------------------------------------------------------------------- 
 
+# Desired content of a generated file: a source file to copy or rendered bytes.
+OutputSource = Union[Path, bytes]
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
 @dataclass
 class SelectionState:
     packs: List[Dict[str, str]]
     profiles: Dict[str, List[str]]
 
 
+def _project_locked(shared: Union[bool, str] = False) -> Callable[[F], F]:
+    """Run a ``RuleManager`` method under the project's advisory lock.
+
+    The project comes from the method's ``project_dir`` argument, falling back
+    to the manager's ``project_root``. ``shared`` may also name a boolean
+    argument of the method that selects a shared lock when true (e.g.
+    ``plan_only``). See :mod:`rulebook_ai.locking`.
+    """
+
+    def decorator(method: F) -> F:
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self: "RuleManager", *args: Any, **kwargs: Any) -> Any:
+            arguments = signature.bind(self, *args, **kwargs).arguments
+            project_dir = arguments.get("project_dir")
+            project_root = Path(project_dir).absolute() if project_dir else self.project_root
+            lock_shared = bool(arguments.get(shared)) if isinstance(shared, str) else shared
+            with project_lock(project_root, shared=lock_shared):
+                return method(self, *args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
 # --------------------------------------------------------------------------- 
 # RuleManager
 # --------------------------------------------------------------------------- 
@@ -51,7 +95,7 @@ class SelectionState:
 class RuleManager:
     """Manage packs, profiles and project synchronization."""
 
-    def __init__(self, project_root: Optional[str] = None) -> None:
+    def __init__(self, project_root: Optional[str] = None, link_mode: Optional[str] = None) -> None:
         package_path = Path(__file__).parent.absolute()
         self.source_packs_dir = package_path / SOURCE_PACKS_DIR
         if not self.source_packs_dir.exists():
@@ -59,156 +103,350 @@ class RuleManager:
             self.source_packs_dir = dev_root / SOURCE_PACKS_DIR
 
         self.project_root = Path(project_root).absolute() if project_root else Path.cwd().absolute()
+        # Copy backend for installing and staging packs (see file_ops).
+        self.link_mode = file_ops.resolve_link_mode(link_mode)
+        # Selections held by open ``session()`` blocks, and whether they changed.
+        self._sessions: Dict[Path, SelectionState] = {}
+        self._dirty: Dict[Path, bool] = {}
 
     # ------------------------------------------------------------------
     # Internal utilities
     # ------------------------------------------------------------------
 
-    def _copy_file(self, source: Path, destination: Path) -> bool:
-        destination.parent.mkdir(parents=True, exist_ok=True)
-        try:
-            shutil.copy2(source, destination)
-            return True
-        except Exception as e:  # pragma: no cover - defensive programming
-            print(f"Error copying {source} to {destination}: {e}")
-            return False
-
-    def _get_ordered_source_files(self, source_dir: Path, recursive: bool) -> List[Path]:
-        if not source_dir.is_dir():
-            return []
-        pattern = "**/*" if recursive else "*"
-        files = [p for p in source_dir.glob(pattern) if p.is_file() and not p.name.startswith(".")]
-        return sorted(files)
+    def _plan_staging(self, index: RuleIndex, rules_root: Path) -> List[FileOp]:
+        """Plan materializing the composed rules ``index`` under ``rules_root``."""
+        ops: List[FileOp] = []
+        if rules_root.exists():
+            ops.append(FileOp("delete", rules_root))
+        for rule in index.files:
+            ops.append(
+                FileOp(
+                    "copy",
+                    rules_root.joinpath(*rule.rel_parts),
+                    source=rule.path,
+                    size=rule.size,
+                    link_mode=self.link_mode,
+                )
+            )
+        return ops
 
-    def _copy_tree_non_destructive(self, src: Path, dest: Path, project_root: Path) -> List[str]:
-        """Copy tree from src to dest without overwriting existing files.
+    def _plan_starters(
+        self, src: Path, dest: Path, pack_name: str, planned: Dict[Path, FileOp]
+    ) -> None:
+        """Plan copying starter files from ``src`` that do not exist under ``dest``.
 
-        Returns a list of relative file paths that were created.
+        Existing files are never overwritten and the first pack to provide a
+        path wins.
         """
-
-        created: List[str] = []
         if not src.is_dir():
-            return created
-
-        dest.mkdir(parents=True, exist_ok=True)
-        for item in src.iterdir():
+            return
+        for item in sorted(src.iterdir()):
             dest_item = dest / item.name
             if item.is_dir():
-                created.extend(self._copy_tree_non_destructive(item, dest_item, project_root))
-            elif not dest_item.exists():
-                if self._copy_file(item, dest_item):
-                    created.append(str(dest_item.relative_to(project_root)))
-        return created
-
-    def _strategy_flatten_and_number(self, source: Path, dest: Path, extension: Optional[str]) -> int:
-        dest.mkdir(parents=True, exist_ok=True)
-        files = self._get_ordered_source_files(source, True)
-        next_num = 1
-        for src in files:
+                self._plan_starters(item, dest_item, pack_name, planned)
+            elif dest_item not in planned and not dest_item.exists():
+                planned[dest_item] = FileOp(
+                    "copy", dest_item, source=item, size=item.stat().st_size, pack=pack_name
+                )
+
+    # Each generation strategy maps destination paths to their desired content:
+    # a source file to copy or rendered bytes.
+
+    def _flatten_and_number_outputs(
+        self, index: RuleIndex, dest: Path, extension: Optional[str]
+    ) -> Dict[Path, OutputSource]:
+        outputs: Dict[Path, OutputSource] = {}
+        for num, src in enumerate(index.files, 1):
             stem = re.sub(r"^\d+-", "", src.stem)
             new_ext = extension if extension is not None else ""
-            name = f"{next_num:02d}-{stem}{new_ext}"
-            if self._copy_file(src, dest / name):
-                next_num += 1
-        return len(files)
-
-    def _strategy_preserve_hierarchy(self, source: Path, dest: Path) -> int:
-        dest.mkdir(parents=True, exist_ok=True)
-        files = self._get_ordered_source_files(source, True)
-        for src in files:
-            self._copy_file(src, dest / src.relative_to(source))
-        return len(files)
-
-    def _strategy_concatenate_files(self, source: Path, dest_file: Path) -> None:
-        files = self._get_ordered_source_files(source, True)
-        if not files:
-            return
-        dest_file.parent.mkdir(parents=True, exist_ok=True)
-        with dest_file.open("w", encoding="utf-8") as f:
-            for i, src in enumerate(files):
-                f.write(f"# Rule: {src.name}\n\n")
-                f.write(src.read_text(encoding="utf-8"))
-                if i < len(files) - 1:
-                    f.write("\n\n---\n\n")
-
-    def _generate_for_assistant(self, spec: AssistantSpec, source_dir: Path, target_root: Path) -> None:
+            outputs[dest / f"{num:02d}-{stem}{new_ext}"] = src.path
+        return outputs
+
+    def _preserve_hierarchy_outputs(self, index: RuleIndex, dest: Path) -> Dict[Path, OutputSource]:
+        return {dest.joinpath(*src.rel_parts): src.path for src in index.files}
+
+    def _render_concatenation(self, index: RuleIndex) -> bytes:
+        parts: List[str] = []
+        for i, src in enumerate(index.files):
+            parts.append(f"# Rule: {src.name}\n\n")
+            parts.append(index.read_text(src))
+            if i < len(index.files) - 1:
+                parts.append("\n\n---\n\n")
+        text = "".join(parts)
+        if os.linesep != "\n":
+            text = text.replace("\n", os.linesep)
+        return text.encode("utf-8")
+
+    def _concatenate_outputs(self, index: RuleIndex, dest_file: Path) -> Dict[Path, OutputSource]:
+        if not index.files:
+            return {}
+        # Single-file assistants share one rendering of the document per sync.
+        return {dest_file: index.rendered("concatenated", self._render_concatenation)}
+
+    # ------------------------------------------------------------------
+    # Output reconciliation
+    # ------------------------------------------------------------------
+
+    def _output_matches(self, path: Path, source: OutputSource) -> bool:
+        """Return True if ``path`` already holds exactly the bytes of ``source``."""
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return False
+        if not path.is_file():
+            return False
+        if isinstance(source, bytes):
+            return st.st_size == len(source) and path.read_bytes() == source
+        if st.st_size != source.stat().st_size:
+            return False
+        return filecmp.cmp(path, source, shallow=False)
+
+    def _plan_outputs(
+        self,
+        outputs: Dict[Path, OutputSource],
+        clean_root: Optional[Path] = None,
+        assistant: Optional[str] = None,
+    ) -> List[FileOp]:
+        """Plan the operations that make disk match ``outputs``.
+
+        Byte-identical files are left alone (same inode and mtime). When
+        ``clean_root`` is given, files under it that are no longer produced are
+        deleted and directories left empty are removed.
+        """
+        ops: List[FileOp] = []
+        for path, source in outputs.items():
+            if self._output_matches(path, source):
+                continue
+            if path.is_dir():
+                ops.append(FileOp("delete", path, assistant=assistant))
+            if isinstance(source, bytes):
+                ops.append(FileOp("write", path, data=source, size=len(source), assistant=assistant))
+            else:
+                ops.append(
+                    FileOp("copy", path, source=source, size=source.stat().st_size, assistant=assistant)
+                )
+
+        if clean_root is None:
+            return ops
+        if clean_root.is_file() and clean_root not in outputs:
+            ops.append(FileOp("delete", clean_root, assistant=assistant))
+        elif clean_root.is_dir():
+            keep_dirs = {parent for path in outputs for parent in path.parents}
+            for dirpath, _, filenames in os.walk(clean_root, topdown=False):
+                current = Path(dirpath)
+                for filename in filenames:
+                    path = current / filename
+                    if path not in outputs:
+                        ops.append(FileOp("delete", path, assistant=assistant))
+                if current not in keep_dirs:
+                    ops.append(FileOp("rmdir", current, assistant=assistant))
+        return ops
+
+    def _with_mkdirs(self, ops: List[FileOp]) -> List[FileOp]:
+        """Prepend one ``mkdir`` for every missing parent directory of ``ops``.
+
+        Deletes run before mkdirs, so a directory under a deleted path counts
+        as missing even if it exists now.
+        """
+        deleted = {op.path for op in ops if op.kind == "delete"}
+        missing: Dict[Path, Optional[str]] = {}
+        for op in ops:
+            parent = op.path.parent
+            if op.kind in ("copy", "write") and parent not in missing:
+                if not parent.is_dir() or deleted.intersection((parent, *parent.parents)):
+                    missing[parent] = op.assistant
+        return [FileOp("mkdir", d, assistant=a) for d, a in missing.items()] + ops
+
+    def _plan_assistant(
+        self, spec: AssistantSpec, index: RuleIndex, target_root: Path
+    ) -> Tuple[List[FileOp], List[str]]:
+        """Plan the outputs of ``spec`` against its ``clean_path``.
+
+        Returns the file operations and the progress messages.
+        """
+        messages: List[str] = []
         target_path = target_root / spec.rule_path
+        outputs: Dict[Path, OutputSource] = {}
         if not spec.is_multi_file:
-            self._strategy_concatenate_files(source_dir, target_path / spec.filename)
-            print(f"  -> Generated {spec.display_name} instructions at {target_path / spec.filename}")
-            return
-
-        if spec.has_modes:
-            total = 0
-            for sub in source_dir.iterdir():
-                if not sub.is_dir() or sub.name.startswith("."):
-                    continue
-                mode_name = re.sub(r"^\d+-", "", sub.name)
-                count = self._strategy_preserve_hierarchy(sub, target_path / mode_name)
-                if count:
-                    print(f"  -> Generated {count} {spec.display_name} '{mode_name}' rules in {target_path / mode_name}")
-                    total += count
-            if not total:
-                print(f"  -> No rules found to generate for {spec.display_name}")
-            return
+            outputs = self._concatenate_outputs(index, target_path / spec.filename)
+            messages.append(f"  -> Generated {spec.display_name} instructions at {target_path / spec.filename}")
+        elif spec.has_modes:
+            for sub in index.subdirectories():
+                mode_name = re.sub(r"^\d+-", "", sub)
+                mode_outputs = self._preserve_hierarchy_outputs(index.subtree(sub), target_path / mode_name)
+                if mode_outputs:
+                    messages.append(
+                        f"  -> Generated {len(mode_outputs)} {spec.display_name} '{mode_name}' rules in {target_path / mode_name}"
+                    )
+                    outputs.update(mode_outputs)
+            if not outputs:
+                messages.append(f"  -> No rules found to generate for {spec.display_name}")
+        else:
+            outputs = (
+                self._preserve_hierarchy_outputs(index, target_path)
+                if spec.supports_subdirectories
+                else self._flatten_and_number_outputs(index, target_path, spec.file_extension)
+            )
+            if outputs:
+                messages.append(f"  -> Generated {len(outputs)} {spec.display_name} rule files in {target_path}")
 
-        count = (
-            self._strategy_preserve_hierarchy(source_dir, target_path)
-            if spec.supports_subdirectories
-            else self._strategy_flatten_and_number(source_dir, target_path, spec.file_extension)
-        )
-        if count:
-            print(f"  -> Generated {count} {spec.display_name} rule files in {target_path}")
+        ops = self._plan_outputs(outputs, target_root / spec.clean_path, spec.name)
+        return ops, messages
 
     # ------------------------------------------------------------------
     # Selection and manifest helpers
     # ------------------------------------------------------------------
 
-    def _selection_path(self, project_root: Path) -> Path:
-        return project_root / TARGET_INTERNAL_STATE_DIR / "selection.json"
+    def _state(self, project_root: Path) -> StateStore:
+        """Return the state store (JSON files or SQLite) of ``project_root``."""
+        return open_store(project_root / TARGET_INTERNAL_STATE_DIR)
 
     def _load_selection(self, project_root: Path) -> SelectionState:
-        path = self._selection_path(project_root)
-        if not path.exists():
-            return SelectionState(packs=[], profiles={})
-        data = json.loads(path.read_text())
+        if project_root in self._sessions:
+            return self._sessions[project_root]
+        data = self._state(project_root).load_selection()
         return SelectionState(packs=data.get("packs", []), profiles=data.get("profiles", {}))
 
     def _save_selection(self, project_root: Path, state: SelectionState) -> None:
-        path = self._selection_path(project_root)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("w") as f:
-            json.dump({"packs": state.packs, "profiles": state.profiles}, f, indent=2)
-
-    def _file_manifest_path(self, project_root: Path) -> Path:
-        return project_root / TARGET_INTERNAL_STATE_DIR / "file_manifest.json"
+        if project_root in self._sessions:
+            self._sessions[project_root] = state
+            self._dirty[project_root] = True
+            return
+        self._state(project_root).save_selection({"packs": state.packs, "profiles": state.profiles})
+
+    @contextmanager
+    def session(self, project_dir: Optional[str] = None) -> Iterator[SelectionState]:
+        """Load the selection once, batch mutations, and write it once on exit.
+
+        Inside the block every pack and profile method reads and updates the
+        same in-memory ``SelectionState``; the state store is written a single
+        time when the block exits, and only if something changed. The write
+        also happens if the block raises, so packs already copied into
+        ``.rulebook-ai/packs`` stay recorded. The project lock is held for the
+        whole block. Nested sessions for the same project reuse the outer one.
+        """
+        project_root = Path(project_dir).absolute() if project_dir else self.project_root
+        if project_root in self._sessions:
+            yield self._sessions[project_root]
+            return
+        with project_lock(project_root):
+            self._sessions[project_root] = self._load_selection(project_root)
+            self._dirty[project_root] = False
+            try:
+                yield self._sessions[project_root]
+            finally:
+                selection = self._sessions.pop(project_root)
+                if self._dirty.pop(project_root):
+                    self._save_selection(project_root, selection)
 
     def _load_file_manifest(self, project_root: Path) -> Dict[str, str]:
-        path = self._file_manifest_path(project_root)
-        if path.exists():
-            return json.loads(path.read_text())
-        return {}
+        return self._state(project_root).load_manifest()
+
+    def _manifest_entry(self, path: Path, pack: str, digest: Optional[str] = None) -> Dict[str, Any]:
+        """Return the manifest record of a starter file that was just created."""
+        st = path.stat()
+        if digest is None:
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        return {"pack": pack, "sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    @staticmethod
+    def _manifest_pack(entry: Union[str, Dict[str, Any]]) -> str:
+        # Manifests written before content hashes map paths to the pack name.
+        return entry if isinstance(entry, str) else entry.get("pack", "")
+
+    def _entry_drift(
+        self, path: Path, entry: Union[str, Dict[str, Any]]
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Classify a starter file as ``pristine``, ``modified``, ``missing`` or ``unverified``.
+
+        Only the file's ``stat`` is read unless its mtime moved while its size
+        stayed the same; then the content is hashed. Returns the state and, for
+        files that were touched but not changed, an entry with the new mtime.
+        """
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return "missing", None
+        if isinstance(entry, str):
+            return "unverified", None
+        if not path.is_file() or st.st_size != entry.get("size"):
+            return "modified", None
+        if st.st_mtime_ns == entry.get("mtime_ns"):
+            return "pristine", None
+        if hashlib.sha256(path.read_bytes()).hexdigest() == entry.get("sha256"):
+            return "pristine", {**entry, "mtime_ns": st.st_mtime_ns}
+        return "modified", None
 
-    def _save_file_manifest(self, project_root: Path, manifest: Dict[str, str]) -> None:
-        path = self._file_manifest_path(project_root)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("w") as f:
-            json.dump(manifest, f, indent=2)
+    def _load_sync_status(self, project_root: Path) -> Dict[str, dict]:
+        return self._state(project_root).load_status()
 
-    def _sync_status_path(self, project_root: Path) -> Path:
-        return project_root / TARGET_INTERNAL_STATE_DIR / "sync_status.json"
+    def _load_fingerprint_cache(self, project_root: Path) -> Dict[str, Any]:
+        return self._state(project_root).load_fingerprints()
 
-    def _load_sync_status(self, project_root: Path) -> Dict[str, dict]:
-        path = self._sync_status_path(project_root)
-        if path.exists():
-            return json.loads(path.read_text())
-        return {}
+    # ------------------------------------------------------------------
+    # Fingerprint helpers
+    # ------------------------------------------------------------------
 
-    def _save_sync_status(self, project_root: Path, data: Dict[str, dict]) -> None:
-        path = self._sync_status_path(project_root)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("w") as f:
-            json.dump(data, f, indent=2)
+    def _file_digest(self, index: RuleIndex, rule: RuleFile, key: str, cache: Dict[str, list]) -> str:
+        """Return the sha256 of ``rule``, reusing ``cache`` while size and mtime match.
+
+        On a miss, a digest preloaded for the same built-in file is used before
+        the file is read.
+        """
+        cached = cache.get(key)
+        if cached and cached[0] == rule.size and cached[1] == rule.mtime_ns:
+            digest = cached[2]
+        else:
+            digest = known_digest(rule) or hashlib.sha256(index.read_bytes(rule)).hexdigest()
+            cache[key] = [rule.size, rule.mtime_ns, digest]
+        index.note_digest(rule, digest)
+        return digest
+
+    def _rules_digest(self, project_root: Path, index: RuleIndex, cache: Dict[str, list]) -> str:
+        """Fingerprint the composed rules ``index``, pruning stale ``cache`` entries."""
+        h = hashlib.sha256()
+        used_keys = set()
+        for rule in index.files:
+            try:
+                key = rule.path.relative_to(project_root).as_posix()
+            except ValueError:
+                key = rule.path.as_posix()
+            used_keys.add(key)
+            h.update(f"{rule.rel_path}\0{self._file_digest(index, rule, key, cache)}\n".encode("utf-8"))
+        for stale in set(cache) - used_keys:
+            del cache[stale]
+        return h.hexdigest()
+
+    def _output_stats(self, project_root: Path, clean_root: Path) -> Dict[str, List[int]]:
+        """Return ``[size, mtime_ns]`` of every file under an assistant's ``clean_path``.
+
+        Recorded after a sync and compared before skipping the assistant, so
+        deleted, edited or stray output files are noticed with ``stat`` alone.
+        """
+        if clean_root.is_file():
+            files = [clean_root]
+        else:
+            files = [
+                Path(dirpath) / name
+                for dirpath, _, filenames in os.walk(clean_root)
+                for name in filenames
+            ]
+        stats: Dict[str, List[int]] = {}
+        for path in files:
+            st = path.stat()
+            stats[path.relative_to(project_root).as_posix()] = [st.st_size, st.st_mtime_ns]
+        return stats
+
+    def _assistant_fingerprint(
+        self, spec: AssistantSpec, rules_digest: str, pack_list: List[str]
+    ) -> str:
+        payload = {
+            "version": SYNC_FORMAT_VERSION,
+            "rules": rules_digest,
+            "packs": pack_list,
+            "spec": dataclasses.asdict(spec),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
 
     # ------------------------------------------------------------------
     # Pack commands
@@ -226,6 +464,8 @@ class RuleManager:
             version = "unknown"
             summary = ""
             if manifest_path.exists():
+                import yaml
+
                 manifest = yaml.safe_load(manifest_path.read_text()) or {}
                 version = manifest.get("version", "unknown")
                 summary = manifest.get("summary", "")
@@ -236,7 +476,7 @@ class RuleManager:
         builtins = self._builtin_packs()
         from . import community_packs
 
-        index = community_packs.load_index_cache().get("packs", [])
+        index = community_packs.load_catalog().entries
 
         print("Available packs:")
 
@@ -278,7 +518,24 @@ class RuleManager:
 
         print(f"\nFor ratings and reviews of these packs, visit {RATINGS_REVIEWS_URL}")
 
+    def search_packs(self, query: str, limit: int = 20) -> int:
+        from . import community_packs
+
+        catalog = community_packs.load_catalog()
+        if not catalog.entries:
+            print("The community index is empty. Run 'rulebook-ai packs update' first.")
+            return 1
+        matches = catalog.search(query, limit)
+        if not matches:
+            print(f"No community packs match '{query}'.")
+            return 0
+        print(f"Community packs matching '{query}':")
+        for _, entry in matches:
+            print(f"  - {entry.get('name')} ({entry.get('username')}) - {entry.get('description')}")
+        return 0
+
     def add_pack(self, name_or_path: str, project_dir: Optional[str] = None) -> int:
+        """Add one pack. The project lock is only held while the pack is installed."""
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
 
         # Handle local paths
@@ -289,32 +546,50 @@ class RuleManager:
                 print(f"Error: Local path not found at '{source}'", file=sys.stderr)
                 return 1
 
+            from . import community_packs
+
             try:
-                pack_name, manifest = validate_pack_structure(source)
+                pack_name, manifest = community_packs.validate_pack_structure(source)
             except ValueError as e:
                 print(f"Error: Invalid local pack at '{source}': {e}", file=sys.stderr)
                 return 1
 
             dest_dir = project_root / TARGET_INTERNAL_STATE_DIR / "packs" / pack_name
-            if dest_dir.exists():
-                print(
-                    f"Error: Pack '{pack_name}' already installed from a different source. Please remove it first.",
-                    file=sys.stderr,
-                )
-                return 1
+            with project_lock(project_root):
+                if dest_dir.exists():
+                    print(
+                        f"Error: Pack '{pack_name}' already installed from a different source. Please remove it first.",
+                        file=sys.stderr,
+                    )
+                    return 1
 
-            dest_dir.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copytree(source, dest_dir)
+                dest_dir.parent.mkdir(parents=True, exist_ok=True)
+                file_ops.copy_tree(source, dest_dir, self.link_mode)
 
-            selection = self._load_selection(project_root)
-            version = manifest.get("version", "0.0.0")
-            if not any(p["name"] == pack_name for p in selection.packs):
-                selection.packs.append({"name": pack_name, "version": version, "source": "local"})
-            self._save_selection(project_root, selection)
+                selection = self._load_selection(project_root)
+                version = manifest.get("version", "0.0.0")
+                if not any(p["name"] == pack_name for p in selection.packs):
+                    selection.packs.append(
+                        {"name": pack_name, "version": version, "source": "local", "path": str(source)}
+                    )
+                self._save_selection(project_root, selection)
 
             print(f"Added pack '{pack_name}' from local path. Run 'project sync' to apply changes.")
             return 0
 
+        # Handle pack archives
+        if name_or_path.startswith("archive:"):
+            from . import pack_archive
+
+            return pack_archive.add_pack_from_archive(
+                name_or_path.split(":", 1)[1],
+                project_root,
+                self.source_packs_dir,
+                self._load_selection,
+                self._save_selection,
+                link_mode=self.link_mode,
+            )
+
         # Handle GitHub slugs
         if name_or_path.startswith("github:"):
             slug = name_or_path.split(":", 1)[1]
@@ -326,6 +601,7 @@ class RuleManager:
                 self.source_packs_dir,
                 self._load_selection,
                 self._save_selection,
+                link_mode=self.link_mode,
             )
 
         # Handle built-in and index packs by name
@@ -333,28 +609,31 @@ class RuleManager:
         source = self.source_packs_dir / name
         if source.is_dir():  # It's a built-in pack
             dest_dir = project_root / TARGET_INTERNAL_STATE_DIR / "packs" / name
-            if dest_dir.exists():
-                if (dest_dir / "pack.json").exists():
-                    print(
-                        f"Error: Pack '{name}' already installed from a community source. Cannot overwrite with a built-in pack.",
-                        file=sys.stderr,
-                    )
-                    return 1
-                # It's a re-install of a built-in, which is fine.
-                shutil.rmtree(dest_dir)
-
-            dest_dir.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copytree(source, dest_dir)
-
-            selection = self._load_selection(project_root)
-            manifest_file = dest_dir / "manifest.yaml"
-            version = "0.0.0"
-            if manifest_file.exists():
-                manifest = yaml.safe_load(manifest_file.read_text()) or {}
-                version = manifest.get("version", "0.0.0")
-            if not any(p["name"] == name for p in selection.packs):
-                selection.packs.append({"name": name, "version": version, "source": "built-in"})
-            self._save_selection(project_root, selection)
+            with project_lock(project_root):
+                if dest_dir.exists():
+                    if (dest_dir / "pack.json").exists():
+                        print(
+                            f"Error: Pack '{name}' already installed from a community source. Cannot overwrite with a built-in pack.",
+                            file=sys.stderr,
+                        )
+                        return 1
+                    # It's a re-install of a built-in, which is fine.
+                    shutil.rmtree(dest_dir)
+
+                dest_dir.parent.mkdir(parents=True, exist_ok=True)
+                file_ops.copy_tree(source, dest_dir, self.link_mode)
+
+                selection = self._load_selection(project_root)
+                manifest_file = dest_dir / "manifest.yaml"
+                version = "0.0.0"
+                if manifest_file.exists():
+                    import yaml
+
+                    manifest = yaml.safe_load(manifest_file.read_text()) or {}
+                    version = manifest.get("version", "0.0.0")
+                if not any(p["name"] == name for p in selection.packs):
+                    selection.packs.append({"name": name, "version": version, "source": "built-in"})
+                self._save_selection(project_root, selection)
 
             print(f"Added pack '{name}'. Run 'project sync' to apply changes.")
             return 0
@@ -367,17 +646,230 @@ class RuleManager:
                 self.source_packs_dir,
                 self._load_selection,
                 self._save_selection,
+                link_mode=self.link_mode,
             )
             if result != 0:
                 print(f"Pack '{name}' not found as a built-in pack or in the community index.")
                 self.list_packs()
             return result
 
+    def add_packs(self, names: List[str], project_dir: Optional[str] = None, jobs: int = 4) -> int:
+        """Add several packs, fetching community packs concurrently.
+
+        Community packs (``github:`` slugs and community index names) are
+        fetched and validated in a pool of ``jobs`` workers, then confirmed
+        with a single prompt; archives are fetched and confirmed one by one.
+        Only then is the project locked: every pack is installed in argument
+        order and the selection is written once. Returns the last non-zero
+        exit code.
+        """
+        project_root = Path(project_dir).absolute() if project_dir else self.project_root
+        community = [
+            name
+            for name in names
+            if name.startswith("github:")
+            or not (
+                name.startswith(("local:", "archive:")) or (self.source_packs_dir / name).is_dir()
+            )
+        ]
+        requests: Dict[str, Any] = {}
+        rejected: set[str] = set()
+        rc = 0
+        if community:
+            # Only community packs need git, archives and the index.
+            from . import community_packs
+
+            for name in community:
+                if name.startswith("github:"):
+                    requests[name] = community_packs.PackRequest(name.split(":", 1)[1])
+                    continue
+                request = community_packs.request_from_index(name)
+                if request is None:
+                    print(f"Pack '{name}' not found in community index.")
+                    print(f"Pack '{name}' not found as a built-in pack or in the community index.")
+                    self.list_packs()
+                    rejected.add(name)
+                    rc = 1
+                else:
+                    requests[name] = request
+
+        with ExitStack() as stack:
+            prepared: Dict[str, Any] = {}
+            confirmed: Optional[bool] = False
+            if requests:
+                import tempfile
+
+                tmpdir = stack.enter_context(tempfile.TemporaryDirectory())
+                prepared = dict(
+                    zip(
+                        requests,
+                        community_packs.prepare_packs(
+                            list(requests.values()), self.source_packs_dir, Path(tmpdir), jobs
+                        ),
+                    )
+                )
+                for name, pack in list(prepared.items()):
+                    error = pack.error or community_packs.check_destination(pack, project_root)
+                    if error:
+                        print(error)
+                        del prepared[name]
+                        rc = 1
+                if prepared:
+                    confirmed = community_packs.confirm_install(list(prepared.values()))
+                    if not confirmed:
+                        rc = 1 if confirmed is None else rc
+
+            archives: Dict[str, Any] = {}
+            archive_names = list(dict.fromkeys(n for n in names if n.startswith("archive:")))
+            if archive_names:
+                from . import pack_archive
+            for name in archive_names:
+                try:
+                    source = pack_archive.parse_archive_spec(name.split(":", 1)[1])
+                except ValueError as e:
+                    print(f"Error: {e}")
+                    rejected.add(name)
+                    rc = 1
+                    continue
+                archive = pack_archive.prepare_archive(source, project_root, self.source_packs_dir)
+                stack.callback(archive.discard)
+                if archive.error:
+                    print(archive.error)
+                    rejected.add(name)
+                    rc = 1
+                    continue
+                archive_confirmed = pack_archive.confirm_archive(archive)
+                if not archive_confirmed:
+                    rejected.add(name)
+                    rc = 1 if archive_confirmed is None else rc
+                    continue
+                archives[name] = archive
+
+            with self.session(project_dir):
+                for name in names:
+                    if name in prepared:
+                        result = (
+                            community_packs.install_prepared(
+                                prepared[name],
+                                project_root,
+                                self._load_selection,
+                                self._save_selection,
+                                self.link_mode,
+                            )
+                            if confirmed
+                            else 0
+                        )
+                    elif name in archives:
+                        result = pack_archive.install_archive(
+                            archives.pop(name),
+                            project_root,
+                            self._load_selection,
+                            self._save_selection,
+                            self.link_mode,
+                        )
+                    elif name in requests or name in rejected or name.startswith("archive:"):
+                        continue
+                    else:
+                        result = self.add_pack(name, project_dir)
+                    if result != 0:
+                        rc = result
+        return rc
+
     def update_community_index(self) -> int:
         from . import community_packs
 
         return community_packs.update_index_cache()
 
+    def _outdated(
+        self, project_root: Path, names: Optional[List[str]], jobs: int
+    ) -> Tuple[list, int]:
+        """Check the selected community packs (or ``names``) for upstream changes."""
+        from . import community_packs
+
+        entries = [p for p in self._load_selection(project_root).packs if p.get("slug")]
+        rc = 0
+        if names:
+            known = {p["name"] for p in entries}
+            for name in names:
+                if name not in known:
+                    print(f"Pack '{name}' is not an installed community pack.")
+                    rc = 1
+            entries = [p for p in entries if p["name"] in names]
+        packs = community_packs.find_outdated(entries, jobs)
+        for pack in packs:
+            if pack.error:
+                print(f"  - {pack.name}: could not check {pack.slug}: {pack.error}")
+                rc = 1
+        return packs, rc
+
+    @_project_locked(shared=True)
+    def packs_outdated(self, project_dir: Optional[str] = None, jobs: int = 8) -> int:
+        project_root = Path(project_dir).absolute() if project_dir else self.project_root
+        packs, rc = self._outdated(project_root, None, jobs)
+        if not packs:
+            print("No community packs installed.")
+            return rc
+        outdated = [p for p in packs if p.outdated]
+        if not outdated:
+            print("All community packs are up to date.")
+            return rc
+        print("Outdated community packs:")
+        for pack in outdated:
+            print(f"  - {pack.name} ({pack.slug}): {pack.current[:7]} -> {pack.latest[:7]}")
+        print("Run 'rulebook-ai packs upgrade' to update them.")
+        return rc
+
+    def upgrade_packs(
+        self, names: Optional[List[str]] = None, project_dir: Optional[str] = None, jobs: int = 8
+    ) -> int:
+        """Re-install the community packs whose upstream commit changed.
+
+        Checking, fetching and confirming run unlocked; the project lock is
+        only held while the packs are installed.
+        """
+        from . import community_packs
+
+        project_root = Path(project_dir).absolute() if project_dir else self.project_root
+        packs, rc = self._outdated(project_root, names, jobs)
+        outdated = [p for p in packs if p.outdated]
+        if not outdated:
+            print("All community packs are up to date.")
+            return rc
+
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            requests = [community_packs.PackRequest(p.slug, p.latest, p.name) for p in outdated]
+            prepared = community_packs.prepare_packs(
+                requests, self.source_packs_dir, Path(tmpdir), jobs
+            )
+            ready = []
+            for pack, result in zip(outdated, prepared):
+                if result.error:
+                    print(f"Error upgrading '{pack.name}': {result.error}")
+                    rc = 1
+                else:
+                    print(f"Upgrading '{pack.name}': {pack.current[:7]} -> {pack.latest[:7]}")
+                    ready.append(result)
+            if not ready:
+                return rc
+            confirmed = community_packs.confirm_install(ready)
+            if not confirmed:
+                return 1 if confirmed is None else rc
+            with self.session(project_dir):
+                for result in ready:
+                    status = community_packs.install_prepared(
+                        result,
+                        project_root,
+                        self._load_selection,
+                        self._save_selection,
+                        self.link_mode,
+                    )
+                    rc = rc or status
+        print("Run 'project sync' to apply changes.")
+        return rc
+
+    @_project_locked()
     def remove_pack(self, name: str, project_dir: Optional[str] = None) -> int:
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
         dest_dir = project_root / TARGET_INTERNAL_STATE_DIR / "packs" / name
@@ -398,6 +890,7 @@ class RuleManager:
         print(f"Removed pack '{name}'. Remember to run 'project sync' to update rules.")
         return 0
 
+    @_project_locked(shared=True)
     def packs_status(self, project_dir: Optional[str] = None) -> int:
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
         selection = self._load_selection(project_root)
@@ -429,6 +922,8 @@ class RuleManager:
                     print(f"    └─ Source: {readme_url}")
                 except Exception:
                     pass  # If slug is malformed, just skip the URL
+            elif "archive" in pack:
+                print(f"    └─ Source: {pack['archive']} (sha256 {pack.get('sha256', '')[:12]})")
 
         if selection.profiles:
             print("\nProfiles:")
@@ -440,6 +935,7 @@ class RuleManager:
     # Profile commands
     # ------------------------------------------------------------------
 
+    @_project_locked()
     def create_profile(self, name: str, project_dir: Optional[str] = None) -> int:
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
         selection = self._load_selection(project_root)
@@ -451,6 +947,7 @@ class RuleManager:
         print(f"Created profile '{name}'.")
         return 0
 
+    @_project_locked()
     def delete_profile(self, name: str, project_dir: Optional[str] = None) -> int:
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
         selection = self._load_selection(project_root)
@@ -462,6 +959,7 @@ class RuleManager:
         print(f"Deleted profile '{name}'.")
         return 0
 
+    @_project_locked()
     def add_pack_to_profile(self, pack: str, profile: str, project_dir: Optional[str] = None) -> int:
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
         selection = self._load_selection(project_root)
@@ -477,6 +975,7 @@ class RuleManager:
         print(f"Added pack '{pack}' to profile '{profile}'.")
         return 0
 
+    @_project_locked()
     def remove_pack_from_profile(self, pack: str, profile: str, project_dir: Optional[str] = None) -> int:
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
         selection = self._load_selection(project_root)
@@ -488,6 +987,7 @@ class RuleManager:
         print(f"Removed pack '{pack}' from profile '{profile}'.")
         return 0
 
+    @_project_locked(shared=True)
     def list_profiles(self, project_dir: Optional[str] = None) -> int:
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
         selection = self._load_selection(project_root)
@@ -502,79 +1002,224 @@ class RuleManager:
     # Project commands
     # ------------------------------------------------------------------
 
-    def project_sync(
-        self,
-        assistants: Optional[List[str]] = None,
-        profile: Optional[str] = None,
-        packs: Optional[List[str]] = None,
-        project_dir: Optional[str] = None,
-    ) -> int:
+    def _resolve_pack_list(
+        self, selection: SelectionState, profile: Optional[str], packs: Optional[List[str]]
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """Return the packs to sync and the sync mode recorded in the status."""
+        if profile:
+            return selection.profiles.get(profile, []), {"mode": "profile", "profile": profile}
+        if packs:
+            return packs, {"mode": "pack", "packs": packs}
+        pack_list = [p["name"] for p in selection.packs]
+        return pack_list, {"mode": "all", "packs": pack_list}
+
+    @_project_locked()
+    def refresh_local_pack(self, name: str, project_dir: Optional[str] = None) -> int:
+        """Re-copy a ``local:`` pack from its recorded source directory."""
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
         selection = self._load_selection(project_root)
+        entry = next((p for p in selection.packs if p["name"] == name), None)
+        if not entry or entry.get("source") != "local" or not entry.get("path"):
+            print(f"Pack '{name}' was not added from a local path.")
+            return 1
+        from . import community_packs
 
-        if profile and packs:
-            print("Cannot specify both --profile and --pack flags.")
+        source = Path(entry["path"])
+        try:
+            _, manifest = community_packs.validate_pack_structure(source, name)
+        except ValueError as e:
+            print(f"Error: Invalid local pack at '{source}': {e}", file=sys.stderr)
             return 1
+        dest_dir = project_root / TARGET_INTERNAL_STATE_DIR / "packs" / name
+        if dest_dir.exists():
+            shutil.rmtree(dest_dir)
+        file_ops.copy_tree(source, dest_dir, self.link_mode)
+        entry["version"] = manifest.get("version", entry.get("version", "0.0.0"))
+        self._save_selection(project_root, selection)
+        return 0
 
-        if profile:
-            pack_list = selection.profiles.get(profile, [])
-            mode = {"mode": "profile", "profile": profile}
-        elif packs:
-            pack_list = packs
-            mode = {"mode": "pack", "packs": pack_list}
-        else:
-            pack_list = [p["name"] for p in selection.packs]
-            mode = {"mode": "all", "packs": pack_list}
+    def _plan_sync(
+        self,
+        project_root: Path,
+        assistants: Optional[List[str]],
+        profile: Optional[str],
+        packs: Optional[List[str]],
+        force: bool,
+        jobs: int,
+        debug_staging: bool,
+    ) -> SyncPlan:
+        """Plan a sync without modifying the project."""
+        selection = self._load_selection(project_root)
+        pack_list, mode = self._resolve_pack_list(selection, profile, packs)
+        plan = SyncPlan(
+            project_root=project_root,
+            pack_list=pack_list,
+            mode=mode,
+            names_to_sync=assistants or [a.name for a in SUPPORTED_ASSISTANTS],
+        )
 
-        # Copy rules from packs into staging area
+        # Compose the packs' rules trees in memory (first pack wins)
         state_dir = project_root / TARGET_INTERNAL_STATE_DIR
+        rules_index = RuleIndex.compose(
+            [state_dir / "packs" / pack_name / "rules" for pack_name in pack_list]
+        )
+        fingerprints = self._load_fingerprint_cache(project_root)
+        fingerprints_before = json.dumps(fingerprints, sort_keys=True)
+        rules_digest = self._rules_digest(project_root, rules_index, fingerprints.setdefault("files", {}))
+
         rules_root = state_dir / "project_rules"
-        if rules_root.exists():
-            shutil.rmtree(rules_root)
-        rules_root.mkdir(parents=True, exist_ok=True)
-        for pack_name in pack_list:
-            pack_rules = state_dir / "packs" / pack_name / "rules"
-            self._copy_tree_non_destructive(pack_rules, rules_root, project_root)
+        if debug_staging:
+            if force or fingerprints.get("staged") != rules_digest or not rules_root.is_dir():
+                plan.ops.extend(self._plan_staging(rules_index, rules_root))
+                fingerprints["staged"] = rules_digest
+        elif rules_root.exists():
+            plan.ops.append(FileOp("delete", rules_root))
+            fingerprints.pop("staged", None)
 
         # Copy memory/tool starters
-        file_manifest = self._load_file_manifest(project_root)
+        starters: Dict[Path, FileOp] = {}
         for pack_name in pack_list:
             pack_dir = state_dir / "packs" / pack_name
-            starters = [
+            for starter_subdir, target in [
                 ("memory_starters", TARGET_MEMORY_BANK_DIR),
                 ("tool_starters", TARGET_TOOLS_DIR),
-            ]
-            for starter_subdir, target in starters:
-                created = self._copy_tree_non_destructive(
-                    pack_dir / starter_subdir, project_root / target, project_root
-                )
-                for rel in created:
-                    file_manifest[rel] = pack_name
-        self._save_file_manifest(project_root, file_manifest)
+            ]:
+                self._plan_starters(pack_dir / starter_subdir, project_root / target, pack_name, starters)
+        plan.ops.extend(starters.values())
 
-        # Generate rules for assistants
-        names_to_sync = assistants or [a.name for a in SUPPORTED_ASSISTANTS]
-        for name in names_to_sync:
+        # Plan rules for assistants whose inputs changed
+        status = self._load_sync_status(project_root)
+        to_generate: List[AssistantSpec] = []
+        for name in plan.names_to_sync:
             spec = ASSISTANT_MAP.get(name)
             if not spec:
                 continue
-            path_to_clean = project_root / spec.clean_path
-            if path_to_clean.is_dir():
-                shutil.rmtree(path_to_clean)
-            elif path_to_clean.is_file():
-                path_to_clean.unlink()
-            self._generate_for_assistant(spec, rules_root, project_root)
+            fingerprint = self._assistant_fingerprint(spec, rules_digest, pack_list)
+            plan.fingerprints[name] = fingerprint
+            previous = status.get(name, {})
+            if (
+                not force
+                and previous.get("fingerprint") == fingerprint
+                and previous.get("outputs")
+                == self._output_stats(project_root, project_root / spec.clean_path)
+            ):
+                plan.messages[name] = [f"  -> {spec.display_name} rules are up to date"]
+                continue
+            to_generate.append(spec)
+
+        # The composed index is shared by every assistant.
+        if jobs > 1 and len(to_generate) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                results = list(
+                    pool.map(lambda spec: self._plan_assistant(spec, rules_index, project_root), to_generate)
+                )
+        else:
+            results = [self._plan_assistant(spec, rules_index, project_root) for spec in to_generate]
+        for spec, (ops, messages) in zip(to_generate, results):
+            plan.ops.extend(ops)
+            plan.messages[spec.name] = messages
+
+        plan.ops = self._with_mkdirs(plan.ops)
+        plan.digest_cache = fingerprints
+        plan.digest_cache_changed = json.dumps(fingerprints, sort_keys=True) != fingerprints_before
+        return plan
+
+    @_project_locked(shared="plan_only")
+    def project_sync(
+        self,
+        assistants: Optional[List[str]] = None,
+        profile: Optional[str] = None,
+        packs: Optional[List[str]] = None,
+        project_dir: Optional[str] = None,
+        force: bool = False,
+        jobs: int = 1,
+        debug_staging: bool = False,
+        plan_only: bool = False,
+    ) -> int:
+        """Compose the selected packs and generate assistant rules.
+
+        Sync is split into a planning phase, which computes a list of file
+        operations without touching disk, and an executor that applies them
+        in batches. ``plan_only`` prints the plan's operation counts, byte
+        total and affected assistants and stops there, under a shared lock.
+
+        The packs' ``rules/`` trees are overlaid in memory and fed straight to
+        the generators; ``debug_staging`` additionally writes the composed
+        tree to ``.rulebook-ai/project_rules`` for inspection. Inputs are
+        fingerprinted (pack rule contents, pack list and ``AssistantSpec``);
+        assistants whose fingerprint matches the last sync, and whose output
+        files still have the recorded size and mtime, are left untouched
+        unless ``force`` is set. With ``jobs`` > 1 assistants are planned and
+        files written concurrently in a thread pool.
+        """
+        project_root = Path(project_dir).absolute() if project_dir else self.project_root
+
+        if profile and packs:
+            print("Cannot specify both --profile and --pack flags.")
+            return 1
+
+        plan = self._plan_sync(project_root, assistants, profile, packs, force, jobs, debug_staging)
+        if plan_only:
+            for line in plan.summary():
+                print(line)
+            return 0
+
+        failed = execute_ops(plan.ops, jobs)
+        failed_assistants = {op.assistant for op in failed if op.assistant}
+        if any(op.assistant is None and op.pack is None for op in failed):
+            # The debug staging tree is incomplete; rebuild it next time.
+            plan.digest_cache.pop("staged", None)
+            plan.digest_cache_changed = True
+
+        for name in plan.names_to_sync:
+            if name in failed_assistants:
+                spec = ASSISTANT_MAP[name]
+                print(f"  -> Failed to generate {spec.display_name} rules; see errors above")
+                continue
+            for line in plan.messages.get(name, []):
+                print(line)
+
+        # Only the rows that changed are written to the state store.
+        store = self._state(project_root)
+        created = {
+            op.path.relative_to(project_root).as_posix(): self._manifest_entry(op.path, op.pack)
+            for op in plan.ops
+            if op.pack and op not in failed
+        }
+        if created or not store.has_manifest():
+            store.update_manifest(created)
+
+        if plan.digest_cache_changed:
+            store.save_fingerprints(plan.digest_cache)
 
         # Update sync status
-        status = self._load_sync_status(project_root)
         timestamp = datetime.now(timezone.utc).isoformat()
-        for name in names_to_sync:
-            status[name] = {"timestamp": timestamp, **mode, "packs": pack_list, "pack_count": len(pack_list)}
-        self._save_sync_status(project_root, status)
+        status: Dict[str, dict] = {}
+        for name in plan.names_to_sync:
+            status[name] = {
+                "timestamp": timestamp,
+                **plan.mode,
+                "packs": plan.pack_list,
+                "pack_count": len(plan.pack_list),
+            }
+            # Without a fingerprint an assistant whose outputs failed is
+            # regenerated on the next sync.
+            if name in plan.fingerprints and name not in failed_assistants:
+                status[name]["fingerprint"] = plan.fingerprints[name]
+                status[name]["outputs"] = self._output_stats(
+                    project_root, project_root / ASSISTANT_MAP[name].clean_path
+                )
+        store.update_status(status)
 
+        if failed:
+            print(f"Sync finished with {len(failed)} failed file operation(s).")
+            return 1
         print("Sync complete.")
         return 0
 
+    @_project_locked(shared=True)
     def project_status(self, project_dir: Optional[str] = None) -> int:
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
         status = self._load_sync_status(project_root)
@@ -608,6 +1253,40 @@ class RuleManager:
                     print(f"      - {pack_name} (docs: {readme_path})")
         return 0
 
+    @_project_locked()
+    def project_drift(self, project_dir: Optional[str] = None) -> int:
+        """Report which starter files were modified, removed or left untouched."""
+        project_root = Path(project_dir).absolute() if project_dir else self.project_root
+        manifest = self._load_file_manifest(project_root)
+        if not manifest:
+            print("No starter files are tracked.")
+            return 0
+
+        report: Dict[str, List[str]] = {"modified": [], "missing": [], "unverified": [], "pristine": []}
+        refreshed: Dict[str, Dict[str, Any]] = {}
+        for rel, entry in manifest.items():
+            state, updated = self._entry_drift(project_root / rel, entry)
+            report[state].append(rel)
+            if updated:
+                refreshed[rel] = updated
+        # Remember new mtimes of unchanged files so they are not hashed again.
+        if refreshed:
+            self._state(project_root).update_manifest(refreshed)
+
+        print(
+            f"Starter files: {len(report['modified'])} modified, {len(report['missing'])} missing, "
+            f"{len(report['pristine'])} pristine."
+        )
+        for state in ("modified", "missing"):
+            for rel in sorted(report[state]):
+                print(f"  {state}: {rel}")
+        if report["unverified"]:
+            print(
+                f"  {len(report['unverified'])} file(s) were recorded without a content hash and cannot be checked."
+            )
+        return 0
+
+    @_project_locked()
     def project_clean_rules(self, project_dir: Optional[str] = None) -> int:
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
         # remove generated assistant rules
@@ -627,6 +1306,7 @@ class RuleManager:
             print(f"- Removed: {state_dir}")
         return 0
 
+    @_project_locked()
     def project_clean(self, project_dir: Optional[str] = None) -> int:
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
         self.project_clean_rules(str(project_root))
@@ -638,25 +1318,39 @@ class RuleManager:
                 shutil.rmtree(path)
         return 0
 
+    def _orphaned_context(self, project_root: Path) -> Dict[str, Any]:
+        """Manifest entries of starter files whose pack is no longer selected."""
+        installed = {p["name"] for p in self._load_selection(project_root).packs}
+        manifest = self._load_file_manifest(project_root)
+        return {
+            p: entry for p, entry in manifest.items() if self._manifest_pack(entry) not in installed
+        }
+
     def project_clean_context(
         self,
         project_dir: Optional[str] = None,
         action: Optional[str] = None,
         force: bool = False,
     ) -> int:
+        """Delete or forget orphaned starter files.
+
+        The confirmation prompt runs without the exclusive project lock; files
+        orphaned differently by the time it is answered are left alone.
+        """
         project_root = Path(project_dir).absolute() if project_dir else self.project_root
-        selection = self._load_selection(project_root)
-        installed = {p["name"] for p in selection.packs}
-        manifest = self._load_file_manifest(project_root)
-        orphans = {p: pack for p, pack in manifest.items() if pack not in installed}
+        with project_lock(project_root, shared=True):
+            orphans = self._orphaned_context(project_root)
+            if orphans and not force:
+                print("Orphaned context files:")
+                for rel, entry in orphans.items():
+                    state, _ = self._entry_drift(project_root / rel, entry)
+                    suffix = " (modified)" if state == "modified" else ""
+                    print(f"  - {rel}{suffix}")
         if not orphans:
             print("No orphaned context files found.")
             return 0
 
         if not force:
-            print("Orphaned context files:")
-            for rel in orphans:
-                print(f"  - {rel}")
             if not action:
                 resp = input("Delete these files? [y/N]: ").strip().lower()
                 action = "delete" if resp == "y" else "keep"
@@ -669,28 +1363,68 @@ class RuleManager:
             if not action:
                 action = "keep"
 
-        for rel in list(orphans.keys()):
-            full_path = project_root / rel
-            if action == "delete" and full_path.exists():
-                if full_path.is_file():
-                    full_path.unlink()
-                    parent = full_path.parent
-                    roots = {
-                        project_root / TARGET_MEMORY_BANK_DIR,
-                        project_root / TARGET_TOOLS_DIR,
-                        project_root,
-                    }
-                    while parent not in roots and not any(parent.iterdir()):
-                        parent.rmdir()
-                        parent = parent.parent
-                elif full_path.is_dir():
-                    shutil.rmtree(full_path)
-            manifest.pop(rel, None)
-
-        self._save_file_manifest(project_root, manifest)
+        with project_lock(project_root):
+            current = self._orphaned_context(project_root)
+            orphans = {rel: entry for rel, entry in orphans.items() if current.get(rel) == entry}
+            for rel in list(orphans.keys()):
+                full_path = project_root / rel
+                if action == "delete" and full_path.exists():
+                    if full_path.is_file():
+                        full_path.unlink()
+                        parent = full_path.parent
+                        roots = {
+                            project_root / TARGET_MEMORY_BANK_DIR,
+                            project_root / TARGET_TOOLS_DIR,
+                            project_root,
+                        }
+                        while parent not in roots and not any(parent.iterdir()):
+                            parent.rmdir()
+                            parent = parent.parent
+                    elif full_path.is_dir():
+                        shutil.rmtree(full_path)
+
+            self._state(project_root).update_manifest(removals=orphans)
         print("Context cleanup complete.")
         return 0
 
+    # ------------------------------------------------------------------
+    # Pack cache
+    # ------------------------------------------------------------------
+
+    def cache_stats(self) -> int:
+        from . import pack_cache
+
+        stats = pack_cache.stats()
+        print(f"Pack cache: {stats.root}")
+        print(f"  Pack trees: {stats.trees} ({stats.refs} repository/commit entries)")
+        print(
+            f"  Size: {pack_cache.format_size(stats.size)} of {pack_cache.format_size(stats.max_size)}"
+        )
+        print(f"  Git mirrors: {stats.mirrors} ({pack_cache.format_size(stats.mirror_size)})")
+        return 0
+
+    def cache_prune(self, max_size: Optional[str] = None, clear: bool = False) -> int:
+        from . import pack_cache
+
+        try:
+            if clear:
+                limit = 0
+            elif max_size:
+                limit = pack_cache.parse_size(max_size)
+            else:
+                limit = pack_cache.max_cache_bytes()
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        evicted = pack_cache.prune(limit)
+        print(f"Evicted {len(evicted)} cached pack tree(s).")
+        if clear:
+            from . import pack_validation
+
+            print(f"Removed {pack_cache.remove_mirrors()} git mirror(s).")
+            print(f"Removed {pack_validation.clear_memo()} cached validation report(s).")
+        return 0
+
     # ------------------------------------------------------------------
     # Utility
     # ------------------------------------------------------------------
@@ -698,6 +1432,8 @@ class RuleManager:
     def report_bug(self) -> int:
         print(f"To report a bug, please visit {BUG_REPORT_URL}")
         try:  # pragma: no cover - best effort
+            import webbrowser
+
             webbrowser.open(BUG_REPORT_URL)
         except Exception:
             pass
@@ -706,6 +1442,8 @@ class RuleManager:
     def rate_ruleset(self) -> int:
         print(f"For ratings and reviews, please visit {RATINGS_REVIEWS_URL}")
         try:  # pragma: no cover
+            import webbrowser
+
             webbrowser.open(RATINGS_REVIEWS_URL)
         except Exception:
             pass
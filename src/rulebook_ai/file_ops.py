@@ -0,0 +1,154 @@
+"""File copy backends used when installing and staging packs.
+
+Pack files are copied with the cheapest mechanism that is safe for the
+selected link mode:
+
+* ``reflink``  - copy-on-write clone (``FICLONE`` on btrfs/xfs), else a copy.
+* ``hardlink`` - hard link to the source, else a copy.
+* ``auto``     - reflink, then a hard link if the source file is read-only
+  (e.g. a system-wide site-packages install), then a regular copy.
+* ``copy``     - always a regular ``shutil.copy2``.
+
+The mode can be set per command (``--link-mode``) or through the
+``RULEBOOK_AI_LINK_MODE`` environment variable.
+
+Copies and writes land under a temporary name in the destination directory
+and are renamed into place, so concurrent readers see either the old or the
+new file, never a partial one.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import uuid
+from functools import partial
+from pathlib import Path
+from typing import Optional
+
+LINK_MODES = ("auto", "reflink", "hardlink", "copy")
+DEFAULT_LINK_MODE = "auto"
+LINK_MODE_ENV = "RULEBOOK_AI_LINK_MODE"
+
+# ioctl request number for FICLONE (_IOW(0x94, 9, int)) on Linux.
+_FICLONE = 0x40049409
+
+
+def _current_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Read once: os.umask() cannot be queried without setting it, which is not
+# safe while worker threads create files.
+_UMASK = _current_umask()
+
+
+def resolve_link_mode(mode: Optional[str] = None) -> str:
+    """Return ``mode`` or the configured default, validating the value."""
+    resolved = mode or os.environ.get(LINK_MODE_ENV) or DEFAULT_LINK_MODE
+    if resolved not in LINK_MODES:
+        raise ValueError(
+            f"Invalid link mode '{resolved}'. Choose one of: {', '.join(LINK_MODES)}"
+        )
+    return resolved
+
+
+def _reflink(source: Path, destination: Path) -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    except OSError:
+        try:
+            destination.unlink()
+        except FileNotFoundError:
+            pass
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def _hardlink(source: Path, destination: Path) -> bool:
+    try:
+        os.link(source, destination)
+    except OSError:
+        return False
+    return True
+
+
+def _temp_path(destination: Path) -> Path:
+    return destination.with_name(f".{destination.name}.{uuid.uuid4().hex[:12]}.tmp")
+
+
+def _discard(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _replace(tmp: Path, destination: Path) -> None:
+    os.replace(tmp, destination)
+    # Renaming a hard link over another link to the same inode is a no-op
+    # that leaves the temporary name behind.
+    _discard(tmp)
+
+
+def copy_file(source: Path, destination: Path, mode: str = DEFAULT_LINK_MODE) -> str:
+    """Copy ``source`` to ``destination`` and return the method that was used."""
+    source, destination = Path(source), Path(destination)
+    tmp = _temp_path(destination)
+    try:
+        if mode in ("auto", "reflink") and _reflink(source, tmp):
+            method = "reflink"
+        elif (mode == "hardlink" or (mode == "auto" and not os.access(source, os.W_OK))) and _hardlink(
+            source, tmp
+        ):
+            method = "hardlink"
+        else:
+            shutil.copy2(source, tmp)
+            method = "copy"
+        _replace(tmp, destination)
+    except BaseException:
+        _discard(tmp)
+        raise
+    return method
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` via a temporary file and an atomic rename.
+
+    An existing file keeps its permission bits; a new one gets the usual
+    ``0o666 & ~umask``.
+    """
+    path = Path(path)
+    try:
+        perms = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        perms = 0o666 & ~_UMASK
+    tmp = _temp_path(path)
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, perms)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, perms)
+        _replace(tmp, path)
+    except BaseException:
+        _discard(tmp)
+        raise
+
+
+def _copy_function(mode: str, source: str, destination: str) -> str:
+    copy_file(Path(source), Path(destination), mode)
+    return destination
+
+
+def copy_tree(source: Path, destination: Path, mode: str = DEFAULT_LINK_MODE) -> None:
+    """``shutil.copytree`` using the copy backend selected by ``mode``."""
+    shutil.copytree(source, destination, copy_function=partial(_copy_function, mode))
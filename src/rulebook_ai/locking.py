@@ -0,0 +1,80 @@
+"""Advisory locking of a project's rulebook-ai state and generated files.
+
+Git hooks, editor integrations and CI steps may run rulebook-ai against the
+same checkout at the same time. Commands that change ``.rulebook-ai/`` or
+generated files hold an exclusive ``flock`` on the project directory itself;
+read-only commands hold a shared one. Adding, upgrading and cleaning take
+the exclusive lock only to write: network fetches and confirmation prompts
+run without it. Locking the directory rather than a
+file inside ``.rulebook-ai/`` means a failed command leaves no state
+directory behind, and ``project clean`` can remove it while locked. Locks are
+re-entrant within a thread, so a locked method may call other locked methods;
+other threads take their own lock, so worker threads serialise on the same
+directory just as processes do. Where ``fcntl`` is not available (Windows)
+locking is a no-op.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+_local = threading.local()
+
+
+def _held() -> Dict[Path, List[Any]]:
+    """Locks held by the current thread: directory -> [fd, depth, exclusive]."""
+    if not hasattr(_local, "held"):
+        _local.held = {}
+    return _local.held
+
+
+def _flock(fd: int, exclusive: bool, path: Path) -> None:
+    flag = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    try:
+        fcntl.flock(fd, flag | fcntl.LOCK_NB)
+    except BlockingIOError:
+        print(f"Waiting for another rulebook-ai process to release {path}...", file=sys.stderr)
+        fcntl.flock(fd, flag)
+
+
+@contextmanager
+def project_lock(project_root: Path, shared: bool = False) -> Iterator[None]:
+    """Hold an advisory lock on ``project_root`` for the duration of the block."""
+    if fcntl is None or not project_root.is_dir():
+        yield
+        return
+
+    path = project_root.absolute()
+    locks = _held()
+    held = locks.get(path)
+    if held is None:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            _flock(fd, not shared, path)
+        except BaseException:
+            os.close(fd)
+            raise
+        held = locks[path] = [fd, 0, not shared]
+    elif not shared and not held[2]:
+        # Upgrade a shared lock held further up the stack.
+        _flock(held[0], True, path)
+        held[2] = True
+    held[1] += 1
+    try:
+        yield
+    finally:
+        held[1] -= 1
+        if held[1] == 0:
+            del locks[path]
+            fcntl.flock(held[0], fcntl.LOCK_UN)
+            os.close(held[0])
@@ -0,0 +1,341 @@
+"""Install packs from ``.tar.gz`` / ``.tgz`` / ``.tar`` / ``.zip`` archives.
+
+``packs add archive:<path-or-url>[#sha256=<hex>]`` installs a pack from a
+release artifact without git. The archive is read once: a tarball is
+extracted member by member straight from the (local or HTTP) stream while its
+sha256 is computed; a zip, which needs random access, is spooled once while
+hashing. The pack may sit at the archive root or in a single top-level
+directory.
+
+Extraction goes into a staging directory inside the user pack cache, the
+tree is validated in place and then renamed into the cache, so nothing is
+copied through a temporary directory. A pinned ``sha256`` identifies the
+archive content, so a cached copy is used without reading the archive at all.
+Without a writable cache the tree is extracted next to ``.rulebook-ai/packs``
+and renamed into place.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import urllib.request
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+from . import pack_cache
+from .locking import project_lock
+from .pack_validation import validate_pack
+
+CHUNK_SIZE = 64 * 1024
+# Zip archives up to this size are spooled in memory, larger ones on disk.
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _archive_kind(location: str) -> str:
+    """Return ``"zip"`` or ``"tar"`` from the file name of ``location``."""
+    name = location.split("?", 1)[0].lower()
+    if name.endswith(".zip"):
+        return "zip"
+    if name.endswith((".tar.gz", ".tgz", ".tar")):
+        return "tar"
+    raise ValueError(
+        f"Unsupported archive '{location}'. Use a .tar.gz, .tgz, .tar or .zip file."
+    )
+
+
+@dataclass
+class ArchiveSource:
+    location: str                # Absolute path or URL of the archive
+    sha256: Optional[str] = None  # Expected digest of the archive bytes
+
+    @property
+    def is_url(self) -> bool:
+        return "://" in self.location
+
+    @property
+    def kind(self) -> str:
+        return _archive_kind(self.location)
+
+
+def parse_archive_spec(spec: str) -> ArchiveSource:
+    """Parse ``<path-or-url>[#sha256=<hex>]``."""
+    location, _, fragment = spec.partition("#")
+    sha256 = None
+    if fragment:
+        key, _, value = fragment.partition("=")
+        if key != "sha256" or not _SHA256.match(value.lower()):
+            raise ValueError(
+                f"Invalid archive fragment '#{fragment}'. Use '#sha256=<64 hex digits>'."
+            )
+        sha256 = value.lower()
+    if not location:
+        raise ValueError("Missing archive path or URL.")
+    if "://" not in location:
+        location = str(Path(location).expanduser().resolve())
+    _archive_kind(location)  # Reject unsupported file types before reading anything.
+    return ArchiveSource(location, sha256)
+
+
+class _HashingReader:
+    """File-like wrapper that hashes everything read through it."""
+
+    def __init__(self, raw: BinaryIO) -> None:
+        self.raw = raw
+        self.hash = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.hash.update(data)
+        return data
+
+    def drain(self) -> str:
+        """Read to EOF (e.g. tar padding) and return the hex digest."""
+        while self.read(CHUNK_SIZE):
+            pass
+        return self.hash.hexdigest()
+
+
+def _open(source: ArchiveSource) -> BinaryIO:
+    if source.is_url:
+        return urllib.request.urlopen(source.location, timeout=60)
+    return open(source.location, "rb")
+
+
+def _extract_tar(reader: _HashingReader, dest: Path) -> None:
+    with tarfile.open(fileobj=reader, mode="r|*") as archive:
+        for member in archive:
+            if hasattr(tarfile, "data_filter"):
+                archive.extract(member, dest, filter="data")
+            elif member.isfile() or member.isdir():  # pragma: no cover - old Python
+                if member.name.startswith("/") or ".." in PurePosixPath(member.name).parts:
+                    raise ValueError(f"Unsafe path in archive: {member.name}")
+                archive.extract(member, dest)
+
+
+def _extract_zip(reader: _HashingReader, dest: Path) -> None:
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+        shutil.copyfileobj(reader, spool, CHUNK_SIZE)
+        spool.seek(0)
+        with zipfile.ZipFile(spool) as archive:
+            for info in archive.infolist():
+                parts = PurePosixPath(info.filename).parts
+                if info.filename.startswith("/") or ".." in parts:
+                    raise ValueError(f"Unsafe path in archive: {info.filename}")
+                target = dest.joinpath(*parts)
+                if info.is_dir():
+                    target.mkdir(parents=True, exist_ok=True)
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with archive.open(info) as src, open(target, "wb") as out:
+                    shutil.copyfileobj(src, out, CHUNK_SIZE)
+
+
+def extract_archive(source: ArchiveSource, dest: Path) -> str:
+    """Extract ``source`` into ``dest`` in one pass and return its sha256.
+
+    Raises ``ValueError`` if the archive is unsafe, unreadable or does not
+    match the expected checksum.
+    """
+    dest.mkdir(parents=True, exist_ok=True)
+    try:
+        with _open(source) as raw:
+            reader = _HashingReader(raw)
+            if source.kind == "zip":
+                _extract_zip(reader, dest)
+            else:
+                _extract_tar(reader, dest)
+            digest = reader.drain()
+    except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+        raise ValueError(f"Could not read archive {source.location}: {e}") from e
+    if source.sha256 and digest != source.sha256:
+        raise ValueError(
+            f"Checksum mismatch for {source.location}: expected {source.sha256}, got {digest}."
+        )
+    return digest
+
+
+def _pack_root(extracted: Path) -> Path:
+    """The pack is at the archive root or in its only top-level directory."""
+    if (extracted / "manifest.yaml").exists():
+        return extracted
+    entries = [p for p in extracted.iterdir() if not p.name.startswith(".")]
+    if len(entries) == 1 and entries[0].is_dir():
+        return entries[0]
+    return extracted
+
+
+def _confirm(source: ArchiveSource) -> Optional[bool]:
+    print(
+        f"WARNING: You are installing a pack archive from {source.location}. This code is not "
+        "audited. Add '#sha256=<digest>' to pin the archive content."
+    )
+    try:
+        resp = input("Proceed? (yes/No): ").strip().lower()
+    except (EOFError, KeyboardInterrupt):
+        print("\nInstallation cancelled.")
+        return None
+    if resp not in {"y", "yes"}:
+        print("Installation cancelled by user.")
+        return False
+    return True
+
+
+@dataclass
+class PreparedArchive:
+    """An archive fetched and validated, ready to be confirmed and installed."""
+
+    source: ArchiveSource
+    pack_root: Optional[Path] = None
+    pack_name: str = ""
+    manifest: Dict[str, Any] = field(default_factory=dict)
+    digest: str = ""
+    cached: bool = False    # pack_root is already a tree in the user cache
+    in_cache: bool = False  # pack_root is inside the user cache (cached or staged there)
+    staging: Optional[Path] = None
+    error: Optional[str] = None
+
+    def discard(self) -> None:
+        """Remove the staging directory, if any."""
+        if self.staging is not None:
+            shutil.rmtree(self.staging, ignore_errors=True)
+            self.staging = None
+
+
+def prepare_archive(
+    source: ArchiveSource, project_root: Path, source_packs_dir: Path
+) -> PreparedArchive:
+    """Fetch, verify and validate ``source`` without touching the project.
+
+    Errors are reported in ``error``. The caller must call
+    :meth:`PreparedArchive.discard` once done with the result.
+    """
+    prepared = PreparedArchive(source)
+
+    packs_dir = project_root / ".rulebook-ai" / "packs"
+    cached = pack_cache.lookup(source.location, source.sha256, "") if source.sha256 else None
+    if cached is not None:
+        pack_root, prepared.digest = cached, source.sha256 or ""
+        prepared.cached = prepared.in_cache = True
+    else:
+        try:
+            prepared.staging, prepared.in_cache = pack_cache.new_staging(), True
+        except OSError:
+            # No writable user cache: extract next to the final location.
+            packs_dir.mkdir(parents=True, exist_ok=True)
+            prepared.staging = Path(tempfile.mkdtemp(dir=packs_dir, prefix=".incoming-"))
+        try:
+            prepared.digest = extract_archive(source, prepared.staging / "tree")
+        except ValueError as e:
+            prepared.error = f"Error: {e}"
+            return prepared
+        pack_root = _pack_root(prepared.staging / "tree")
+    prepared.pack_root = pack_root
+
+    report = validate_pack(pack_root)
+    if not report.ok:
+        prepared.error = (
+            f"Error: Invalid pack archive '{source.location}': {'; '.join(report.errors)}"
+        )
+        return prepared
+    prepared.pack_name, prepared.manifest = report.name or "", report.manifest
+
+    if (source_packs_dir / prepared.pack_name).is_dir():
+        prepared.error = f"Pack name '{prepared.pack_name}' conflicts with built-in pack names."
+        return prepared
+    pack_name = prepared.pack_name
+    dest_dir = packs_dir / pack_name
+    if dest_dir.exists():
+        meta_path = dest_dir / "pack.json"
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        if meta.get("archive") != source.location:
+            prepared.error = f"Pack '{pack_name}' already installed from a different source."
+    return prepared
+
+
+def confirm_archive(prepared: PreparedArchive) -> Optional[bool]:
+    """Ask before installing an unpinned archive from a URL."""
+    if prepared.source.is_url and not prepared.source.sha256:
+        return _confirm(prepared.source)
+    return True
+
+
+def install_archive(
+    prepared: PreparedArchive,
+    project_root: Path,
+    load_selection: Callable[[Path], object],
+    save_selection: Callable[[Path, object], None],
+    link_mode: str = "auto",
+) -> int:
+    """Copy a confirmed archive pack into the project and record it in the selection."""
+    source, pack_name = prepared.source, prepared.pack_name
+    dest_dir = project_root / ".rulebook-ai" / "packs" / pack_name
+    with project_lock(project_root):
+        if dest_dir.exists():
+            shutil.rmtree(dest_dir)
+        dest_dir.parent.mkdir(parents=True, exist_ok=True)
+        if prepared.in_cache:
+            pack_root = prepared.pack_root
+            if not prepared.cached:
+                pack_root = pack_cache.adopt(source.location, prepared.digest, "", pack_root)
+            pack_cache.copy_out(pack_root, dest_dir, link_mode)
+        else:
+            os.replace(prepared.pack_root, dest_dir)
+
+        meta = {"name": pack_name, "archive": source.location, "sha256": prepared.digest}
+        (dest_dir / "pack.json").write_text(json.dumps(meta, indent=2))
+
+        selection = load_selection(project_root)
+        entry = {
+            "name": pack_name,
+            "version": prepared.manifest.get("version", "0.0.0"),
+            "source": "archive",
+            "archive": source.location,
+            "sha256": prepared.digest,
+        }
+        existing = next((p for p in selection.packs if p["name"] == pack_name), None)
+        if existing:
+            existing.clear()
+            existing.update(entry)
+        else:
+            selection.packs.append(entry)
+        save_selection(project_root, selection)
+
+    print(f"Added pack '{pack_name}' from archive. Run 'project sync' to apply changes.")
+    return 0
+
+
+def add_pack_from_archive(
+    spec: str,
+    project_root: Path,
+    source_packs_dir: Path,
+    load_selection: Callable[[Path], object],
+    save_selection: Callable[[Path, object], None],
+    link_mode: str = "auto",
+) -> int:
+    try:
+        source = parse_archive_spec(spec)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    prepared = prepare_archive(source, project_root, source_packs_dir)
+    try:
+        if prepared.error:
+            print(prepared.error)
+            return 1
+        confirmed = confirm_archive(prepared)
+        if not confirmed:
+            return 1 if confirmed is None else 0
+        return install_archive(prepared, project_root, load_selection, save_selection, link_mode)
+    finally:
+        prepared.discard()
@@ -0,0 +1,308 @@
+"""User-level, content-addressed cache of community pack trees.
+
+Installing a community pack needs a git checkout of its repository (or an
+archive download). The cache keeps the pack directory so that installing the
+same pack at the same commit (or archive sha256) into another project needs
+neither git nor network::
+
+    $XDG_CACHE_HOME/rulebook-ai/
+        packs/objects/<tree-hash>/      pack files, stored once per content
+        packs/objects/<tree-hash>.used  touched on every use (LRU clock)
+        packs/refs/<key>.json           (repo URL, commit, subpath) -> tree hash
+        git/<user>-<repo>-<hash>.git    shallow, blobless bare mirror of each repository
+
+The tree hash covers every file's relative path and content, so identical
+pack trees from different commits or forks share one object. When the cache
+grows beyond ``RULEBOOK_AI_CACHE_MAX_BYTES`` (default 512 MiB) the least
+recently used trees are evicted. Mirrors hold only the commits that were
+installed, each fetched at depth 1, and keep the objects that commits share,
+so reinstalling an unpinned pack transfers just what changed. Mirrors are
+removed by ``cache prune --all``. ``RULEBOOK_AI_CACHE_DIR`` overrides the
+cache location.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import file_ops
+
+CACHE_DIR_ENV = "RULEBOOK_AI_CACHE_DIR"
+CACHE_MAX_BYTES_ENV = "RULEBOOK_AI_CACHE_MAX_BYTES"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_FULL_SHA = re.compile(r"^[0-9a-f]{40}([0-9a-f]{24})?$")
+_SIZE = re.compile(r"^(\d+)\s*([KMG]?)i?B?$", re.IGNORECASE)
+
+
+@dataclass
+class CacheStats:
+    root: Path
+    trees: int
+    refs: int
+    size: int
+    max_size: int
+    mirrors: int = 0
+    mirror_size: int = 0
+
+
+def cache_root() -> Path:
+    """Return the root of the rulebook-ai user cache."""
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override).expanduser()
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "rulebook-ai"
+
+
+def _packs_dir() -> Path:
+    return cache_root() / "packs"
+
+
+def parse_size(value: str) -> int:
+    """Parse sizes like ``1048576``, ``500M`` or ``2GiB`` into bytes."""
+    match = _SIZE.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid size '{value}'. Use a byte count or a K/M/G suffix.")
+    number, unit = match.groups()
+    return int(number) * 1024 ** " KMG".index(unit.upper() or " ")
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def max_cache_bytes() -> int:
+    value = os.environ.get(CACHE_MAX_BYTES_ENV)
+    return parse_size(value) if value else DEFAULT_MAX_BYTES
+
+
+def is_commit_sha(ref: Optional[str]) -> bool:
+    """Only full commit ids identify immutable content; branches and tags move."""
+    return bool(ref and _FULL_SHA.match(ref))
+
+
+def _ref_key(repo_url: str, commit: str, subpath: str) -> str:
+    raw = f"{repo_url.rstrip('/')}\0{commit}\0{subpath.strip('/')}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def mirror_path(repo_url: str) -> Path:
+    """Return the bare mirror directory used for ``repo_url``."""
+    parts = [p for p in re.split(r"[/:]", repo_url.rstrip("/")) if p][-2:]
+    name = "-".join(re.sub(r"[^A-Za-z0-9._-]", "_", p) for p in parts).removesuffix(".git")
+    digest = hashlib.sha256(repo_url.rstrip("/").encode("utf-8")).hexdigest()[:12]
+    return cache_root() / "git" / f"{name}-{digest}.git"
+
+
+def _mirrors() -> List[Path]:
+    git_dir = cache_root() / "git"
+    return sorted(git_dir.glob("*.git")) if git_dir.is_dir() else []
+
+
+def _dir_size(root: Path) -> int:
+    return sum(
+        (Path(dirpath) / name).stat().st_size
+        for dirpath, _, filenames in os.walk(root)
+        for name in filenames
+    )
+
+
+def _pack_files(root: Path) -> List[Path]:
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != ".git")
+        files.extend(Path(dirpath) / name for name in sorted(filenames))
+    return files
+
+
+def tree_hash(root: Path) -> str:
+    """Hash the relative paths and contents of every file under ``root``."""
+    h = hashlib.sha256()
+    for path in _pack_files(root):
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        h.update(f"{path.relative_to(root).as_posix()}\0{digest}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _touch(tree: Path) -> None:
+    tree.with_name(tree.name + ".used").touch()
+
+
+def lookup(repo_url: str, commit: str, subpath: str) -> Optional[Path]:
+    """Return the cached pack tree for ``repo_url`` at ``commit``, if any."""
+    ref_path = _packs_dir() / "refs" / f"{_ref_key(repo_url, commit, subpath)}.json"
+    try:
+        tree = _packs_dir() / "objects" / json.loads(ref_path.read_text())["tree"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+    if not tree.is_dir():
+        return None
+    _touch(tree)
+    return tree
+
+
+def _record(repo_url: str, commit: str, subpath: str, digest: str) -> Path:
+    tree = _packs_dir() / "objects" / digest
+    ref = {"url": repo_url, "commit": commit, "subpath": subpath, "tree": digest}
+    file_ops.atomic_write_bytes(
+        _packs_dir() / "refs" / f"{_ref_key(repo_url, commit, subpath)}.json",
+        json.dumps(ref, indent=2).encode("utf-8"),
+    )
+    _touch(tree)
+    prune(max_cache_bytes(), keep=digest)
+    return tree
+
+
+def _intact(tree: Path, digest: str) -> bool:
+    """Return True if ``tree`` still holds the content named by ``digest``.
+
+    A damaged tree is removed so that the caller can store a fresh copy.
+    """
+    if not tree.is_dir():
+        return False
+    if tree_hash(tree) == digest:
+        return True
+    shutil.rmtree(tree, ignore_errors=True)
+    return False
+
+
+def store(repo_url: str, commit: str, subpath: str, pack_root: Path) -> Path:
+    """Add ``pack_root`` (checked out at ``commit``) to the cache and return the cached tree."""
+    objects = _packs_dir() / "objects"
+    (_packs_dir() / "refs").mkdir(parents=True, exist_ok=True)
+    objects.mkdir(parents=True, exist_ok=True)
+
+    digest = tree_hash(pack_root)
+    tree = objects / digest
+    if not _intact(tree, digest):
+        import tempfile
+
+        staging = Path(tempfile.mkdtemp(dir=objects, prefix=".incoming-"))
+        try:
+            shutil.copytree(
+                pack_root, staging / "tree", ignore=shutil.ignore_patterns(".git")
+            )
+            os.replace(staging / "tree", tree)
+        except OSError:
+            # Another process stored the same tree first.
+            if not tree.is_dir():
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    return _record(repo_url, commit, subpath, digest)
+
+
+def new_staging() -> Path:
+    """Return a fresh directory on the cache's filesystem to extract a tree into."""
+    import tempfile
+
+    objects = _packs_dir() / "objects"
+    objects.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(dir=objects, prefix=".incoming-"))
+
+
+def adopt(repo_url: str, commit: str, subpath: str, pack_root: Path) -> Path:
+    """Like :func:`store`, but move ``pack_root`` (inside a :func:`new_staging`
+    directory) into the cache instead of copying it."""
+    (_packs_dir() / "refs").mkdir(parents=True, exist_ok=True)
+    digest = tree_hash(pack_root)
+    tree = _packs_dir() / "objects" / digest
+    if not _intact(tree, digest):
+        try:
+            os.replace(pack_root, tree)
+        except OSError:
+            if not tree.is_dir():
+                raise
+    return _record(repo_url, commit, subpath, digest)
+
+
+def copy_out(tree: Path, destination: Path, link_mode: str) -> None:
+    """Copy a cached ``tree`` into a project.
+
+    Cached files are shared by every project, so they are never hard-linked:
+    editing an installed file would otherwise rewrite the cached object.
+    """
+    file_ops.copy_tree(tree, destination, "copy" if link_mode == "copy" else "reflink")
+
+
+def _tree_size(tree: Path) -> int:
+    return sum(path.stat().st_size for path in _pack_files(tree))
+
+
+def _trees() -> Dict[str, Path]:
+    objects = _packs_dir() / "objects"
+    if not objects.is_dir():
+        return {}
+    return {p.name: p for p in objects.iterdir() if p.is_dir() and not p.name.startswith(".")}
+
+
+def _last_used(tree: Path) -> float:
+    try:
+        return tree.with_name(tree.name + ".used").stat().st_mtime
+    except FileNotFoundError:
+        return tree.stat().st_mtime
+
+
+def prune(max_bytes: int, keep: Optional[str] = None) -> List[str]:
+    """Evict least recently used trees until the cache fits in ``max_bytes``.
+
+    ``keep`` names a tree that must survive (the one just stored). Returns
+    the evicted tree hashes.
+    """
+    trees = _trees()
+    sizes = {name: _tree_size(tree) for name, tree in trees.items()}
+    total = sum(sizes.values())
+    evicted: List[str] = []
+    for name in sorted(trees, key=lambda n: _last_used(trees[n])):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(trees[name], ignore_errors=True)
+        trees[name].with_name(name + ".used").unlink(missing_ok=True)
+        total -= sizes[name]
+        evicted.append(name)
+
+    if evicted:
+        refs = _packs_dir() / "refs"
+        for ref_path in refs.glob("*.json"):
+            try:
+                if json.loads(ref_path.read_text()).get("tree") in evicted:
+                    ref_path.unlink()
+            except (FileNotFoundError, ValueError):
+                continue
+    return evicted
+
+
+def stats() -> CacheStats:
+    trees = _trees()
+    refs = _packs_dir() / "refs"
+    return CacheStats(
+        root=cache_root(),
+        trees=len(trees),
+        refs=len(list(refs.glob("*.json"))) if refs.is_dir() else 0,
+        size=sum(_tree_size(tree) for tree in trees.values()),
+        max_size=max_cache_bytes(),
+        mirrors=len(_mirrors()),
+        mirror_size=sum(_dir_size(m) for m in _mirrors()),
+    )
+
+
+def remove_mirrors() -> int:
+    """Delete every git mirror; return how many were removed."""
+    mirrors = _mirrors()
+    for mirror in mirrors:
+        shutil.rmtree(mirror, ignore_errors=True)
+    return len(mirrors)
@@ -0,0 +1,124 @@
+"""Compiled lookup and search structure for the community pack index.
+
+``packs.json`` is a flat list, so finding a pack by name or filtering the
+list means scanning every entry. :class:`PackCatalog` is compiled from that
+list whenever the index cache is saved and stored next to it:
+
+* ``by_name``  - pack name -> position in ``entries`` (sorted by name)
+* ``tokens``   - word -> ``{entry: weight}`` over name, username and
+  description, weighted 3/2/1 so name matches rank first
+* ``trigrams`` - trigram -> words containing it, used to find the indexed
+  words similar to a misspelt or partial query word
+
+A search looks up each query word exactly and through its trigrams, so its
+cost depends on the size of the vocabulary and of the matching postings, not
+on the number of packs.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+CATALOG_VERSION = 1
+
+# Field weights: a word in the pack name counts more than one in its description.
+FIELD_WEIGHTS = (("name", 3), ("username", 2), ("description", 1))
+
+# Minimum trigram (Jaccard) similarity for a fuzzy word match.
+MIN_SIMILARITY = 0.3
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def word_trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class PackCatalog:
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+    by_name: Dict[str, int] = field(default_factory=dict)
+    tokens: Dict[str, Dict[int, int]] = field(default_factory=dict)
+    trigrams: Dict[str, List[str]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, packs: Iterable[Dict[str, Any]]) -> "PackCatalog":
+        catalog = cls(entries=sorted(packs, key=lambda p: p.get("name") or ""))
+        grams: Dict[str, Set[str]] = {}
+        for i, entry in enumerate(catalog.entries):
+            catalog.by_name.setdefault(entry.get("name", ""), i)
+            for key, weight in FIELD_WEIGHTS:
+                for word in tokenize(entry.get(key) or ""):
+                    postings = catalog.tokens.setdefault(word, {})
+                    postings[i] = max(postings.get(i, 0), weight)
+        for word in catalog.tokens:
+            for gram in word_trigrams(word):
+                grams.setdefault(gram, set()).add(word)
+        catalog.trigrams = {gram: sorted(words) for gram, words in grams.items()}
+        return catalog
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        i = self.by_name.get(name)
+        return self.entries[i] if i is not None else None
+
+    def _similar(self, word: str) -> Dict[str, float]:
+        """Return indexed words similar to ``word`` with their similarity."""
+        if word in self.tokens and len(word) < 3:
+            return {word: 1.0}
+        query = word_trigrams(word)
+        shared: Dict[str, int] = {}
+        for gram in query:
+            for candidate in self.trigrams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        similar = {}
+        for candidate, count in shared.items():
+            score = count / (len(query) + len(candidate) + 1 - count)
+            if candidate.startswith(word):
+                score = max(score, 0.8)
+            if score >= MIN_SIMILARITY:
+                similar[candidate] = score
+        return similar
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[float, Dict[str, Any]]]:
+        """Rank entries by how well they match ``query``; best first."""
+        scores: Dict[int, float] = {}
+        for word in tokenize(query):
+            best: Dict[int, float] = {}
+            for candidate, similarity in self._similar(word).items():
+                for i, weight in self.tokens[candidate].items():
+                    best[i] = max(best.get(i, 0.0), weight * similarity)
+            for i, score in best.items():
+                scores[i] = scores.get(i, 0.0) + score
+        exact = self.by_name.get(query.strip())
+        if exact is not None:
+            scores[exact] = scores.get(exact, 0.0) + 10
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(round(score, 3), self.entries[i]) for i, score in ranked[:limit]]
+
+    def to_json(self, source: Any = None) -> Dict[str, Any]:
+        return {
+            "version": CATALOG_VERSION,
+            "source": source,
+            "entries": self.entries,
+            "tokens": {w: [[i, wt] for i, wt in p.items()] for w, p in self.tokens.items()},
+            "trigrams": self.trigrams,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "PackCatalog":
+        if data.get("version") != CATALOG_VERSION:
+            raise ValueError("Unsupported catalog version")
+        entries = data["entries"]
+        return cls(
+            entries=entries,
+            by_name={entry.get("name", ""): i for i, entry in reversed(list(enumerate(entries)))},
+            tokens={w: {i: wt for i, wt in p} for w, p in data["tokens"].items()},
+            trigrams=data["trigrams"],
+        )
@@ -0,0 +1,240 @@
+"""Structural validation of rule packs.
+
+:func:`validate_pack` checks a pack directory against the layout described
+in the pack authoring guide and returns a :class:`ValidationReport` listing
+every problem found, rather than stopping at the first one. Rule files are
+checked for UTF-8 in a thread pool with an incremental decoder over
+fixed-size chunks, so large files are never read into memory whole.
+
+The layout and rule-file checks are memoised by a signature of the pack
+tree (every file's relative path, size, mtime, inode and ctime), both
+in-process and in the user cache, so validating an unchanged pack again,
+e.g. on reinstall or from ``validate_pack.py``, only costs a directory walk.
+Inode and ctime change whenever a file is rewritten or extracted afresh,
+even if its size and mtime are restored. ``manifest.yaml`` is
+always parsed again: archives and reproducible builds give different
+releases identical sizes and mtimes, so the signature cannot tell their
+manifests apart.
+"""
+
+from __future__ import annotations
+
+import codecs
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from . import file_ops, pack_cache
+
+# Bump when the rules below change so memoised reports are not reused.
+VALIDATOR_VERSION = 3
+CHUNK_SIZE = 64 * 1024
+
+ALLOWED_ROOT = {"manifest.yaml", "README.md", "rules", "memory_starters", "tool_starters"}
+
+_memo: Dict[str, "ValidationReport"] = {}
+
+
+@dataclass
+class ValidationReport:
+    """Outcome of validating one pack directory."""
+
+    pack_root: str
+    name: Optional[str] = None
+    manifest: Dict[str, Any] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    rule_files: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def raise_for_errors(self) -> None:
+        if self.errors:
+            raise ValueError("; ".join(self.errors))
+
+
+def _tree_signature(pack_root: Path) -> str:
+    h = hashlib.sha256(f"v{VALIDATOR_VERSION}\n".encode("utf-8"))
+    for dirpath, dirnames, filenames in os.walk(pack_root):
+        dirnames[:] = sorted(d for d in dirnames if d != ".git")
+        rel_dir = Path(dirpath).relative_to(pack_root).as_posix()
+        h.update(f"d {rel_dir}\n".encode("utf-8"))
+        for name in sorted(filenames):
+            st = os.stat(os.path.join(dirpath, name))
+            stamp = (st.st_size, st.st_mtime_ns, st.st_ino, st.st_ctime_ns)
+            h.update(f"f {rel_dir}/{name}\0{stamp}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _check_utf8(path: Path) -> Optional[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with path.open("rb") as fh:
+            while True:
+                chunk = fh.read(CHUNK_SIZE)
+                decoder.decode(chunk, final=not chunk)
+                if not chunk:
+                    return None
+    except UnicodeDecodeError:
+        return f"Rule file not UTF-8 encoded: {path.name}"
+    except OSError as e:
+        return f"Cannot read rule file {path.name}: {e.strerror}"
+
+
+def _check_manifest(manifest_path: Path, report: ValidationReport) -> None:
+    try:
+        manifest = yaml.safe_load(manifest_path.read_text()) or {}
+    except yaml.YAMLError as e:
+        report.errors.append(f"manifest.yaml is not valid YAML: {e}")
+        return
+    if not isinstance(manifest, dict):
+        report.errors.append("manifest.yaml must be a mapping.")
+        return
+    report.manifest = manifest
+    for key in ["name", "version", "summary"]:
+        if not manifest.get(key):
+            report.errors.append(f"manifest.yaml missing '{key}'.")
+    name = manifest.get("name")
+    if name:
+        if not re.fullmatch(r"[A-Za-z0-9-]+", str(name)):
+            report.errors.append("manifest name must be a slug: letters, digits, and dashes")
+        report.name = str(name)
+
+
+def _check_rules(rules_dir: Path, report: ValidationReport) -> List[Path]:
+    """Check the rules/ layout and return the rule files to decode."""
+    rule_dirs = sorted(d for d in rules_dir.iterdir() if d.is_dir())
+    if not rule_dirs:
+        report.errors.append("rules/ must contain at least one numbered directory.")
+    prefixes: set[str] = set()
+    to_decode: List[Path] = []
+    for d in rule_dirs:
+        m = re.fullmatch(r"(\d{2})-rules(?:-([a-z0-9-]+))?", d.name)
+        if not m:
+            report.errors.append(f"Invalid rules directory name: {d.name}")
+            continue
+        prefix, mode = m.groups()
+        if prefix in prefixes:
+            report.errors.append(f"Duplicate rules directory prefix: {prefix}")
+        prefixes.add(prefix)
+        if mode is None and d.name != "01-rules":
+            report.errors.append("Generic rules directory must be named '01-rules'.")
+
+        files = sorted(f for f in d.iterdir() if f.is_file())
+        if not files:
+            report.errors.append(f"{d.name} must contain at least one rule file.")
+        file_prefixes: set[str] = set()
+        for f in files:
+            if f.name.startswith("."):
+                report.errors.append(f"Hidden files not allowed: {f.name}")
+                continue
+            if f.suffix != ".md":
+                report.errors.append(f"Rule files must use .md extension: {f.name}")
+                continue
+            mf = re.fullmatch(r"(\d{2})-.*\.md", f.name)
+            if not mf:
+                report.errors.append(f"Invalid rule file name: {f.name}")
+                continue
+            if mf.group(1) in file_prefixes:
+                report.errors.append(f"Duplicate rule file prefix in {d.name}: {f.name}")
+            file_prefixes.add(mf.group(1))
+            to_decode.append(f)
+        report.rule_files += len(files)
+
+    if rule_dirs and report.rule_files == 0:
+        report.errors.append("rules/ directories must contain at least one rule file.")
+    return to_decode
+
+
+def _validate(pack_root: Path, jobs: int) -> ValidationReport:
+    """Check the pack layout and rule files; the manifest is checked separately."""
+    report = ValidationReport(pack_root=str(pack_root))
+    manifest_path = pack_root / "manifest.yaml"
+    rules_dir = pack_root / "rules"
+    if (
+        not manifest_path.is_file()
+        or not (pack_root / "README.md").is_file()
+        or not rules_dir.is_dir()
+    ):
+        report.errors.append("Invalid pack structure.")
+
+    for item in sorted(pack_root.iterdir()):
+        if item.name not in ALLOWED_ROOT and not item.name.startswith("."):
+            report.errors.append(f"Unexpected item in pack root: {item.name}")
+
+    if rules_dir.is_dir():
+        to_decode = _check_rules(rules_dir, report)
+        if jobs > 1 and len(to_decode) > 1:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(_check_utf8, to_decode))
+        else:
+            results = [_check_utf8(f) for f in to_decode]
+        report.errors.extend(error for error in results if error)
+    return report
+
+
+def _memo_path(signature: str) -> Path:
+    return pack_cache.cache_root() / "validation" / f"{signature}.json"
+
+
+def _load_memo(signature: str) -> Optional[ValidationReport]:
+    report = _memo.get(signature)
+    if report is not None:
+        return report
+    try:
+        data = json.loads(_memo_path(signature).read_text())
+        return ValidationReport(**data)
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _store_memo(signature: str, report: ValidationReport) -> None:
+    _memo[signature] = report
+    try:
+        path = _memo_path(signature)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        file_ops.atomic_write_bytes(path, json.dumps(asdict(report)).encode("utf-8"))
+    except OSError:
+        pass  # The user cache is optional.
+
+
+def validate_pack(
+    pack_root: Path, expected_name: Optional[str] = None, jobs: Optional[int] = None
+) -> ValidationReport:
+    """Validate the pack at ``pack_root`` and report every problem found."""
+    pack_root = Path(pack_root)
+    if not pack_root.is_dir():
+        return ValidationReport(pack_root=str(pack_root), errors=["Invalid pack structure."])
+
+    signature = _tree_signature(pack_root)
+    cached = _load_memo(signature)
+    if cached is None:
+        cached = _validate(pack_root, jobs or min(8, os.cpu_count() or 1))
+        _store_memo(signature, cached)
+
+    report = ValidationReport(pack_root=str(pack_root), rule_files=cached.rule_files)
+    manifest_path = pack_root / "manifest.yaml"
+    if manifest_path.is_file():
+        _check_manifest(manifest_path, report)
+    report.errors.extend(cached.errors)
+    if expected_name and report.name and report.name != expected_name:
+        report.errors.append(f"name mismatch: {report.name} != {expected_name}")
+    return report
+
+
+def clear_memo() -> int:
+    """Forget every memoised report; return how many were stored on disk."""
+    _memo.clear()
+    memo_dir = pack_cache.cache_root() / "validation"
+    reports = list(memo_dir.glob("*.json")) if memo_dir.is_dir() else []
+    for path in reports:
+        path.unlink(missing_ok=True)
+    return len(reports)
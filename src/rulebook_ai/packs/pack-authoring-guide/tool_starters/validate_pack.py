@@ -1,13 +1,18 @@
 from pathlib import Path
 import sys
 
-from rulebook_ai.community_packs import validate_pack_structure
+from rulebook_ai.pack_validation import validate_pack
 
 
 def main():
     target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path.cwd()
-    name, manifest = validate_pack_structure(target)
-    print(f"validated pack '{name}' version {manifest['version']}")
+    report = validate_pack(target)
+    if not report.ok:
+        print(f"pack at {target} has {len(report.errors)} problem(s):")
+        for error in report.errors:
+            print(f"  - {error}")
+        sys.exit(1)
+    print(f"validated pack '{report.name}' version {report.manifest['version']}")
 
 
 if __name__ == "__main__":
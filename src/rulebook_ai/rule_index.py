@@ -0,0 +1,214 @@
+"""In-memory index of a composed rules tree.
+
+``project_sync`` composes the ``rules/`` trees of the selected packs into a
+single :class:`RuleIndex` (first pack wins on conflicting paths) and every
+generation strategy reads from it, so the number of directory walks and
+``stat`` calls scales with the number of rule files rather than with files
+multiplied by assistants, and no intermediate copy is written to disk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Process-wide store of rule file contents keyed by sha256. Projects synced by
+# the same process (e.g. ``project sync --projects-from``) that install the
+# same packs share these bytes instead of re-reading every copy from disk.
+# The store is bounded: past ``CONTENT_STORE_MAX_BYTES`` the least recently
+# used contents are dropped, so a long-running ``--watch`` does not keep every
+# saved revision of every rule file.
+CONTENT_STORE_MAX_BYTES = 64 * 1024 * 1024
+
+_CONTENT_STORE: "OrderedDict[str, bytes]" = OrderedDict()
+_CONTENT_STORE_BYTES = 0
+_CONTENT_STORE_LOCK = threading.Lock()
+
+
+def _store_get(digest: str) -> Optional[bytes]:
+    with _CONTENT_STORE_LOCK:
+        data = _CONTENT_STORE.get(digest)
+        if data is not None:
+            _CONTENT_STORE.move_to_end(digest)
+        return data
+
+
+def _store_put(digest: str, data: bytes) -> None:
+    global _CONTENT_STORE_BYTES
+    with _CONTENT_STORE_LOCK:
+        if digest in _CONTENT_STORE:
+            _CONTENT_STORE.move_to_end(digest)
+            return
+        if len(data) > CONTENT_STORE_MAX_BYTES:
+            return
+        _CONTENT_STORE[digest] = data
+        _CONTENT_STORE_BYTES += len(data)
+        while _CONTENT_STORE_BYTES > CONTENT_STORE_MAX_BYTES:
+            _, evicted = _CONTENT_STORE.popitem(last=False)
+            _CONTENT_STORE_BYTES -= len(evicted)
+
+
+# Digests of preloaded files keyed by (path relative to the rules root, size,
+# mtime_ns). Installed packs are copied with their mtimes preserved, so a
+# project's first sync can fingerprint built-in rules without reading them.
+_KNOWN_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+
+
+def preload_contents(contents: Dict[Tuple[str, int, int], bytes]) -> None:
+    """Seed the shared content store, e.g. in a freshly started worker process.
+
+    ``contents`` maps ``(rel_path, size, mtime_ns)`` of each rule file to its bytes.
+    """
+    for key, data in contents.items():
+        digest = hashlib.sha256(data).hexdigest()
+        _KNOWN_DIGESTS[key] = digest
+        _store_put(digest, data)
+
+
+def known_digest(rule: "RuleFile") -> Optional[str]:
+    """Return the sha256 of a preloaded file matching ``rule``'s path, size and mtime."""
+    return _KNOWN_DIGESTS.get((rule.rel_path, rule.size, rule.mtime_ns))
+
+
+@dataclass(frozen=True)
+class RuleFile:
+    """A single rule file in the index."""
+
+    rel_parts: Tuple[str, ...]  # Path components relative to the index root
+    path: Path                  # Absolute location of the file on disk
+    size: int
+    mtime_ns: int
+
+    @property
+    def rel_path(self) -> str:
+        return "/".join(self.rel_parts)
+
+    @property
+    def name(self) -> str:
+        return self.rel_parts[-1]
+
+    @property
+    def stem(self) -> str:
+        return Path(self.name).stem
+
+
+class RuleIndex:
+    """Sorted listing of rule files with lazily cached contents."""
+
+    def __init__(self, root: Optional[Path], files: List[RuleFile]) -> None:
+        self.root = root  # None for an overlay of several trees
+        self.files = sorted(files, key=lambda f: f.rel_parts)
+        self._lock = threading.Lock()
+        self._subtrees: Dict[str, RuleIndex] = {}
+        self._contents: Dict[Path, bytes] = {}
+        self._digests: Dict[Path, str] = {}
+        self._rendered: Dict[str, Any] = {}
+
+    @classmethod
+    def scan(cls, root: Path) -> "RuleIndex":
+        """Walk ``root`` once, recording every non-hidden file."""
+        files: List[RuleFile] = []
+        if root.is_dir():
+            cls._scan_dir(root, (), files)
+        return cls(root, files)
+
+    @classmethod
+    def compose(cls, roots: List[Path]) -> "RuleIndex":
+        """Overlay several trees; the first root providing a path wins."""
+        if len(roots) == 1:
+            return cls.scan(roots[0])
+        files: Dict[Tuple[str, ...], RuleFile] = {}
+        for root in roots:
+            for rule in cls.scan(root).files:
+                files.setdefault(rule.rel_parts, rule)
+        return cls(None, list(files.values()))
+
+    @classmethod
+    def _scan_dir(cls, directory: Path, prefix: Tuple[str, ...], out: List[RuleFile]) -> None:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir():
+                    cls._scan_dir(Path(entry.path), prefix + (entry.name,), out)
+                elif entry.is_file() and not entry.name.startswith("."):
+                    st = entry.stat()
+                    out.append(
+                        RuleFile(
+                            rel_parts=prefix + (entry.name,),
+                            path=Path(entry.path),
+                            size=st.st_size,
+                            mtime_ns=st.st_mtime_ns,
+                        )
+                    )
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __bool__(self) -> bool:
+        return bool(self.files)
+
+    def subdirectories(self) -> List[str]:
+        """Names of the non-hidden top-level directories that contain files."""
+        names = {f.rel_parts[0] for f in self.files if len(f.rel_parts) > 1}
+        return sorted(n for n in names if not n.startswith("."))
+
+    def subtree(self, name: str) -> "RuleIndex":
+        """Return the index of the top-level directory ``name``."""
+        with self._lock:
+            sub = self._subtrees.get(name)
+            if sub is None:
+                files = [
+                    RuleFile(f.rel_parts[1:], f.path, f.size, f.mtime_ns)
+                    for f in self.files
+                    if len(f.rel_parts) > 1 and f.rel_parts[0] == name
+                ]
+                sub = RuleIndex(self.root / name if self.root else None, files)
+                sub._contents = self._contents
+                sub._digests = self._digests
+                self._subtrees[name] = sub
+            return sub
+
+    def rendered(self, key: str, render: Callable[["RuleIndex"], Any]) -> Any:
+        """Return ``render(self)``, computing it only once per index and ``key``.
+
+        Outputs shared by several assistants (e.g. the concatenated document)
+        are rendered once per sync and then fanned out to every target.
+        """
+        with self._lock:
+            if key not in self._rendered:
+                self._rendered[key] = render(self)
+            return self._rendered[key]
+
+    def note_digest(self, rule: RuleFile, digest: str) -> None:
+        """Record the known sha256 of ``rule`` so its bytes can be shared."""
+        self._digests[rule.path] = digest
+        data = self._contents.get(rule.path)
+        if data is not None:
+            _store_put(digest, data)
+
+    def read_bytes(self, rule: RuleFile) -> bytes:
+        """Return the contents of ``rule``, reading it from disk at most once.
+
+        Files whose digest is known are served from the shared content store
+        when another index already loaded the same bytes.
+        """
+        data: Optional[bytes] = self._contents.get(rule.path)
+        if data is None:
+            digest = self._digests.get(rule.path)
+            if digest is not None:
+                data = _store_get(digest)
+            if data is None:
+                data = rule.path.read_bytes()
+                if digest is not None:
+                    _store_put(digest, data)
+            self._contents[rule.path] = data
+        return data
+
+    def read_text(self, rule: RuleFile) -> str:
+        """Decode ``rule`` as UTF-8 with universal newlines, like ``Path.read_text``."""
+        text = self.read_bytes(rule).decode("utf-8")
+        return text.replace("\r\n", "\n").replace("\r", "\n")
@@ -0,0 +1,303 @@
+"""Storage backends for per-project state in ``.rulebook-ai/``.
+
+A project keeps four pieces of state: the pack/profile selection, the
+manifest of memory/tool starter files, the per-assistant sync status and the
+sync fingerprint cache. :func:`open_store` returns one of two backends:
+
+* ``json``   - the original ``selection.json``, ``file_manifest.json``,
+  ``sync_status.json`` and ``sync_fingerprints.json`` files, each written
+  with :func:`file_ops.atomic_write_bytes`.
+* ``sqlite`` - a single ``state.db`` in WAL mode. Manifest and status updates
+  only touch the affected rows, and each update is one transaction. On first
+  use the existing JSON files are imported and, once the database is in
+  place, removed.
+
+The backend is taken from ``RULEBOOK_AI_STATE_BACKEND``; without it a project
+that already has a ``state.db`` uses SQLite and every other project keeps the
+JSON files.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from contextlib import closing
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Union
+
+from . import file_ops
+
+if TYPE_CHECKING:
+    import sqlite3
+
+STATE_BACKENDS = ("json", "sqlite")
+STATE_BACKEND_ENV = "RULEBOOK_AI_STATE_BACKEND"
+
+SELECTION_FILE = "selection.json"
+MANIFEST_FILE = "file_manifest.json"
+STATUS_FILE = "sync_status.json"
+FINGERPRINTS_FILE = "sync_fingerprints.json"
+STATE_DB_FILE = "state.db"
+
+
+def _empty_selection() -> Dict[str, Any]:
+    return {"packs": [], "profiles": {}}
+
+
+def _empty_fingerprints() -> Dict[str, Any]:
+    return {"files": {}}
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Write ``data`` as indented JSON to ``path`` via a temp file and rename."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    file_ops.atomic_write_bytes(path, json.dumps(data, indent=2).encode("utf-8"))
+
+
+def _read_json(path: Path, default: Any) -> Any:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return default
+
+
+class JsonStateStore:
+    """State kept in the original per-kind JSON files."""
+
+    backend = "json"
+
+    def __init__(self, state_dir: Path) -> None:
+        self.state_dir = state_dir
+
+    def exists(self) -> bool:
+        return (self.state_dir / SELECTION_FILE).is_file()
+
+    # Selection
+    def load_selection(self) -> Dict[str, Any]:
+        return _read_json(self.state_dir / SELECTION_FILE, _empty_selection())
+
+    def save_selection(self, data: Dict[str, Any]) -> None:
+        write_json_atomic(self.state_dir / SELECTION_FILE, data)
+
+    # Manifest
+    def has_manifest(self) -> bool:
+        return (self.state_dir / MANIFEST_FILE).is_file()
+
+    def load_manifest(self) -> Dict[str, Any]:
+        return _read_json(self.state_dir / MANIFEST_FILE, {})
+
+    def save_manifest(self, manifest: Dict[str, Any]) -> None:
+        write_json_atomic(self.state_dir / MANIFEST_FILE, manifest)
+
+    def update_manifest(
+        self, upserts: Optional[Dict[str, Any]] = None, removals: Iterable[str] = ()
+    ) -> None:
+        manifest = self.load_manifest()
+        manifest.update(upserts or {})
+        for rel in removals:
+            manifest.pop(rel, None)
+        self.save_manifest(manifest)
+
+    # Sync status
+    def load_status(self) -> Dict[str, dict]:
+        return _read_json(self.state_dir / STATUS_FILE, {})
+
+    def save_status(self, status: Dict[str, dict]) -> None:
+        write_json_atomic(self.state_dir / STATUS_FILE, status)
+
+    def update_status(self, entries: Dict[str, dict]) -> None:
+        status = self.load_status()
+        status.update(entries)
+        self.save_status(status)
+
+    # Fingerprint cache
+    def load_fingerprints(self) -> Dict[str, Any]:
+        try:
+            return _read_json(self.state_dir / FINGERPRINTS_FILE, _empty_fingerprints())
+        except ValueError:
+            return _empty_fingerprints()
+
+    def save_fingerprints(self, data: Dict[str, Any]) -> None:
+        write_json_atomic(self.state_dir / FINGERPRINTS_FILE, data)
+
+
+class SqliteStateStore:
+    """State kept in one SQLite database (WAL mode) with row-level updates."""
+
+    backend = "sqlite"
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS manifest (path TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS sync_status (assistant TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """
+
+    def __init__(self, state_dir: Path) -> None:
+        self.state_dir = state_dir
+        self.path = state_dir / STATE_DB_FILE
+
+    def exists(self) -> bool:
+        if not self.path.is_file():
+            # Not migrated yet: the JSON selection is imported on first use.
+            return (self.state_dir / SELECTION_FILE).is_file()
+        return self._get_document("selection") is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        import sqlite3
+
+        if not self.path.exists():
+            self._create()
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self._SCHEMA)
+        return conn
+
+    def _create(self) -> None:
+        """Build ``state.db`` from the JSON state files.
+
+        The schema and the imported rows are written in one transaction to a
+        temporary database that only replaces ``state.db`` once complete, so
+        a failed import leaves the JSON files as the project's state.
+        """
+        import sqlite3
+        import tempfile
+
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=self.state_dir, prefix=".state-", suffix=".db")
+        os.close(fd)
+        tmp = Path(name)
+        try:
+            with closing(sqlite3.connect(name)) as conn:
+                conn.execute("BEGIN")
+                for statement in self._SCHEMA.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                imported = self._migrate(conn)
+                conn.commit()
+            try:
+                os.link(tmp, self.path)
+            except FileExistsError:
+                # Another process created the database first.
+                return
+            except OSError:
+                # No hard links on this filesystem.
+                os.replace(tmp, self.path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        for path in imported:
+            path.unlink(missing_ok=True)
+
+    def _migrate(self, conn: sqlite3.Connection) -> List[Path]:
+        """Import the JSON state files into ``conn`` and return the files read."""
+        legacy = JsonStateStore(self.state_dir)
+        imported: List[Path] = []
+        for name, filename, load in (
+            ("selection", SELECTION_FILE, legacy.load_selection),
+            ("fingerprints", FINGERPRINTS_FILE, legacy.load_fingerprints),
+        ):
+            path = self.state_dir / filename
+            if path.is_file():
+                conn.execute(
+                    "INSERT OR REPLACE INTO documents VALUES (?, ?)", (name, json.dumps(load()))
+                )
+                imported.append(path)
+        for table, filename in (("manifest", MANIFEST_FILE), ("sync_status", STATUS_FILE)):
+            path = self.state_dir / filename
+            if path.is_file():
+                rows = _read_json(path, {})
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} VALUES (?, ?)",
+                    [(key, json.dumps(value)) for key, value in rows.items()],
+                )
+                imported.append(path)
+        return imported
+
+    def _get_document(self, name: str) -> Optional[Any]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM documents WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_document(self, name: str, value: Any) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?)", (name, json.dumps(value)))
+
+    def _load_table(self, table: str) -> Dict[str, Any]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT * FROM {table} ORDER BY rowid").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def _update_table(
+        self, table: str, upserts: Dict[str, Any], removals: Iterable[str] = (), replace: bool = False
+    ) -> None:
+        key = "path" if table == "manifest" else "assistant"
+        with closing(self._connect()) as conn, conn:
+            if replace:
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {table} VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in upserts.items()],
+            )
+            conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", [(k,) for k in removals])
+
+    # Selection
+    def load_selection(self) -> Dict[str, Any]:
+        return self._get_document("selection") or _empty_selection()
+
+    def save_selection(self, data: Dict[str, Any]) -> None:
+        self._set_document("selection", data)
+
+    # Manifest
+    def has_manifest(self) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM manifest LIMIT 1").fetchone() is not None
+
+    def load_manifest(self) -> Dict[str, Any]:
+        return self._load_table("manifest")
+
+    def save_manifest(self, manifest: Dict[str, Any]) -> None:
+        self._update_table("manifest", manifest, replace=True)
+
+    def update_manifest(
+        self, upserts: Optional[Dict[str, Any]] = None, removals: Iterable[str] = ()
+    ) -> None:
+        self._update_table("manifest", upserts or {}, removals)
+
+    # Sync status
+    def load_status(self) -> Dict[str, dict]:
+        return self._load_table("sync_status")
+
+    def save_status(self, status: Dict[str, dict]) -> None:
+        self._update_table("sync_status", status, replace=True)
+
+    def update_status(self, entries: Dict[str, dict]) -> None:
+        self._update_table("sync_status", entries)
+
+    # Fingerprint cache
+    def load_fingerprints(self) -> Dict[str, Any]:
+        return self._get_document("fingerprints") or _empty_fingerprints()
+
+    def save_fingerprints(self, data: Dict[str, Any]) -> None:
+        self._set_document("fingerprints", data)
+
+
+StateStore = Union[JsonStateStore, SqliteStateStore]
+
+
+def resolve_backend(state_dir: Path, backend: Optional[str] = None) -> str:
+    """Return ``backend``, the configured backend, or the one already in use."""
+    resolved = backend or os.environ.get(STATE_BACKEND_ENV)
+    if not resolved:
+        resolved = "sqlite" if (state_dir / STATE_DB_FILE).is_file() else "json"
+    if resolved not in STATE_BACKENDS:
+        raise ValueError(
+            f"Invalid state backend '{resolved}'. Choose one of: {', '.join(STATE_BACKENDS)}"
+        )
+    return resolved
+
+
+def open_store(state_dir: Path, backend: Optional[str] = None) -> StateStore:
+    """Return the state store for the ``.rulebook-ai`` directory ``state_dir``."""
+    if resolve_backend(state_dir, backend) == "sqlite":
+        return SqliteStateStore(state_dir)
+    return JsonStateStore(state_dir)
@@ -0,0 +1,131 @@
+"""Typed file operations produced by the sync planner and their executor.
+
+``RuleManager`` plans a sync as a list of :class:`FileOp` without touching
+the filesystem; ``project sync --plan`` prints the summary of that list and
+a normal sync hands it to :func:`execute_ops`. The executor applies the
+operations in batches: deletions first, then each missing directory is
+created once, then files are copied/written (optionally in a thread pool),
+and finally emptied directories are removed deepest-first.
+"""
+
+from __future__ import annotations
+
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import file_ops
+
+OP_KINDS = ("mkdir", "copy", "write", "delete", "rmdir")
+
+
+@dataclass(frozen=True)
+class FileOp:
+    kind: str                           # One of OP_KINDS
+    path: Path
+    source: Optional[Path] = None       # "copy": file to copy from
+    data: Optional[bytes] = None        # "write": bytes to write
+    size: int = 0                       # Bytes written by this operation
+    assistant: Optional[str] = None     # Assistant whose output this is
+    pack: Optional[str] = None          # Pack that provides a starter file
+    link_mode: str = "reflink"          # "copy": backend passed to file_ops
+
+
+@dataclass
+class SyncPlan:
+    """Everything a sync will do, computed without modifying the project."""
+
+    project_root: Path
+    pack_list: List[str]
+    mode: Dict[str, Any]
+    names_to_sync: List[str]
+    ops: List[FileOp] = field(default_factory=list)
+    messages: Dict[str, List[str]] = field(default_factory=dict)
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+    digest_cache: Dict[str, Any] = field(default_factory=dict)
+    digest_cache_changed: bool = False
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(op.size for op in self.ops)
+
+    @property
+    def affected_assistants(self) -> List[str]:
+        touched = {op.assistant for op in self.ops if op.assistant}
+        return [name for name in self.names_to_sync if name in touched]
+
+    def counts(self) -> Dict[str, int]:
+        counts = {kind: 0 for kind in OP_KINDS}
+        for op in self.ops:
+            counts[op.kind] += 1
+        return counts
+
+    def summary(self) -> List[str]:
+        lines = [f"Sync plan for {self.project_root}:"]
+        for kind, count in self.counts().items():
+            lines.append(f"  {kind:<7} {count}")
+        lines.append(f"  Total bytes to write: {self.total_bytes}")
+        affected = self.affected_assistants
+        lines.append(f"  Affected assistants: {', '.join(affected) if affected else 'none'}")
+        starters = sum(1 for op in self.ops if op.pack)
+        if starters:
+            lines.append(f"  New memory/tool starter files: {starters}")
+        return lines
+
+
+def _apply(op: FileOp) -> None:
+    if op.kind == "copy":
+        file_ops.copy_file(op.source, op.path, op.link_mode)
+    elif op.kind == "write":
+        file_ops.atomic_write_bytes(op.path, op.data or b"")
+
+
+def _delete(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    elif path.exists() or path.is_symlink():
+        path.unlink()
+
+
+def execute_ops(ops: List[FileOp], jobs: int = 1) -> List[FileOp]:
+    """Apply ``ops`` in batches and return the operations that failed."""
+    failed: List[FileOp] = []
+    by_kind: Dict[str, List[FileOp]] = {kind: [] for kind in OP_KINDS}
+    for op in ops:
+        by_kind[op.kind].append(op)
+
+    for op in by_kind["delete"]:
+        try:
+            _delete(op.path)
+        except OSError as e:
+            print(f"Error deleting {op.path}: {e}")
+            failed.append(op)
+
+    for op in sorted(by_kind["mkdir"], key=lambda o: len(o.path.parts)):
+        op.path.mkdir(parents=True, exist_ok=True)
+
+    def run(op: FileOp) -> Optional[FileOp]:
+        try:
+            _apply(op)
+            return None
+        except Exception as e:  # pragma: no cover - defensive programming
+            print(f"Error writing {op.path}: {e}")
+            return op
+
+    writes = by_kind["copy"] + by_kind["write"]
+    if jobs > 1 and len(writes) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(run, writes))
+    else:
+        results = [run(op) for op in writes]
+    failed.extend(op for op in results if op is not None)
+
+    for op in sorted(by_kind["rmdir"], key=lambda o: len(o.path.parts), reverse=True):
+        try:
+            op.path.rmdir()
+        except OSError:
+            pass
+    return failed
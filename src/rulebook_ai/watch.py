@@ -0,0 +1,142 @@
+"""``project sync --watch``: re-sync when pack sources change.
+
+The watcher polls ``stat`` snapshots of the installed pack directories and
+the source directories of ``local:`` packs, and compares the pack selection
+from the state store. Polling only stats pack files (no reads), so an idle
+watcher costs a directory walk per interval. Bursts of edits are debounced
+into a single sync, and because sync is fingerprinted and writes only
+differing outputs, only the assistants and files affected by the change are
+regenerated.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .core import TARGET_INTERNAL_STATE_DIR, RuleManager
+
+Snapshot = Dict[Path, Tuple[int, int]]
+
+
+def _snapshot(roots: List[Path]) -> Snapshot:
+    snap: Snapshot = {}
+    for root in roots:
+        if root.is_file():
+            st = root.stat()
+            snap[root] = (st.st_mtime_ns, st.st_size)
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                snap[path] = (st.st_mtime_ns, st.st_size)
+    return snap
+
+
+def _changed(before: Snapshot, after: Snapshot) -> Set[Path]:
+    return {p for p in before.keys() | after.keys() if before.get(p) != after.get(p)}
+
+
+class ProjectWatcher:
+    """Watch a project's pack sources and re-run ``project_sync`` on change."""
+
+    def __init__(
+        self,
+        manager: RuleManager,
+        project_root: Path,
+        sync_kwargs: Dict[str, Any],
+        interval: float = 1.0,
+        debounce: float = 0.5,
+    ) -> None:
+        self.manager = manager
+        self.project_root = project_root
+        self.sync_kwargs = sync_kwargs
+        self.interval = interval
+        self.debounce = debounce
+        self.state_dir = project_root / TARGET_INTERNAL_STATE_DIR
+
+    def _watched(self) -> Tuple[List[Path], Dict[str, Path]]:
+        """Return the paths to poll and the source directories of local packs."""
+        selection = self.manager._load_selection(self.project_root)
+        pack_list, _ = self.manager._resolve_pack_list(
+            selection, self.sync_kwargs.get("profile"), self.sync_kwargs.get("packs")
+        )
+        local_sources = {
+            p["name"]: Path(p["path"])
+            for p in selection.packs
+            if p["name"] in pack_list and p.get("source") == "local" and p.get("path")
+        }
+        roots = [self.state_dir / "packs" / name for name in pack_list]
+        roots.extend(local_sources.values())
+        return [r for r in roots if r.exists()], local_sources
+
+    def _sync(self, changed: Set[Path], local_sources: Dict[str, Path]) -> None:
+        for name, source in local_sources.items():
+            if any(source == p or source in p.parents for p in changed):
+                print(f"Local pack '{name}' changed; refreshing from {source}")
+                self.manager.refresh_local_pack(name, str(self.project_root))
+        self.manager.project_sync(project_dir=str(self.project_root), **self.sync_kwargs)
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> int:
+        stop_event = stop_event or threading.Event()
+        rc = self.manager.project_sync(project_dir=str(self.project_root), **self.sync_kwargs)
+        if rc != 0:
+            return rc
+
+        roots, local_sources = self._watched()
+        snapshot = _snapshot(roots)
+        selection = self.manager._load_selection(self.project_root)
+        print(f"Watching {len(snapshot)} files for changes (Ctrl+C to stop)...")
+        while not stop_event.wait(self.interval):
+            current = _snapshot(roots)
+            changed = _changed(snapshot, current)
+            selection_changed = self.manager._load_selection(self.project_root) != selection
+            if not changed and not selection_changed:
+                continue
+
+            # Debounce: wait until the tree has been quiet for ``debounce`` seconds.
+            while not stop_event.wait(self.debounce):
+                settled = _snapshot(roots)
+                more = _changed(current, settled)
+                current = settled
+                if not more:
+                    break
+                changed |= more
+            if stop_event.is_set():
+                break
+
+            if selection_changed:
+                print("Pack selection changed; syncing...")
+            else:
+                print(f"Detected {len(changed)} changed file(s); syncing...")
+            self._sync(changed, local_sources)
+            if selection_changed:
+                roots, local_sources = self._watched()
+                selection = self.manager._load_selection(self.project_root)
+            snapshot = _snapshot(roots)
+        return 0
+
+
+def watch_project(
+    manager: RuleManager,
+    project_dir: Optional[str],
+    interval: float = 1.0,
+    debounce: float = 0.5,
+    stop_event: Optional[threading.Event] = None,
+    **sync_kwargs: Any,
+) -> int:
+    """Sync once, then keep re-syncing whenever pack sources change."""
+    project_root = Path(project_dir).absolute() if project_dir else manager.project_root
+    watcher = ProjectWatcher(manager, project_root, sync_kwargs, interval, debounce)
+    try:
+        return watcher.run(stop_event)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+        return 0
@@ -0,0 +1,11 @@
+"""Shared test configuration."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_user_cache(tmp_path_factory, monkeypatch):
+    """Keep the user-level cache out of the real home directory, and never
+    refresh the community index in the background."""
+    monkeypatch.setenv("RULEBOOK_AI_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
+    monkeypatch.setenv("RULEBOOK_AI_INDEX_AUTO_REFRESH", "0")
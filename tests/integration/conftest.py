@@ -13,7 +13,9 @@ def run_cli():
         base_env["PYTHONPATH"] = str(repo_root / "src")
         if env:
             base_env.update(env)
-        cmd = ["python", "-m", "rulebook_ai", *args, "--project-dir", str(project_dir)]
+        cmd = ["python", "-m", "rulebook_ai", *args]
+        if project_dir is not None:
+            cmd += ["--project-dir", str(project_dir)]
         return subprocess.run(
             cmd, input=input_text, capture_output=True, text=True, env=base_env
         )
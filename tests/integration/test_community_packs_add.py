@@ -147,4 +147,53 @@ def test_add_pack_by_local_path(tmp_path, run_cli):
     )
     entry = selection["packs"][0]
     assert entry["name"] == "my-local-pack"
-    assert entry["version"] == "1.0.0"
\ No newline at end of file
+    assert entry["version"] == "1.0.0"
+
+def test_add_several_community_packs_prompts_once(tmp_path, run_cli):
+    base = tmp_path / "repos"
+    _create_repo(base, "user/first-pack", manifest_name="first-pack")
+    _create_repo(base, "other/second-pack", manifest_name="second-pack")
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+    result = run_cli(
+        ["packs", "add", "github:user/first-pack", "light-spec", "github:other/second-pack"],
+        project_dir,
+        input_text="yes\n",
+        env={"RULEBOOK_AI_GIT_BASE": str(base)},
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.count("Proceed?") == 1
+    assert "user/first-pack" in result.stdout and "other/second-pack" in result.stdout
+    selection = json.loads(
+        (project_dir / ".rulebook-ai" / "selection.json").read_text()
+    )
+    assert [p["name"] for p in selection["packs"]] == ["first-pack", "light-spec", "second-pack"]
+
+
+def test_outdated_and_upgrade_follow_upstream(tmp_path, run_cli):
+    base = tmp_path / "repos"
+    repo_dir, old_commit = _create_repo(base, "user/moving-pack", manifest_name="moving-pack")
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+    env = {"RULEBOOK_AI_GIT_BASE": str(base)}
+    run_cli(["packs", "add", "github:user/moving-pack"], project_dir, input_text="yes\n", env=env)
+
+    result = run_cli(["packs", "outdated"], project_dir, env=env)
+    assert result.returncode == 0, result.stderr
+    assert "All community packs are up to date." in result.stdout
+
+    (repo_dir / "rules" / "01-rules" / "01-rule.md").write_text("rule v2")
+    subprocess.run(["git", "commit", "-qam", "v2"], cwd=repo_dir, capture_output=True)
+    new_commit = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=repo_dir, capture_output=True, text=True
+    ).stdout.strip()
+
+    result = run_cli(["packs", "outdated"], project_dir, env=env)
+    assert f"moving-pack (user/moving-pack): {old_commit[:7]} -> {new_commit[:7]}" in result.stdout
+
+    result = run_cli(["packs", "upgrade"], project_dir, input_text="yes\n", env=env)
+    assert result.returncode == 0, result.stderr
+    dest = project_dir / ".rulebook-ai" / "packs" / "moving-pack"
+    assert (dest / "rules" / "01-rules" / "01-rule.md").read_text() == "rule v2"
+    selection = json.loads((project_dir / ".rulebook-ai" / "selection.json").read_text())
+    assert selection["packs"][0]["commit"] == new_commit
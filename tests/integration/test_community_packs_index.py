@@ -1,16 +1,12 @@
 import json
+import os
+import shutil
 import subprocess
 from pathlib import Path
 
 
-CACHE_PATH = (
-    Path(__file__).resolve().parents[2]
-    / "src"
-    / "rulebook_ai"
-    / "community"
-    / "index_cache"
-    / "packs.json"
-)
+def _cache_path() -> Path:
+    return Path(os.environ["RULEBOOK_AI_CACHE_DIR"]) / "index" / "packs.json"
 
 
 def _create_repo(base: Path, slug: str) -> tuple[Path, str]:
@@ -43,8 +39,8 @@ def _create_repo(base: Path, slug: str) -> tuple[Path, str]:
 
 
 def _write_cache(data: dict) -> None:
-    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    CACHE_PATH.write_text(json.dumps(data, indent=2))
+    _cache_path().parent.mkdir(parents=True, exist_ok=True)
+    _cache_path().write_text(json.dumps(data, indent=2))
 
 
 def test_packs_update_refreshes_cache(tmp_path, run_cli):
@@ -67,7 +63,7 @@ def test_packs_update_refreshes_cache(tmp_path, run_cli):
         env={"RULEBOOK_AI_INDEX_URL": index_file.as_uri()},
     )
     assert result.returncode == 0, result.stderr
-    cached = json.loads(CACHE_PATH.read_text())
+    cached = json.loads(_cache_path().read_text())
     assert cached == data
 
 
@@ -82,7 +78,7 @@ def test_packs_update_invalid_json_retains_old_cache(tmp_path, run_cli):
         env={"RULEBOOK_AI_INDEX_URL": bad_index.as_uri()},
     )
     assert result.returncode != 0
-    cached = json.loads(CACHE_PATH.read_text())
+    cached = json.loads(_cache_path().read_text())
     assert cached == old
 
 
@@ -219,3 +215,50 @@ def test_installed_pack_records_slug_metadata(tmp_path, run_cli):
     entry = selection["packs"][0]
     assert entry["slug"] == slug
     assert entry["commit"] == commit
+
+
+def test_pinned_pack_second_install_uses_user_cache(tmp_path, run_cli):
+
+    base = tmp_path / "repos"
+    slug = "user/good-pack"
+    repo_dir, commit = _create_repo(base, slug)
+    index_file = tmp_path / "packs.json"
+    index_file.write_text(
+        json.dumps(
+            {
+                "packs": [
+                    {
+                        "name": "good-pack",
+                        "username": "user",
+                        "repo": "good-pack",
+                        "description": "desc",
+                        "commit": commit,
+                    }
+                ]
+            }
+        )
+    )
+    cache_dir = tmp_path / "cache"
+    env = {
+        "RULEBOOK_AI_GIT_BASE": str(base),
+        "RULEBOOK_AI_INDEX_URL": index_file.as_uri(),
+        "RULEBOOK_AI_CACHE_DIR": str(cache_dir),
+    }
+    run_cli(["packs", "update"], tmp_path, env=env)
+    first = tmp_path / "first"
+    first.mkdir()
+    result = run_cli(["packs", "add", "good-pack"], first, input_text="yes\n", env=env)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    # With the repository gone, the second install must come from the cache.
+    shutil.rmtree(repo_dir)
+    second = tmp_path / "second"
+    second.mkdir()
+    result = run_cli(["packs", "add", "good-pack"], second, input_text="yes\n", env=env)
+    assert result.returncode == 0, result.stdout + result.stderr
+    dest = second / ".rulebook-ai" / "packs" / "good-pack"
+    assert (dest / "rules" / "01-rules" / "01-rule.md").read_text() == "rule"
+    assert json.loads((dest / "pack.json").read_text())["commit"] == commit
+
+    stats = run_cli(["cache", "stats"], None, env=env)
+    assert "Pack trees: 1" in stats.stdout
@@ -1,18 +1,13 @@
 import json
+import os
 from pathlib import Path
 
-CACHE_PATH = (
-    Path(__file__).resolve().parents[2]
-    / "src"
-    / "rulebook_ai"
-    / "community"
-    / "index_cache"
-    / "packs.json"
-)
+def _cache_path() -> Path:
+    return Path(os.environ["RULEBOOK_AI_CACHE_DIR"]) / "index" / "packs.json"
 
 def _write_cache(data: dict) -> None:
-    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    CACHE_PATH.write_text(json.dumps(data, indent=2))
+    _cache_path().parent.mkdir(parents=True, exist_ok=True)
+    _cache_path().write_text(json.dumps(data, indent=2))
 
 
 def test_packs_list_shows_builtin_and_community(tmp_path, run_cli):
@@ -44,3 +39,18 @@ def test_packs_list_does_not_hit_network(tmp_path, run_cli):
     env = {"RULEBOOK_AI_INDEX_URL": "http://example.invalid"}
     result = run_cli(["packs", "list"], project_dir, env=env)
     assert result.returncode == 0, result.stderr
+
+
+def test_packs_search_ranks_matches(tmp_path, run_cli):
+    _write_cache(
+        {
+            "packs": [
+                {"name": "react-pack", "username": "alice", "repo": "r", "description": "React rules"},
+                {"name": "go-pack", "username": "bob", "repo": "g", "description": "Go rules"},
+            ]
+        }
+    )
+    result = run_cli(["packs", "search", "reakt"], None)
+    assert result.returncode == 0, result.stderr
+    assert "react-pack" in result.stdout
+    assert "go-pack" not in result.stdout
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import tarfile
+import zipfile
+from pathlib import Path
+
+
+def _make_pack(root: Path, name: str = "archived-pack") -> Path:
+    (root / "rules" / "01-rules").mkdir(parents=True)
+    (root / "rules" / "01-rules" / "01-rule.md").write_text("rule")
+    (root / "manifest.yaml").write_text(f"name: {name}\nversion: 1.2.0\nsummary: archived\n")
+    (root / "README.md").write_text("readme")
+    return root
+
+
+def _tarball(tmp_path: Path) -> Path:
+    pack = _make_pack(tmp_path / "src" / "archived-pack-1.2.0")
+    archive = tmp_path / "archived-pack-1.2.0.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(pack, arcname=pack.name)
+    return archive
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_add_pack_from_tarball(tmp_path, run_cli):
+    archive = _tarball(tmp_path)
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+    result = run_cli(["packs", "add", f"archive:{archive}"], project_dir)
+    assert result.returncode == 0, result.stderr + result.stdout
+    dest = project_dir / ".rulebook-ai" / "packs" / "archived-pack"
+    assert (dest / "rules" / "01-rules" / "01-rule.md").read_text() == "rule"
+    meta = json.loads((dest / "pack.json").read_text())
+    assert meta["sha256"] == _sha256(archive)
+    selection = json.loads((project_dir / ".rulebook-ai" / "selection.json").read_text())
+    assert selection["packs"][0]["source"] == "archive"
+    assert selection["packs"][0]["version"] == "1.2.0"
+
+
+def test_pinned_archive_checksum_is_verified_and_cached(tmp_path, run_cli):
+    archive = _tarball(tmp_path)
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+    result = run_cli(["packs", "add", f"archive:{archive}#sha256={'0' * 64}"], project_dir)
+    assert result.returncode != 0
+    assert "Checksum mismatch" in result.stdout
+    assert not (project_dir / ".rulebook-ai" / "packs" / "archived-pack").exists()
+
+    spec = f"archive:{archive}#sha256={_sha256(archive)}"
+    assert run_cli(["packs", "add", spec], project_dir).returncode == 0
+
+    # The pinned archive is now served from the user cache.
+    archive.unlink()
+    other = tmp_path / "other"
+    other.mkdir()
+    result = run_cli(["packs", "add", spec], other)
+    assert result.returncode == 0, result.stdout
+    assert (other / ".rulebook-ai" / "packs" / "archived-pack" / "README.md").is_file()
+
+
+def test_hardlinked_install_does_not_share_files_with_the_cache(tmp_path, run_cli):
+    archive = _tarball(tmp_path)
+    spec = f"archive:{archive}#sha256={_sha256(archive)}"
+    first = tmp_path / "p1"
+    first.mkdir()
+    result = run_cli(["packs", "add", spec, "--link-mode", "hardlink"], first)
+    assert result.returncode == 0, result.stdout
+    rule = first / ".rulebook-ai" / "packs" / "archived-pack" / "rules" / "01-rules" / "01-rule.md"
+    rule.write_text("edited in p1")
+
+    second = tmp_path / "p2"
+    second.mkdir()
+    assert run_cli(["packs", "add", spec, "--link-mode", "hardlink"], second).returncode == 0
+    installed = second / ".rulebook-ai" / "packs" / "archived-pack" / "rules" / "01-rules"
+    assert (installed / "01-rule.md").read_text() == "rule"
+
+
+def test_add_pack_from_zip_and_reject_unsafe_paths(tmp_path, run_cli):
+    pack = _make_pack(tmp_path / "src")
+    archive = tmp_path / "pack.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for path in pack.rglob("*"):
+            if path.is_file():
+                zf.write(path, path.relative_to(pack).as_posix())
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+    result = run_cli(["packs", "add", f"archive:{archive}"], project_dir)
+    assert result.returncode == 0, result.stdout
+    assert (project_dir / ".rulebook-ai" / "packs" / "archived-pack" / "manifest.yaml").is_file()
+
+    evil = tmp_path / "evil.zip"
+    with zipfile.ZipFile(evil, "w") as zf:
+        zf.writestr("../escape.md", "x")
+    other = tmp_path / "other"
+    other.mkdir()
+    result = run_cli(["packs", "add", f"archive:{evil}"], other)
+    assert result.returncode != 0
+    assert "Unsafe path" in result.stdout
+    assert not (tmp_path / "escape.md").exists()
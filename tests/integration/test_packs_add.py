@@ -56,4 +56,35 @@ def test_add_pack_with_source_conflict_fails(tmp_path, run_cli):
     assert selection["packs"][0].get("version") != "9.9.9"  # Make sure it's not the new one
     assert not (
         project_dir / ".rulebook-ai" / "packs" / "light-spec" / "pack.json"
-    ).exists()
\ No newline at end of file
+    ).exists()
+
+def test_add_local_pack_with_hardlink_mode(tmp_path, run_cli):
+    local_pack_dir = tmp_path / "linked-pack"
+    rules_dir = local_pack_dir / "rules" / "01-rules"
+    rules_dir.mkdir(parents=True)
+    (rules_dir / "01-rule.md").write_text("linked rule")
+    (local_pack_dir / "manifest.yaml").write_text(
+        "name: linked-pack\nversion: 1.0.0\nsummary: A hardlinked pack\n"
+    )
+    (local_pack_dir / "README.md").write_text("readme")
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+
+    result = run_cli(
+        ["packs", "add", f"local:{local_pack_dir}", "--link-mode", "hardlink"], project_dir
+    )
+    assert result.returncode == 0, result.stderr
+
+    installed = project_dir / ".rulebook-ai" / "packs" / "linked-pack" / "rules" / "01-rules" / "01-rule.md"
+    assert installed.read_text() == "linked rule"
+    assert installed.stat().st_ino == (rules_dir / "01-rule.md").stat().st_ino
+
+
+def test_add_unknown_pack_reports_once(tmp_path, run_cli):
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+
+    result = run_cli(["packs", "add", "no-such-pack"], project_dir)
+    assert result.returncode == 1
+    assert result.stdout.count("Available packs:") == 1
+    assert result.stdout.count("not found as a built-in pack") == 1
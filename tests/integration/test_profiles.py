@@ -55,3 +55,21 @@ def test_profiles_delete(tmp_path, run_cli):
     selection = json.loads((project_dir / ".rulebook-ai" / "selection.json").read_text())
     assert selection["profiles"] == {}
 
+
+
+def test_profiles_accept_multiple_names(tmp_path, run_cli):
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+
+    assert run_cli(["packs", "add", "light-spec", "medium-spec"], project_dir).returncode == 0
+    assert run_cli(["profiles", "create", "dev", "review"], project_dir).returncode == 0
+    result = run_cli(["profiles", "add", "light-spec", "medium-spec", "--to", "dev"], project_dir)
+    assert result.returncode == 0, result.stderr
+
+    selection = json.loads((project_dir / ".rulebook-ai" / "selection.json").read_text())
+    assert selection["profiles"] == {"dev": ["light-spec", "medium-spec"], "review": []}
+
+    result = run_cli(["profiles", "add", "light-spec", "missing", "--to", "review"], project_dir)
+    assert result.returncode == 1
+    selection = json.loads((project_dir / ".rulebook-ai" / "selection.json").read_text())
+    assert selection["profiles"]["review"] == ["light-spec"]
@@ -19,7 +19,7 @@ def test_project_sync_with_pack_flag(tmp_path, run_cli):
     manifest = json.loads(
         (project_dir / ".rulebook-ai" / "file_manifest.json").read_text()
     )
-    assert manifest["memory/docs/architecture_template.md"] == "light-spec"
+    assert manifest["memory/docs/architecture_template.md"]["pack"] == "light-spec"
 
     status = json.loads(
         (project_dir / ".rulebook-ai" / "sync_status.json").read_text()
@@ -42,7 +42,7 @@ def test_project_sync_all_packs(tmp_path, run_cli):
     manifest = json.loads(
         (project_dir / ".rulebook-ai" / "file_manifest.json").read_text()
     )
-    assert manifest["memory/docs/architecture_template.md"] == "light-spec"
+    assert manifest["memory/docs/architecture_template.md"]["pack"] == "light-spec"
     status = json.loads((project_dir / ".rulebook-ai" / "sync_status.json").read_text())
     assert status["cursor"]["pack_count"] == 2
     assert set(status["cursor"]["packs"]) == {"light-spec", "heavy-spec"}
@@ -65,7 +65,7 @@ def test_project_sync_with_profile(tmp_path, run_cli):
     manifest = json.loads(
         (project_dir / ".rulebook-ai" / "file_manifest.json").read_text()
     )
-    assert manifest["memory/docs/architecture_template.md"] == "light-spec"
+    assert manifest["memory/docs/architecture_template.md"]["pack"] == "light-spec"
     status = json.loads((project_dir / ".rulebook-ai" / "sync_status.json").read_text())
     assert status["cursor"]["mode"] == "profile"
     assert status["cursor"]["pack_count"] == 1
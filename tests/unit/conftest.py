@@ -5,6 +5,9 @@ import os
 import tempfile
 import shutil
 from pathlib import Path
+from typing import List, Optional
+
+from rulebook_ai.core import RuleManager
 
 # Path to project root for accessing test data
 PROJECT_ROOT = Path(__file__).parent.parent.parent
@@ -63,3 +66,24 @@ def mock_rule_manager_env(temp_dir):
         f.write("API_KEY=your-api-key-here")
     
     return project_root
+
+
+@pytest.fixture
+def light_spec_project(tmp_path):
+    """Return a factory for projects under ``tmp_path`` with ``light-spec`` added.
+
+    ``light_spec_project(name="proj", assistants=None)`` creates the project
+    directory, adds the pack and, if ``assistants`` is given, syncs them.
+    It returns the ``RuleManager`` and the project directory.
+    """
+
+    def make(name: str = "proj", assistants: Optional[List[str]] = None):
+        project_dir = tmp_path / name
+        project_dir.mkdir(parents=True)
+        manager = RuleManager(project_root=str(project_dir))
+        manager.add_pack("light-spec", project_dir=str(project_dir))
+        if assistants is not None:
+            manager.project_sync(assistants=assistants, project_dir=str(project_dir))
+        return manager, project_dir
+
+    return make
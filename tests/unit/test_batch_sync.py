@@ -0,0 +1,103 @@
+"""Tests for batched multi-project sync."""
+
+from collections import OrderedDict
+from pathlib import Path
+
+from rulebook_ai import batch_sync, cli, rule_index
+
+
+def _count_rule_reads(monkeypatch):
+    reads = []
+    original = Path.read_bytes
+
+    def counting_read_bytes(self):
+        if ".rulebook-ai" in self.parts and "rules" in self.parts:
+            reads.append(self)
+        return original(self)
+
+    monkeypatch.setattr(Path, "read_bytes", counting_read_bytes)
+    return reads
+
+
+def test_resolve_projects_from_file_and_glob(light_spec_project, tmp_path, monkeypatch):
+    projects = [light_spec_project(f"services/svc-{i}")[1] for i in range(2)]
+    listing = tmp_path / "projects.txt"
+    listing.write_text(f"# services\n{projects[0]}\n\n{projects[1] / '.rulebook-ai'}\n")
+
+    assert batch_sync.resolve_projects(str(listing)) == projects
+
+    monkeypatch.chdir(tmp_path)
+    assert batch_sync.resolve_projects("services/*") == projects
+
+
+def test_sync_projects_reports_each_project(light_spec_project, tmp_path):
+    projects = [light_spec_project(f"services/svc-{i}")[1] for i in range(3)]
+    not_a_project = tmp_path / "services" / "plain"
+    not_a_project.mkdir()
+
+    results = batch_sync.sync_projects(
+        projects + [not_a_project], workers=2, assistants=["cursor", "claude-code"]
+    )
+
+    assert [r.project for r in results] == [str(p) for p in projects + [not_a_project]]
+    assert [r.status for r in results] == ["ok", "ok", "ok", "skipped"]
+    for project in projects:
+        assert (project / "CLAUDE.md").is_file()
+        assert any((project / ".cursor" / "rules").iterdir())
+    assert all(r.seconds >= 0 for r in results)
+    assert "Sync complete." in results[0].output
+
+
+def test_sync_projects_migrates_json_state_to_sqlite(light_spec_project, monkeypatch):
+    _, project_dir = light_spec_project(assistants=["cursor"])
+    monkeypatch.setenv("RULEBOOK_AI_STATE_BACKEND", "sqlite")
+
+    results = batch_sync.sync_projects([project_dir], workers=1, assistants=["cursor"])
+
+    assert [r.status for r in results] == ["ok"]
+    assert (project_dir / ".rulebook-ai" / "state.db").is_file()
+    assert not (project_dir / ".rulebook-ai" / "selection.json").exists()
+
+
+def test_sync_projects_serial_shares_content_store(light_spec_project, monkeypatch):
+    projects = [light_spec_project(f"services/svc-{i}")[1] for i in range(2)]
+    batch_sync.sync_projects(projects, workers=1, assistants=["warp"])
+
+    reads = _count_rule_reads(monkeypatch)
+    (projects[0] / "WARP.md").unlink()
+    (projects[1] / "WARP.md").unlink()
+    batch_sync.sync_projects(projects, workers=1, assistants=["warp"])
+
+    assert (projects[1] / "WARP.md").is_file()
+    assert not reads
+
+
+def test_first_sync_uses_preloaded_builtin_rules(light_spec_project, monkeypatch):
+    monkeypatch.setattr(rule_index, "_CONTENT_STORE", OrderedDict())
+    monkeypatch.setattr(rule_index, "_CONTENT_STORE_BYTES", 0)
+    monkeypatch.setattr(rule_index, "_KNOWN_DIGESTS", {})
+    _, project_dir = light_spec_project()
+
+    reads = _count_rule_reads(monkeypatch)
+    results = batch_sync.sync_projects([project_dir], workers=1, assistants=["warp"])
+
+    assert [r.status for r in results] == ["ok"]
+    assert (project_dir / "WARP.md").is_file()
+    assert not reads
+
+
+def test_plan_with_projects_from_writes_nothing(light_spec_project, tmp_path, capsys):
+    projects = [light_spec_project(f"services/svc-{i}")[1] for i in range(2)]
+    capsys.readouterr()
+
+    pattern = str(tmp_path / "services" / "*")
+    rc = cli.main(
+        ["project", "sync", "--projects-from", pattern, "--plan", "--workers", "1", "-a", "cursor"]
+    )
+
+    out = capsys.readouterr().out
+    assert rc == 0
+    for project in projects:
+        assert f"Sync plan for {project}:" in out
+        assert not (project / ".cursor").exists()
+    assert "Planned 2 project(s)" in out
@@ -0,0 +1,44 @@
+"""Guard the CLI's startup cost: common commands must not load heavy modules."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+
+def _run(*args, cwd):
+    env = {**os.environ, "PYTHONPATH": str(SRC), "RULEBOOK_AI_IMPORT_PROFILE": "1"}
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, env=env, cwd=cwd
+    )
+
+
+def test_parsing_arguments_does_not_import_core(tmp_path):
+    code = (
+        "import sys; from rulebook_ai import cli; cli.create_parser(); "
+        "print(sorted(m for m in sys.modules if m.startswith('rulebook_ai.')))"
+    )
+    result = _run("-c", code, cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert "rulebook_ai.core" not in result.stdout
+    assert "rulebook_ai.community_packs" not in result.stdout
+
+
+@pytest.mark.parametrize(
+    "command", [["project", "status"], ["packs", "status"], ["profiles", "list"]]
+)
+def test_common_commands_load_no_heavy_modules(tmp_path, command):
+    result = _run("-m", "rulebook_ai", *command, "--project-dir", str(tmp_path), cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert "heavy: none" in result.stderr.splitlines()[-1], result.stderr
+
+
+def test_adding_builtin_pack_skips_community_machinery(tmp_path):
+    result = _run("-m", "rulebook_ai", "packs", "add", "light-spec", "-p", str(tmp_path), cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+    # The manifest is read for the pack version; nothing needs git or the network.
+    assert result.stderr.splitlines()[-1].endswith("heavy: yaml"), result.stderr
@@ -1,8 +1,12 @@
+import os
+import shutil
 import yaml
 from pathlib import Path
 import pytest
 
+from rulebook_ai import pack_validation
 from rulebook_ai.community_packs import validate_pack_structure
+from rulebook_ai.pack_validation import validate_pack
 
 
 def _write_manifest(root: Path, name="demo"):
@@ -78,3 +82,71 @@ def test_validate_pack_structure_duplicate_directory_prefix(tmp_path):
     (dup_dir / "01-debug.md").write_text("dbg")
     with pytest.raises(ValueError):
         validate_pack_structure(tmp_path)
+
+
+def test_validate_pack_reports_every_error(tmp_path):
+    _setup_valid_pack(tmp_path)
+    (tmp_path / "extra.txt").write_text("x")
+    (tmp_path / "rules" / "02-rules-code" / "code.md").write_text("bad")
+    (tmp_path / "rules" / "01-rules" / "02-latin1.md").write_bytes("caf\xe9".encode("latin-1"))
+    report = validate_pack(tmp_path)
+    assert not report.ok
+    assert report.errors == [
+        "Unexpected item in pack root: extra.txt",
+        "Invalid rule file name: code.md",
+        "Rule file not UTF-8 encoded: 02-latin1.md",
+    ]
+    with pytest.raises(ValueError, match="extra.txt.*code.md"):
+        validate_pack_structure(tmp_path)
+
+
+def test_utf8_check_streams_across_chunk_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(pack_validation, "CHUNK_SIZE", 3)
+    _setup_valid_pack(tmp_path)
+    (tmp_path / "rules" / "01-rules" / "02-accents.md").write_text("caf\u00e9 \u00fcber " * 50, encoding="utf-8")
+    (tmp_path / "rules" / "01-rules" / "03-cut.md").write_bytes("ok \u00e9".encode("utf-8")[:-1])
+    assert validate_pack(tmp_path).errors == ["Rule file not UTF-8 encoded: 03-cut.md"]
+
+
+def test_unchanged_pack_reuses_memoised_report(tmp_path, monkeypatch):
+    _setup_valid_pack(tmp_path)
+    assert validate_pack(tmp_path).ok
+    pack_validation._memo.clear()  # Fall back to the report in the user cache.
+
+    def fail(*args):
+        raise AssertionError("pack validated again")
+
+    monkeypatch.setattr(pack_validation, "_validate", fail)
+    assert validate_pack(tmp_path, "demo").name == "demo"
+    assert validate_pack(tmp_path, "other").errors == ["name mismatch: demo != other"]
+
+    monkeypatch.undo()
+    (tmp_path / "rules" / "01-rules" / "01-general.md").write_bytes(b"\xff")
+    assert validate_pack(tmp_path).errors == ["Rule file not UTF-8 encoded: 01-general.md"]
+
+
+def test_memo_does_not_reuse_manifest_of_identically_stamped_tree(tmp_path):
+    reports = []
+    for version in ("1.0.0", "1.0.1"):
+        root = tmp_path / "pack"
+        shutil.rmtree(root, ignore_errors=True)
+        root.mkdir()
+        _setup_valid_pack(root)
+        manifest = root / "manifest.yaml"
+        manifest.write_text(manifest.read_text().replace("1.0.0", version))
+        for path in root.rglob("*"):
+            os.utime(path, ns=(0, 0))  # Fixed mtimes, as in reproducible tarballs.
+        reports.append(validate_pack(root))
+    assert [r.manifest["version"] for r in reports] == ["1.0.0", "1.0.1"]
+
+
+def test_memo_rechecks_rule_rewritten_with_same_size_and_mtime(tmp_path):
+    _setup_valid_pack(tmp_path)
+    rule = tmp_path / "rules" / "01-rules" / "01-general.md"
+    stamp = rule.stat().st_mtime_ns
+    assert validate_pack(tmp_path).ok
+
+    rule.unlink()
+    rule.write_bytes(b"\xffule")
+    os.utime(rule, ns=(stamp, stamp))
+    assert validate_pack(tmp_path).errors == ["Rule file not UTF-8 encoded: 01-general.md"]
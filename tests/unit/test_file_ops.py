@@ -0,0 +1,99 @@
+"""Unit tests for the pack copy backends."""
+
+import os
+import stat
+
+import pytest
+
+from rulebook_ai import file_ops
+
+
+def _source(tmp_path, read_only=False):
+    src = tmp_path / "src.md"
+    src.write_text("rule")
+    if read_only:
+        src.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    return src
+
+
+def test_copy_mode_creates_independent_file(tmp_path):
+    src = _source(tmp_path)
+    dst = tmp_path / "dst.md"
+    assert file_ops.copy_file(src, dst, "copy") == "copy"
+    assert dst.read_text() == "rule"
+    assert dst.stat().st_ino != src.stat().st_ino
+    assert dst.stat().st_mtime_ns == src.stat().st_mtime_ns
+
+
+def test_hardlink_mode_shares_inode(tmp_path):
+    src = _source(tmp_path)
+    dst = tmp_path / "dst.md"
+    assert file_ops.copy_file(src, dst, "hardlink") == "hardlink"
+    assert dst.stat().st_ino == src.stat().st_ino
+
+
+@pytest.mark.skipif(os.geteuid() == 0, reason="root can write read-only files")
+def test_auto_mode_hardlinks_only_read_only_sources(tmp_path):
+    writable = _source(tmp_path)
+    assert file_ops.copy_file(writable, tmp_path / "a.md", "auto") in {"reflink", "copy"}
+
+    ro_dir = tmp_path / "ro"
+    ro_dir.mkdir()
+    read_only = _source(ro_dir, read_only=True)
+    assert file_ops.copy_file(read_only, tmp_path / "b.md", "auto") in {"reflink", "hardlink"}
+
+
+def test_reflink_mode_falls_back_to_copy(tmp_path):
+    src = _source(tmp_path)
+    dst = tmp_path / "dst.md"
+    assert file_ops.copy_file(src, dst, "reflink") in {"reflink", "copy"}
+    assert dst.read_text() == "rule"
+    assert dst.stat().st_ino != src.stat().st_ino
+
+
+def test_resolve_link_mode_reads_environment(monkeypatch):
+    monkeypatch.setenv(file_ops.LINK_MODE_ENV, "copy")
+    assert file_ops.resolve_link_mode() == "copy"
+    assert file_ops.resolve_link_mode("hardlink") == "hardlink"
+    monkeypatch.setenv(file_ops.LINK_MODE_ENV, "bogus")
+    with pytest.raises(ValueError):
+        file_ops.resolve_link_mode()
+
+
+def test_copy_tree_hardlinks_pack(tmp_path):
+    pack = tmp_path / "pack"
+    (pack / "rules" / "01-rules").mkdir(parents=True)
+    (pack / "rules" / "01-rules" / "01-a.md").write_text("a")
+    dest = tmp_path / "installed"
+    file_ops.copy_tree(pack, dest, "hardlink")
+    installed = dest / "rules" / "01-rules" / "01-a.md"
+    assert installed.read_text() == "a"
+    assert installed.stat().st_ino == (pack / "rules" / "01-rules" / "01-a.md").stat().st_ino
+
+
+def test_atomic_write_bytes_keeps_permissions(tmp_path):
+    path = tmp_path / "out.md"
+    file_ops.atomic_write_bytes(path, b"one")
+    assert path.read_bytes() == b"one"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~file_ops._UMASK
+
+    path.chmod(0o600)
+    file_ops.atomic_write_bytes(path, b"two")
+    assert path.read_bytes() == b"two"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert [p.name for p in tmp_path.iterdir()] == ["out.md"]
+
+
+def test_copy_file_replaces_destination_atomically(tmp_path):
+    src = _source(tmp_path)
+    dst = tmp_path / "dst.md"
+    dst.write_text("old")
+    inode = dst.stat().st_ino
+    file_ops.copy_file(src, dst, "copy")
+    assert dst.read_text() == "rule"
+    assert dst.stat().st_ino != inode
+
+    # Re-linking the same source leaves no temporary file behind.
+    file_ops.copy_file(src, dst, "hardlink")
+    file_ops.copy_file(src, dst, "hardlink")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["dst.md", "src.md"]
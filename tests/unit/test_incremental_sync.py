@@ -0,0 +1,114 @@
+"""Tests for fingerprint-driven incremental project sync."""
+
+import json
+from pathlib import Path
+
+
+
+def test_sync_records_fingerprint_per_assistant(light_spec_project):
+    _, project_dir = light_spec_project(assistants=["cursor", "warp"])
+    status = json.loads((project_dir / ".rulebook-ai" / "sync_status.json").read_text())
+    assert status["cursor"]["fingerprint"]
+    assert status["warp"]["fingerprint"]
+    assert status["cursor"]["fingerprint"] != status["warp"]["fingerprint"]
+
+
+def test_noop_sync_leaves_outputs_untouched(light_spec_project, capsys):
+    manager, project_dir = light_spec_project(assistants=["cursor", "warp"])
+    warp_file = project_dir / "WARP.md"
+    mtime_before = warp_file.stat().st_mtime_ns
+    capsys.readouterr()
+
+    manager.project_sync(assistants=["cursor", "warp"], project_dir=str(project_dir))
+
+    out = capsys.readouterr().out
+    assert "Cursor rules are up to date" in out
+    assert "Warp rules are up to date" in out
+    assert warp_file.stat().st_mtime_ns == mtime_before
+
+
+def test_changed_pack_rule_regenerates(light_spec_project, capsys):
+    manager, project_dir = light_spec_project(assistants=["cursor", "warp"])
+    rules_dir = project_dir / ".rulebook-ai" / "packs" / "light-spec" / "rules"
+    rule_file = sorted(p for p in rules_dir.rglob("*.md"))[0]
+    rule_file.write_text(rule_file.read_text() + "\nEXTRA-RULE-LINE\n")
+    capsys.readouterr()
+
+    manager.project_sync(assistants=["warp"], project_dir=str(project_dir))
+
+    assert "up to date" not in capsys.readouterr().out
+    assert "EXTRA-RULE-LINE" in (project_dir / "WARP.md").read_text()
+
+
+def test_missing_output_or_force_regenerates(light_spec_project, capsys):
+    manager, project_dir = light_spec_project(assistants=["cursor", "warp"])
+    (project_dir / "WARP.md").unlink()
+    capsys.readouterr()
+
+    manager.project_sync(assistants=["warp"], project_dir=str(project_dir))
+    assert (project_dir / "WARP.md").is_file()
+
+    manager.project_sync(assistants=["cursor"], project_dir=str(project_dir), force=True)
+    assert "up to date" not in capsys.readouterr().out
+
+
+def _tree(root: Path, names):
+    files = {}
+    for name in names:
+        base = root / name
+        paths = [base] if base.is_file() else sorted(p for p in base.rglob("*") if p.is_file())
+        for p in paths:
+            files[p.relative_to(root).as_posix()] = p.read_bytes()
+    return files
+
+
+def test_parallel_sync_matches_serial(light_spec_project, capsys):
+    outputs = {}
+    logs = {}
+    for jobs in (1, 4):
+        manager, project_dir = light_spec_project(f"proj-{jobs}")
+        capsys.readouterr()
+        manager.project_sync(project_dir=str(project_dir), jobs=jobs)
+        logs[jobs] = capsys.readouterr().out.replace(str(project_dir), "<proj>")
+        outputs[jobs] = _tree(
+            project_dir, [".cursor", ".roo", ".clinerules", "WARP.md", "CLAUDE.md", ".gemini"]
+        )
+
+    assert outputs[1] == outputs[4]
+    assert logs[1] == logs[4]
+
+
+def test_resync_rewrites_only_changed_outputs(light_spec_project):
+    manager, project_dir = light_spec_project(assistants=["cursor", "warp"])
+    rules_dir = project_dir / ".cursor" / "rules"
+    outputs = sorted(rules_dir.iterdir())
+    untouched, edited = outputs[0], outputs[1]
+    stat_before = untouched.stat()
+    edited.write_text("locally edited")
+    stale = rules_dir / "99-stale.mdc"
+    stale.write_text("stale")
+
+    manager.project_sync(assistants=["cursor"], project_dir=str(project_dir), force=True)
+
+    stat_after = untouched.stat()
+    assert (stat_after.st_ino, stat_after.st_mtime_ns) == (
+        stat_before.st_ino,
+        stat_before.st_mtime_ns,
+    )
+    assert edited.read_text() != "locally edited"
+    assert not stale.exists()
+
+
+def test_edited_output_is_repaired_without_force(light_spec_project, capsys):
+    manager, project_dir = light_spec_project(assistants=["cursor", "warp"])
+    edited = sorted((project_dir / ".cursor" / "rules").iterdir())[0]
+    original = edited.read_bytes()
+    edited.write_text("junk")
+    capsys.readouterr()
+
+    manager.project_sync(assistants=["cursor", "warp"], project_dir=str(project_dir))
+
+    out = capsys.readouterr().out
+    assert "Cursor rules are up to date" not in out
+    assert "Warp rules are up to date" in out
+    assert edited.read_bytes() == original
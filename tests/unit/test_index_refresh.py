@@ -0,0 +1,107 @@
+"""Tests for conditional, compressed community index refreshes."""
+
+import gzip
+import json
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from rulebook_ai import community_packs
+
+INDEX = {"packs": [{"name": "p", "username": "u", "repo": "r", "description": "d"}]}
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests = []
+    failures = 0
+
+    def do_GET(self):  # noqa: N802 - http.server API
+        type(self).requests.append(dict(self.headers))
+        if type(self).failures:
+            type(self).failures -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = gzip.compress(json.dumps(INDEX).encode("utf-8"))
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def index_server(tmp_path, monkeypatch):
+    _Handler.requests = []
+    _Handler.failures = 0
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("RULEBOOK_AI_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("RULEBOOK_AI_INDEX_URL", f"http://127.0.0.1:{server.server_port}/packs.json")
+    yield _Handler
+    server.shutdown()
+
+
+def test_second_update_sends_validators_and_skips_write(index_server, tmp_path):
+    assert community_packs.update_index_cache() == 0
+    cache = tmp_path / "index" / "packs.json"
+    assert json.loads(cache.read_text()) == INDEX
+    assert index_server.requests[0]["Accept-Encoding"] == "gzip"
+    mtime = cache.stat().st_mtime_ns
+
+    assert community_packs.update_index_cache() == 0
+    assert index_server.requests[1]["If-None-Match"] == ETAG
+    assert cache.stat().st_mtime_ns == mtime
+
+
+def test_server_errors_are_retried_with_backoff(index_server, monkeypatch):
+    delays = []
+    monkeypatch.setattr(community_packs.time, "sleep", delays.append)
+    index_server.failures = 2
+    assert community_packs.update_index_cache() == 0
+    assert delays == [0.5, 1.0]
+    assert len(index_server.requests) == 3
+
+
+def test_stale_index_is_served_while_refreshing_in_background(tmp_path, monkeypatch):
+    monkeypatch.setenv("RULEBOOK_AI_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("RULEBOOK_AI_INDEX_AUTO_REFRESH", "1")
+    monkeypatch.setattr(community_packs, "_catalog_memo", None)
+    spawned = []
+    monkeypatch.setattr(subprocess, "Popen", lambda *a, **kw: spawned.append(kw))
+
+    # Never fetched: the bundled seed is used and a refresh starts detached.
+    catalog = community_packs.load_catalog()
+    assert catalog.entries == community_packs.PackCatalog.build(
+        json.loads(community_packs.SEED_INDEX_PATH.read_text())["packs"]
+    ).entries
+    assert len(spawned) == 1 and spawned[0]["start_new_session"]
+
+    # A recent attempt suppresses another spawn.
+    monkeypatch.setattr(community_packs, "_catalog_memo", None)
+    community_packs.load_catalog()
+    assert len(spawned) == 1
+
+
+def test_fresh_index_is_not_refreshed(tmp_path, monkeypatch):
+    monkeypatch.setenv("RULEBOOK_AI_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("RULEBOOK_AI_INDEX_AUTO_REFRESH", "1")
+    community_packs._save_index_cache(INDEX)
+    (tmp_path / "index" / "packs.meta.json").write_text("{}")
+    assert not community_packs.index_is_stale()
+    assert community_packs.refresh_index_in_background() is False
+
+    monkeypatch.setenv("RULEBOOK_AI_INDEX_TTL", "-1")
+    assert community_packs.index_is_stale()
@@ -0,0 +1,117 @@
+"""Tests for cross-process project locking."""
+
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from rulebook_ai.core import RuleManager
+from rulebook_ai.locking import project_lock
+
+fcntl = pytest.importorskip("fcntl")
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+PROBE = """
+import fcntl, os, sys
+fd = os.open(sys.argv[1], os.O_RDONLY)
+flag = fcntl.LOCK_SH if sys.argv[2] == "shared" else fcntl.LOCK_EX
+try:
+    fcntl.flock(fd, flag | fcntl.LOCK_NB)
+except BlockingIOError:
+    print("blocked")
+else:
+    print("acquired")
+"""
+
+
+def _probe(path: Path, mode: str) -> str:
+    out = subprocess.run([sys.executable, "-c", PROBE, str(path), mode], capture_output=True, text=True)
+    return out.stdout.strip()
+
+
+def test_exclusive_lock_excludes_other_processes(tmp_path):
+    with project_lock(tmp_path):
+        assert _probe(tmp_path, "shared") == "blocked"
+        assert _probe(tmp_path, "exclusive") == "blocked"
+    assert _probe(tmp_path, "exclusive") == "acquired"
+
+
+def test_shared_lock_allows_readers(tmp_path):
+    with project_lock(tmp_path, shared=True):
+        assert _probe(tmp_path, "shared") == "acquired"
+        assert _probe(tmp_path, "exclusive") == "blocked"
+        with project_lock(tmp_path):  # re-entrant upgrade
+            assert _probe(tmp_path, "shared") == "blocked"
+
+
+def test_locking_adds_no_files_to_state_dir(tmp_path):
+    manager = RuleManager(project_root=str(tmp_path))
+    with manager.session():
+        manager.create_profile("dev")
+    assert manager.list_profiles() == 0
+    assert (tmp_path / ".rulebook-ai" / "selection.json").is_file()
+    assert not (tmp_path / ".rulebook-ai" / ".lock").exists()
+
+
+def test_concurrent_processes_do_not_lose_updates(tmp_path):
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "rulebook_ai", "profiles", "create", f"p{i}", "--project-dir", str(tmp_path)],
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        for i in range(6)
+    ]
+    assert [p.wait() for p in procs] == [0] * 6
+    profiles = RuleManager(project_root=str(tmp_path))._load_selection(tmp_path).profiles
+    assert sorted(profiles) == [f"p{i}" for i in range(6)]
+
+
+def test_lock_is_not_shared_between_threads(tmp_path):
+    events = []
+
+    def worker():
+        with project_lock(tmp_path):
+            events.append("worker")
+
+    with project_lock(tmp_path):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join(0.3)
+        assert thread.is_alive()
+        events.append("main")
+    thread.join()
+    assert events == ["main", "worker"]
+
+
+def test_clean_context_prompts_without_holding_the_lock(light_spec_project, monkeypatch):
+    manager, project_dir = light_spec_project(assistants=["cursor"])
+    manager.remove_pack("light-spec", str(project_dir))
+    probes = []
+    monkeypatch.setattr(
+        "builtins.input", lambda prompt: probes.append(_probe(project_dir, "exclusive")) or "y"
+    )
+
+    assert manager.project_clean_context(str(project_dir), action="delete") == 0
+    assert probes == ["acquired"]
+    assert not (project_dir / "memory" / "docs" / "architecture_template.md").exists()
+
+
+def test_sync_plan_takes_a_shared_lock(light_spec_project, monkeypatch):
+    manager, project_dir = light_spec_project()
+    probes = []
+    plan_sync = RuleManager._plan_sync
+
+    def probing_plan_sync(self, *args):
+        probes.append(_probe(project_dir, "shared"))
+        return plan_sync(self, *args)
+
+    monkeypatch.setattr(RuleManager, "_plan_sync", probing_plan_sync)
+    manager.project_sync(assistants=["cursor"], project_dir=str(project_dir), plan_only=True)
+    manager.project_sync(assistants=["cursor"], project_dir=str(project_dir))
+    assert probes == ["acquired", "blocked"]
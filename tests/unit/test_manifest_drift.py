@@ -0,0 +1,67 @@
+"""Tests for content-hashed manifest entries and ``project drift``."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+ARCH = "memory/docs/architecture_template.md"
+
+
+def _manifest(project_dir: Path) -> dict:
+    return json.loads((project_dir / ".rulebook-ai" / "file_manifest.json").read_text())
+
+
+def test_manifest_records_hash_size_and_mtime(light_spec_project):
+    _, project_dir = light_spec_project(assistants=["cursor"])
+    entry = _manifest(project_dir)[ARCH]
+    path = project_dir / ARCH
+    assert entry["pack"] == "light-spec"
+    assert entry["sha256"] == hashlib.sha256(path.read_bytes()).hexdigest()
+    assert entry["size"] == path.stat().st_size
+    assert entry["mtime_ns"] == path.stat().st_mtime_ns
+
+
+def test_drift_reports_modified_missing_and_pristine(light_spec_project, capsys):
+    manager, project_dir = light_spec_project(assistants=["cursor"])
+    total = len(_manifest(project_dir))
+    (project_dir / ARCH).write_text("edited by the user")
+    missing = next(rel for rel in _manifest(project_dir) if rel != ARCH)
+    (project_dir / missing).unlink()
+    capsys.readouterr()
+
+    assert manager.project_drift(str(project_dir)) == 0
+    out = capsys.readouterr().out
+    assert f"Starter files: 1 modified, 1 missing, {total - 2} pristine." in out
+    assert f"modified: {ARCH}" in out
+    assert f"missing: {missing}" in out
+
+
+def test_drift_hashes_touched_files_once(light_spec_project, capsys, monkeypatch):
+    manager, project_dir = light_spec_project(assistants=["cursor"])
+    path = project_dir / ARCH
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+
+    manager.project_drift(str(project_dir))
+    assert "0 modified" in capsys.readouterr().out
+    assert _manifest(project_dir)[ARCH]["mtime_ns"] == path.stat().st_mtime_ns
+
+    def fail(*args, **kwargs):
+        raise AssertionError("pristine files should not be hashed")
+
+    monkeypatch.setattr(Path, "read_bytes", fail)
+    manager.project_drift(str(project_dir))
+
+
+def test_legacy_manifest_entries(light_spec_project, capsys):
+    manager, project_dir = light_spec_project(assistants=["cursor"])
+    legacy = {rel: entry["pack"] for rel, entry in _manifest(project_dir).items()}
+    (project_dir / ".rulebook-ai" / "file_manifest.json").write_text(json.dumps(legacy))
+
+    manager.project_drift(str(project_dir))
+    assert f"{len(legacy)} file(s) were recorded without a content hash" in capsys.readouterr().out
+
+    manager.remove_pack("light-spec", str(project_dir))
+    manager.project_clean_context(str(project_dir), action="delete", force=True)
+    assert not (project_dir / ARCH).exists()
+    assert _manifest(project_dir) == {}
@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 from pathlib import Path
 
 from rulebook_ai.community_packs import validate_pack_structure
@@ -8,3 +11,17 @@ def test_pack_authoring_guide_is_valid():
     name, manifest = validate_pack_structure(pack_path)
     assert name == 'pack-authoring-guide'
     assert manifest['version'] == '0.1.0'
+
+
+def test_validate_pack_script_lists_all_problems(tmp_path):
+    (tmp_path / "manifest.yaml").write_text("name: demo\nversion: 1.0.0\n")
+    (tmp_path / "rules" / "01-rules").mkdir(parents=True)
+    script = Path('src/rulebook_ai/packs/pack-authoring-guide/tool_starters/validate_pack.py')
+    env = {**os.environ, "PYTHONPATH": str(Path('src').resolve())}
+    result = subprocess.run(
+        [sys.executable, str(script), str(tmp_path)], capture_output=True, text=True, env=env
+    )
+    assert result.returncode == 1
+    assert "Invalid pack structure." in result.stdout
+    assert "manifest.yaml missing 'summary'." in result.stdout
+    assert "01-rules must contain at least one rule file." in result.stdout
@@ -0,0 +1,76 @@
+"""Tests for the user-level content-addressed pack cache."""
+
+import os
+
+import pytest
+
+from rulebook_ai import pack_cache
+
+SHA_A = "a" * 40
+SHA_B = "b" * 40
+
+
+def _pack(root, text="rule"):
+    (root / "rules").mkdir(parents=True)
+    (root / "rules" / "01.md").write_text(text)
+    (root / ".git").mkdir()
+    (root / ".git" / "HEAD").write_text("ref")
+    return root
+
+
+def test_store_and_lookup(tmp_path):
+    src = _pack(tmp_path / "src")
+    assert pack_cache.lookup("https://x/u/r", SHA_A, "p") is None
+
+    tree = pack_cache.store("https://x/u/r", SHA_A, "p", src)
+    assert (tree / "rules" / "01.md").read_text() == "rule"
+    assert not (tree / ".git").exists()
+    assert pack_cache.lookup("https://x/u/r", SHA_A, "p") == tree
+    assert pack_cache.lookup("https://x/u/r", SHA_A, "other") is None
+
+
+def test_identical_trees_are_stored_once(tmp_path):
+    src = _pack(tmp_path / "src")
+    first = pack_cache.store("https://x/u/r", SHA_A, "", src)
+    second = pack_cache.store("https://x/fork/r", SHA_B, "", src)
+    assert first == second
+    stats = pack_cache.stats()
+    assert (stats.trees, stats.refs) == (1, 2)
+
+
+def test_copy_out_never_hardlinks_and_store_repairs_damaged_trees(tmp_path):
+    src = _pack(tmp_path / "src")
+    tree = pack_cache.store("u", SHA_A, "", src)
+    dest = tmp_path / "dest"
+    pack_cache.copy_out(tree, dest, "hardlink")
+    (dest / "rules" / "01.md").write_text("edited")
+    assert (tree / "rules" / "01.md").read_text() == "rule"
+
+    (tree / "rules" / "01.md").write_text("damaged")
+    assert pack_cache.store("u", SHA_B, "", src) == tree
+    assert (tree / "rules" / "01.md").read_text() == "rule"
+
+
+def test_lru_eviction(tmp_path, monkeypatch):
+    monkeypatch.setenv("RULEBOOK_AI_CACHE_MAX_BYTES", "10")
+    old = pack_cache.store("u", SHA_A, "", _pack(tmp_path / "a", "aaaaaaaa"))
+    os.utime(old.with_name(old.name + ".used"), (0, 0))
+    new = pack_cache.store("u", SHA_B, "", _pack(tmp_path / "b", "bbbbbbbb"))
+
+    assert not old.exists()
+    assert pack_cache.lookup("u", SHA_A, "") is None
+    assert pack_cache.lookup("u", SHA_B, "") == new
+
+    assert pack_cache.prune(0) == [new.name]
+    assert pack_cache.stats().refs == 0
+
+
+def test_parse_size_and_commit_detection():
+    assert pack_cache.parse_size("1024") == 1024
+    assert pack_cache.parse_size("5M") == 5 * 1024 * 1024
+    assert pack_cache.parse_size("2GiB") == 2 * 1024 ** 3
+    with pytest.raises(ValueError):
+        pack_cache.parse_size("lots")
+    assert pack_cache.is_commit_sha(SHA_A)
+    assert not pack_cache.is_commit_sha("main")
+    assert not pack_cache.is_commit_sha("abc1234")
@@ -0,0 +1,63 @@
+"""Tests for the compiled community pack catalog."""
+
+import json
+import time
+
+from rulebook_ai import community_packs
+from rulebook_ai.pack_catalog import PackCatalog
+
+PACKS = [
+    {"name": "react-pack", "username": "alice", "repo": "r1", "description": "Rules for React apps"},
+    {"name": "django-pack", "username": "bob", "repo": "r2", "description": "Django and Python"},
+    {"name": "python-style", "username": "carol", "repo": "r3", "description": "PEP 8 style rules"},
+]
+
+
+def _names(results):
+    return [entry["name"] for _, entry in results]
+
+
+def test_get_by_name():
+    catalog = PackCatalog.build(PACKS)
+    assert catalog.get("django-pack")["username"] == "bob"
+    assert catalog.get("missing") is None
+
+
+def test_search_ranks_name_matches_first_and_tolerates_typos():
+    catalog = PackCatalog.build(PACKS)
+    assert _names(catalog.search("python")) == ["python-style", "django-pack"]
+    assert _names(catalog.search("reakt"))[0] == "react-pack"
+    assert _names(catalog.search("djan"))[0] == "django-pack"
+    assert _names(catalog.search("bob")) == ["django-pack"]
+    assert catalog.search("zzzz") == []
+
+
+def test_catalog_round_trips_through_json():
+    catalog = PackCatalog.build(PACKS)
+    loaded = PackCatalog.from_json(json.loads(json.dumps(catalog.to_json())))
+    assert loaded.search("python") == catalog.search("python")
+    assert loaded.get("react-pack") == catalog.get("react-pack")
+
+
+def test_saved_catalog_is_used_until_the_cache_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("RULEBOOK_AI_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(community_packs, "_catalog_memo", None)
+    community_packs._save_index_cache({"packs": PACKS})
+    assert (tmp_path / "index" / "packs.catalog.json").is_file()
+    assert community_packs.load_catalog().get("react-pack") is not None
+
+    (tmp_path / "index" / "packs.json").write_text(json.dumps({"packs": PACKS[:1]}))
+    assert community_packs.load_catalog().get("django-pack") is None
+
+
+def test_lookup_in_large_catalog_is_fast():
+    packs = [
+        {"name": f"pack-{i}", "username": f"user{i % 500}", "repo": "r", "description": f"topic{i % 1000} rules"}
+        for i in range(30000)
+    ]
+    catalog = PackCatalog.build(packs)
+    start = time.perf_counter()
+    for _ in range(100):
+        assert catalog.get("pack-12345")["name"] == "pack-12345"
+    assert (time.perf_counter() - start) / 100 < 0.001
+    assert _names(catalog.search("pack-12345"))[0] == "pack-12345"
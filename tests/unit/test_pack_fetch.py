@@ -0,0 +1,151 @@
+"""Tests for community pack checkouts: shallow/sparse clones and git mirrors."""
+
+import shutil
+import subprocess
+from pathlib import Path
+
+from rulebook_ai import community_packs, pack_cache
+from rulebook_ai.community_packs import checkout_from_mirror, fetch_pack_checkout
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.email=test@example.com", "-c", "user.name=Test", *args],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+
+def _monorepo(tmp_path: Path):
+    repo = tmp_path / "monorepo"
+    (repo / "packs" / "demo" / "rules").mkdir(parents=True)
+    (repo / "other").mkdir()
+    (repo / "packs" / "demo" / "rules" / "01-rule.md").write_text("v1")
+    (repo / "other" / "big.bin").write_bytes(b"\0" * 1024)
+    _git(tmp_path, "init", "-q", str(repo))
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-qm", "one")
+    first = _git(repo, "rev-parse", "HEAD")
+    (repo / "packs" / "demo" / "rules" / "01-rule.md").write_text("v2")
+    _git(repo, "commit", "-qam", "two")
+    return repo, first
+
+
+def _checked_out(root: Path):
+    return sorted(p.relative_to(root).as_posix() for p in root.rglob("*") if ".git" not in p.parts and p.is_file())
+
+
+def test_shallow_sparse_checkout_of_subpath(tmp_path):
+    repo, _ = _monorepo(tmp_path)
+    dest = tmp_path / "clone"
+    assert fetch_pack_checkout(str(repo), "packs/demo", None, dest) is None
+
+    assert _checked_out(dest) == ["packs/demo/rules/01-rule.md"]
+    assert (dest / "packs" / "demo" / "rules" / "01-rule.md").read_text() == "v2"
+    assert _git(dest, "rev-parse", "--is-shallow-repository") == "true"
+    assert _git(dest, "rev-list", "--count", "HEAD") == "1"
+
+
+def test_pinned_commit_fetches_only_that_commit(tmp_path):
+    repo, first = _monorepo(tmp_path)
+    dest = tmp_path / "clone"
+    assert fetch_pack_checkout(str(repo), "packs/demo", first, dest) is None
+
+    assert _git(dest, "rev-parse", "HEAD") == first
+    assert (dest / "packs" / "demo" / "rules" / "01-rule.md").read_text() == "v1"
+    assert _git(dest, "rev-list", "--count", "HEAD") == "1"
+
+
+def test_abbreviated_commit_falls_back_to_full_clone(tmp_path):
+    repo, first = _monorepo(tmp_path)
+    dest = tmp_path / "clone"
+    assert fetch_pack_checkout(str(repo), "packs/demo", first[:8], dest) is None
+    assert _git(dest, "rev-parse", "HEAD") == first
+
+
+def test_missing_repository_reports_error(tmp_path):
+    assert fetch_pack_checkout(str(tmp_path / "nope"), "", None, tmp_path / "clone")
+
+
+def test_mirror_fetches_incrementally(tmp_path):
+    repo, first = _monorepo(tmp_path)
+    commit, error = checkout_from_mirror(str(repo), "packs/demo", None, tmp_path / "one")
+    assert error is None
+    assert commit == _git(repo, "rev-parse", "HEAD")
+    assert _checked_out(tmp_path / "one") == ["packs/demo/rules/01-rule.md"]
+    mirror = pack_cache.mirror_path(str(repo))
+    assert _git(mirror, "rev-parse", "--is-bare-repository") == "true"
+    # Only the requested commit is fetched, not the repository's history.
+    assert _git(mirror, "rev-parse", "--is-shallow-repository") == "true"
+    assert _git(mirror, "rev-list", "--count", commit) == "1"
+
+    (repo / "packs" / "demo" / "rules" / "01-rule.md").write_text("v3")
+    _git(repo, "commit", "-qam", "three")
+    commit, error = checkout_from_mirror(str(repo), "packs/demo", None, tmp_path / "two")
+    assert commit == _git(repo, "rev-parse", "HEAD")
+    assert (tmp_path / "two" / "packs" / "demo" / "rules" / "01-rule.md").read_text() == "v3"
+
+    commit, error = checkout_from_mirror(str(repo), "packs/demo", first, tmp_path / "three")
+    assert (commit, error) == (first, None)
+
+    # A commit already in the mirror needs no access to the remote.
+    shutil.rmtree(repo)
+    commit, error = checkout_from_mirror(str(repo), "packs/demo", first, tmp_path / "four")
+    assert (commit, error) == (first, None)
+    assert (tmp_path / "four" / "packs" / "demo" / "rules" / "01-rule.md").read_text() == "v1"
+    assert pack_cache.stats().mirrors == 1
+
+
+def test_mirror_resolves_abbreviated_commit(tmp_path):
+    repo, first = _monorepo(tmp_path)
+    commit, error = checkout_from_mirror(str(repo), "packs/demo", None, tmp_path / "one")
+    assert error is None
+
+    commit, error = checkout_from_mirror(str(repo), "packs/demo", first[:8], tmp_path / "two")
+    assert (commit, error) == (first, None)
+    assert (tmp_path / "two" / "packs" / "demo" / "rules" / "01-rule.md").read_text() == "v1"
+
+
+def test_mirror_reports_unknown_ref(tmp_path):
+    repo, _ = _monorepo(tmp_path)
+    commit, error = checkout_from_mirror(str(repo), "", "no-such-branch", tmp_path / "out")
+    assert commit is None and "no-such-branch" in error
+
+    commit, error = checkout_from_mirror(str(tmp_path / "missing"), "", None, tmp_path / "out")
+    assert commit is None and error
+    assert not pack_cache.mirror_path(str(tmp_path / "missing")).exists()
+
+
+def test_find_outdated_runs_one_ls_remote_per_repository(monkeypatch):
+    calls = []
+
+    def fake_git(*args):
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0, stdout="b" * 40 + "\tHEAD\n", stderr="")
+
+    monkeypatch.setattr(community_packs, "_git", fake_git)
+    entries = [
+        {"name": "one", "slug": "user/mono/packs/one", "commit": "a" * 40},
+        {"name": "two", "slug": "user/mono/packs/two", "commit": "b" * 40},
+        {"name": "three", "slug": "other/repo", "commit": "a" * 40},
+        {"name": "builtin"},
+    ]
+    packs = community_packs.find_outdated(entries)
+    assert sorted(call[1].rsplit("/", 2)[-2] for call in calls) == ["other", "user"]
+    assert [(p.name, p.outdated) for p in packs] == [("one", True), ("two", False), ("three", True)]
+
+
+def test_find_outdated_matches_abbreviated_index_pin(monkeypatch):
+    monkeypatch.setattr(
+        community_packs,
+        "request_from_index",
+        lambda name: community_packs.PackRequest("user/repo", "abcdef12", name),
+    )
+    entries = [
+        {"name": "current", "slug": "user/repo", "commit": "abcdef12" + "0" * 32},
+        {"name": "behind", "slug": "user/repo", "commit": "1" * 40},
+    ]
+    packs = community_packs.find_outdated(entries)
+    assert [(p.name, p.outdated) for p in packs] == [("current", False), ("behind", True)]
@@ -0,0 +1,141 @@
+"""Unit tests for the shared in-memory rules index."""
+
+from collections import OrderedDict
+
+from rulebook_ai import rule_index
+from rulebook_ai.rule_index import RuleIndex
+
+
+def _make_tree(root):
+    (root / "01-rules").mkdir(parents=True)
+    (root / "01-rules" / "02-b.md").write_text("B")
+    (root / "01-rules" / "01-a.md").write_text("A")
+    (root / "01-rules" / ".hidden.md").write_text("hidden")
+    (root / "02-rules-code").mkdir()
+    (root / "02-rules-code" / "01-code.md").write_text("Code")
+    (root / "top.md").write_text("Top")
+
+
+def test_scan_sorts_and_skips_hidden_files(tmp_path):
+    _make_tree(tmp_path)
+    index = RuleIndex.scan(tmp_path)
+
+    assert [f.rel_path for f in index.files] == [
+        "01-rules/01-a.md",
+        "01-rules/02-b.md",
+        "02-rules-code/01-code.md",
+        "top.md",
+    ]
+    assert index.files[0].size == 1
+    assert index.subdirectories() == ["01-rules", "02-rules-code"]
+
+
+def test_subtree_shares_content_cache(tmp_path):
+    _make_tree(tmp_path)
+    index = RuleIndex.scan(tmp_path)
+    sub = index.subtree("02-rules-code")
+
+    assert [f.rel_path for f in sub.files] == ["01-code.md"]
+    assert sub.read_text(sub.files[0]) == "Code"
+    (tmp_path / "02-rules-code" / "01-code.md").write_text("Changed")
+    assert index.read_text(index.files[2]) == "Code"
+
+
+def test_project_sync_scans_staged_tree_once(light_spec_project, monkeypatch):
+    manager, project_dir = light_spec_project()
+
+    calls = []
+    original = RuleIndex.scan.__func__
+
+    def counting_scan(cls, root):
+        calls.append(root)
+        return original(cls, root)
+
+    monkeypatch.setattr(RuleIndex, "scan", classmethod(counting_scan))
+    manager.project_sync(project_dir=str(project_dir))
+
+    assert len(calls) == 1
+    assert (project_dir / ".roo").is_dir()
+    assert (project_dir / "CLAUDE.md").is_file()
+
+
+def test_single_file_assistants_render_concatenation_once(light_spec_project, monkeypatch):
+    manager, project_dir = light_spec_project()
+
+    renders = []
+    original = manager._render_concatenation
+
+    def counting_render(index):
+        renders.append(index)
+        return original(index)
+
+    monkeypatch.setattr(manager, "_render_concatenation", counting_render)
+    manager.project_sync(
+        assistants=["warp", "copilot", "claude-code", "codex-cli", "gemini-cli"],
+        project_dir=str(project_dir),
+        jobs=4,
+    )
+
+    assert len(renders) == 1
+    outputs = [
+        project_dir / "WARP.md",
+        project_dir / ".github" / "copilot-instructions.md",
+        project_dir / "CLAUDE.md",
+        project_dir / "AGENTS.md",
+        project_dir / ".gemini" / "GEMINI.md",
+    ]
+    contents = {p.read_bytes() for p in outputs}
+    assert len(contents) == 1
+    assert b"# Rule: " in contents.pop()
+
+
+def test_compose_first_pack_wins(tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    (first / "01-rules").mkdir(parents=True)
+    (first / "01-rules" / "01-a.md").write_text("first A")
+    (second / "01-rules").mkdir(parents=True)
+    (second / "01-rules" / "01-a.md").write_text("second A")
+    (second / "01-rules" / "02-b.md").write_text("second B")
+
+    index = RuleIndex.compose([first, second, tmp_path / "missing"])
+
+    assert [f.rel_path for f in index.files] == ["01-rules/01-a.md", "01-rules/02-b.md"]
+    assert index.read_text(index.files[0]) == "first A"
+    assert index.files[1].path == second / "01-rules" / "02-b.md"
+
+
+def test_project_sync_stages_on_disk_only_for_debugging(light_spec_project):
+    manager, project_dir = light_spec_project()
+    staging = project_dir / ".rulebook-ai" / "project_rules"
+
+    manager.project_sync(assistants=["cursor"], project_dir=str(project_dir))
+    assert not staging.exists()
+    assert any((project_dir / ".cursor" / "rules").iterdir())
+
+    manager.project_sync(assistants=["cursor"], project_dir=str(project_dir), debug_staging=True)
+    assert (staging / "01-rules").is_dir()
+
+    # Re-staging replaces the existing tree.
+    rc = manager.project_sync(
+        assistants=["cursor"], project_dir=str(project_dir), force=True, debug_staging=True
+    )
+    assert rc == 0
+    assert any((staging / "01-rules").iterdir())
+
+    manager.project_sync(assistants=["cursor"], project_dir=str(project_dir))
+    assert not staging.exists()
+
+
+def test_shared_content_store_is_bounded(monkeypatch):
+    monkeypatch.setattr(rule_index, "CONTENT_STORE_MAX_BYTES", 10)
+    monkeypatch.setattr(rule_index, "_CONTENT_STORE", OrderedDict())
+    monkeypatch.setattr(rule_index, "_CONTENT_STORE_BYTES", 0)
+
+    rule_index._store_put("a", b"1234")
+    rule_index._store_put("b", b"1234")
+    assert rule_index._store_get("a") == b"1234"  # "a" is now most recently used
+    rule_index._store_put("c", b"1234")
+    rule_index._store_put("huge", b"x" * 11)
+
+    assert list(rule_index._CONTENT_STORE) == ["a", "c"]
+    assert rule_index._CONTENT_STORE_BYTES == 8
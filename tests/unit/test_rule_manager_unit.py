@@ -3,6 +3,8 @@
 import pytest
 from pathlib import Path
 from rulebook_ai.core import RuleManager
+from rulebook_ai.rule_index import RuleIndex
+from rulebook_ai.sync_plan import execute_ops
 
 @pytest.fixture
 def rule_manager(tmp_path):
@@ -11,10 +13,10 @@ def rule_manager(tmp_path):
     # unit tests as we pass absolute paths, but it's good practice.
     return RuleManager(project_root=str(tmp_path))
 
-def test_strategy_flatten_and_number(rule_manager, tmp_path):
+def test_flatten_and_number_outputs(rule_manager, tmp_path):
     """
     Verify that the flatten strategy correctly takes a nested source,
-    finds all files, and creates a flat, numbered list in the destination.
+    finds all files, and maps them to a flat, numbered list in the destination.
     """
     source_dir = tmp_path / "source"
     dest_dir = tmp_path / "dest"
@@ -26,27 +28,20 @@ def test_strategy_flatten_and_number(rule_manager, tmp_path):
     (source_dir / "sub" / "b.txt").write_text("Content B")
     (source_dir / "c.md").write_text("Content C")
 
-    # Execute the strategy
-    count = rule_manager._strategy_flatten_and_number(source_dir, dest_dir, ".out")
-    assert count == 3
+    # Plan the strategy
+    outputs = rule_manager._flatten_and_number_outputs(RuleIndex.scan(source_dir), dest_dir, ".out")
 
     # Verify the flattened and numbered output
-    files = sorted(list(dest_dir.iterdir()))
-    assert len(files) == 3
-    
-    assert files[0].name == "01-a.out"
-    assert files[0].read_text() == "Content A"
-    
-    assert files[1].name == "02-c.out"
-    assert files[1].read_text() == "Content C"
-
-    assert files[2].name == "03-b.out"
-    assert files[2].read_text() == "Content B"
-
-def test_strategy_preserve_hierarchy(rule_manager, tmp_path):
+    assert outputs == {
+        dest_dir / "01-a.out": source_dir / "a.md",
+        dest_dir / "02-c.out": source_dir / "c.md",
+        dest_dir / "03-b.out": source_dir / "sub" / "b.txt",
+    }
+
+def test_preserve_hierarchy_outputs(rule_manager, tmp_path):
     """
-    Verify that the preserve hierarchy strategy correctly copies a nested
-    directory structure from source to destination.
+    Verify that the preserve hierarchy strategy maps a nested directory
+    structure from source to destination.
     """
     source_dir = tmp_path / "source"
     dest_dir = tmp_path / "dest"
@@ -57,17 +52,16 @@ def test_strategy_preserve_hierarchy(rule_manager, tmp_path):
     (source_dir / "a.md").write_text("Content A")
     (source_dir / "sub" / "b.txt").write_text("Content B")
 
-    # Execute the strategy
-    count = rule_manager._strategy_preserve_hierarchy(source_dir, dest_dir)
-    assert count == 2
+    # Plan the strategy
+    outputs = rule_manager._preserve_hierarchy_outputs(RuleIndex.scan(source_dir), dest_dir)
 
     # Verify the preserved structure
-    assert (dest_dir / "a.md").is_file()
-    assert (dest_dir / "a.md").read_text() == "Content A"
-    assert (dest_dir / "sub" / "b.txt").is_file()
-    assert (dest_dir / "sub" / "b.txt").read_text() == "Content B"
+    assert outputs == {
+        dest_dir / "a.md": source_dir / "a.md",
+        dest_dir / "sub" / "b.txt": source_dir / "sub" / "b.txt",
+    }
 
-def test_strategy_concatenate_files(rule_manager, tmp_path):
+def test_concatenate_outputs(rule_manager, tmp_path):
     """
     Verify that the concatenate strategy correctly combines multiple source
     files into a single destination file.
@@ -81,52 +75,59 @@ def test_strategy_concatenate_files(rule_manager, tmp_path):
     (source_dir / "01-a.md").write_text("Content A")
     (source_dir / "sub" / "02-b.txt").write_text("Content B")
 
-    # Execute the strategy
-    rule_manager._strategy_concatenate_files(source_dir, dest_file)
+    # Plan the strategy
+    outputs = rule_manager._concatenate_outputs(RuleIndex.scan(source_dir), dest_file)
 
     # Verify the concatenated output
-    assert dest_file.is_file()
-    content = dest_file.read_text()
-    
+    assert list(outputs) == [dest_file]
+    content = outputs[dest_file].decode("utf-8")
+
     assert "# Rule: 01-a.md" in content
     assert "Content A" in content
     assert "---" in content
     assert "# Rule: 02-b.txt" in content
     assert "Content B" in content
 
-def test_copy_tree_non_destructive(rule_manager, tmp_path):
+    assert rule_manager._concatenate_outputs(RuleIndex.scan(tmp_path / "missing"), dest_file) == {}
+
+def test_plan_starters_is_non_destructive(rule_manager, tmp_path):
     """
-    Verify that the non-destructive copy only adds new files, does not
-    overwrite existing ones, and returns a correct map of copied files.
+    Verify that starter planning only adds new files, does not overwrite
+    existing ones, and lets the first pack win on conflicting paths.
     """
     source_dir = tmp_path / "source"
+    other_dir = tmp_path / "other"
     dest_dir = tmp_path / "dest"
     source_dir.mkdir()
+    other_dir.mkdir()
     dest_dir.mkdir()
 
     # Source files
     (source_dir / "new_file.txt").write_text("New")
     (source_dir / "existing_file.txt").write_text("Source Version")
+    (other_dir / "new_file.txt").write_text("Other Pack Version")
 
     # Destination files
     (dest_dir / "existing_file.txt").write_text("Original Version")
     (dest_dir / "other_file.txt").write_text("Other")
 
-    # Execute the copy
-    copied_files = rule_manager._copy_tree_non_destructive(source_dir, dest_dir, tmp_path)
+    # Plan the copies
+    planned = {}
+    rule_manager._plan_starters(source_dir, dest_dir, "first", planned)
+    rule_manager._plan_starters(other_dir, dest_dir, "second", planned)
 
-    # Verify the returned map
-    assert len(copied_files) == 1
-    assert copied_files[0] == "dest/new_file.txt"
+    # Verify the planned copies
+    assert list(planned) == [dest_dir / "new_file.txt"]
+    op = planned[dest_dir / "new_file.txt"]
+    assert (op.kind, op.source, op.pack) == ("copy", source_dir / "new_file.txt", "first")
 
-    # Verify destination contents
-    assert (dest_dir / "new_file.txt").is_file()
+    # Verify destination contents after executing the plan
+    assert execute_ops(list(planned.values())) == []
     assert (dest_dir / "new_file.txt").read_text() == "New"
-    
     assert (dest_dir / "existing_file.txt").read_text() == "Original Version"
     assert (dest_dir / "other_file.txt").read_text() == "Other"
 
-def test_generate_for_assistant_mode_based(rule_manager, tmp_path):
+def test_plan_assistant_mode_based(rule_manager, tmp_path):
     """
     Verify that the generation logic for mode-based assistants (Roo, Kilo)
     correctly creates mode-specific subdirectories.
@@ -145,12 +146,17 @@ def test_generate_for_assistant_mode_based(rule_manager, tmp_path):
     from rulebook_ai.assistants import ASSISTANT_MAP
     kilocode_spec = ASSISTANT_MAP['kilocode']
 
-    # Execute the generation
-    rule_manager._generate_for_assistant(kilocode_spec, source_dir, target_root)
+    # Plan and execute the generation
+    ops, messages = rule_manager._plan_assistant(kilocode_spec, RuleIndex.scan(source_dir), target_root)
+    assert len(messages) == 2
+    assert execute_ops(rule_manager._with_mkdirs(ops)) == []
 
     # Verify the output directories and files
     kilocode_root = target_root / ".kilocode"
     assert (kilocode_root / "rules" / "general.md").is_file()
     assert (kilocode_root / "rules" / "general.md").read_text() == "General Rule"
     assert (kilocode_root / "code-mode" / "code.md").is_file()
-    assert (kilocode_root / "code-mode" / "code.md").read_text() == "Code Rule"
\ No newline at end of file
+    assert (kilocode_root / "code-mode" / "code.md").read_text() == "Code Rule"
+
+    # A second plan against the generated tree is empty.
+    assert rule_manager._plan_assistant(kilocode_spec, RuleIndex.scan(source_dir), target_root)[0] == []
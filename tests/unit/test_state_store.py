@@ -0,0 +1,112 @@
+"""Tests for the JSON and SQLite project state backends."""
+
+import json
+import sqlite3
+
+import pytest
+
+from rulebook_ai.core import RuleManager
+from rulebook_ai.state import JsonStateStore, SqliteStateStore, open_store
+
+
+def test_backend_selection(tmp_path, monkeypatch):
+    state_dir = tmp_path / ".rulebook-ai"
+    monkeypatch.delenv("RULEBOOK_AI_STATE_BACKEND", raising=False)
+    assert isinstance(open_store(state_dir), JsonStateStore)
+    assert isinstance(open_store(state_dir, "sqlite"), SqliteStateStore)
+
+    SqliteStateStore(state_dir).save_selection({"packs": [], "profiles": {}})
+    assert isinstance(open_store(state_dir), SqliteStateStore)
+
+    with pytest.raises(ValueError):
+        open_store(state_dir, "yaml")
+
+
+def test_json_writes_are_atomic(tmp_path):
+    store = JsonStateStore(tmp_path)
+    store.update_manifest({"memory/a.md": "light-spec"})
+    store.update_manifest({"memory/b.md": "light-spec"}, removals=["memory/a.md"])
+    assert json.loads((tmp_path / "file_manifest.json").read_text()) == {"memory/b.md": "light-spec"}
+    assert [p.name for p in tmp_path.iterdir()] == ["file_manifest.json"]
+
+
+def test_sqlite_migrates_json_state(light_spec_project, monkeypatch):
+    _, project_dir = light_spec_project(assistants=["cursor"])
+    state_dir = project_dir / ".rulebook-ai"
+    manifest = json.loads((state_dir / "file_manifest.json").read_text())
+    status = json.loads((state_dir / "sync_status.json").read_text())
+
+    monkeypatch.setenv("RULEBOOK_AI_STATE_BACKEND", "sqlite")
+    manager = RuleManager(project_root=str(project_dir))
+    assert manager._load_file_manifest(project_dir) == manifest
+    assert manager._load_sync_status(project_dir) == status
+    assert [p["name"] for p in manager._load_selection(project_dir).packs] == ["light-spec"]
+    assert not (state_dir / "selection.json").exists()
+    assert not (state_dir / "file_manifest.json").exists()
+
+    with sqlite3.connect(str(state_dir / "state.db")) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_failed_sqlite_migration_keeps_json_state(light_spec_project, monkeypatch):
+    _, project_dir = light_spec_project(assistants=["cursor"])
+    state_dir = project_dir / ".rulebook-ai"
+    (state_dir / "sync_fingerprints.json").write_text("{not json")
+    (state_dir / "sync_status.json").write_text("[1, 2]")
+    store = SqliteStateStore(state_dir)
+
+    with pytest.raises(AttributeError):
+        store.load_selection()
+    assert not (state_dir / "state.db").exists()
+    assert sorted(p.name for p in state_dir.iterdir() if p.name.startswith(".state-")) == []
+    assert (state_dir / "selection.json").is_file()
+
+    (state_dir / "sync_status.json").write_text("{}")
+    assert [p["name"] for p in store.load_selection()["packs"]] == ["light-spec"]
+    assert store.load_fingerprints() == {"files": {}}
+    assert not (state_dir / "sync_fingerprints.json").exists()
+
+
+def test_sync_with_sqlite_backend(light_spec_project, monkeypatch, capsys):
+    monkeypatch.setenv("RULEBOOK_AI_STATE_BACKEND", "sqlite")
+    _, project_dir = light_spec_project(assistants=["cursor"])
+    state_dir = project_dir / ".rulebook-ai"
+    assert sorted(p.name for p in state_dir.glob("*.json")) == []
+
+    manager = RuleManager(project_root=str(project_dir))
+    capsys.readouterr()
+    manager.project_sync(assistants=["cursor", "warp"], project_dir=str(project_dir))
+    out = capsys.readouterr().out
+    assert "Cursor rules are up to date" in out
+
+    status = SqliteStateStore(state_dir).load_status()
+    assert set(status) == {"cursor", "warp"}
+    assert status["cursor"]["fingerprint"]
+    assert "memory/docs/architecture_template.md" in manager._load_file_manifest(project_dir)
+
+
+def test_session_writes_selection_once(tmp_path, monkeypatch):
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+    manager = RuleManager(project_root=str(project_dir))
+    writes = []
+    original = JsonStateStore.save_selection
+    monkeypatch.setattr(
+        JsonStateStore, "save_selection", lambda self, data: (writes.append(data), original(self, data))
+    )
+
+    with manager.session() as selection:
+        manager.add_pack("light-spec")
+        manager.add_pack("medium-spec")
+        manager.create_profile("dev")
+        manager.add_pack_to_profile("light-spec", "dev")
+        manager.add_pack_to_profile("medium-spec", "dev")
+        assert writes == []
+        assert selection.profiles == {"dev": ["light-spec", "medium-spec"]}
+
+    assert len(writes) == 1
+    assert manager._load_selection(project_dir).profiles == {"dev": ["light-spec", "medium-spec"]}
+
+    with manager.session():
+        manager.list_profiles()
+    assert len(writes) == 1
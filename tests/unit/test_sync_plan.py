@@ -0,0 +1,86 @@
+"""Tests for the sync planner and ``project sync --plan``."""
+
+from pathlib import Path
+
+from rulebook_ai import sync_plan
+
+
+def _tree(root: Path):
+    return sorted(p.relative_to(root).as_posix() for p in root.rglob("*"))
+
+
+def test_plan_only_touches_nothing(light_spec_project, capsys):
+    manager, project_dir = light_spec_project()
+    before = _tree(project_dir)
+    capsys.readouterr()
+
+    assert manager.project_sync(assistants=["cursor", "warp"], project_dir=str(project_dir), plan_only=True) == 0
+
+    out = capsys.readouterr().out
+    assert _tree(project_dir) == before
+    assert "Affected assistants: cursor, warp" in out
+    assert "Total bytes to write:" in out
+    assert "Sync complete." not in out
+
+
+def test_plan_matches_executed_sync(light_spec_project):
+    manager, project_dir = light_spec_project()
+    plan = manager._plan_sync(project_dir, ["cursor"], None, None, False, 1, False)
+    writes = [op for op in plan.ops if op.kind in ("copy", "write")]
+
+    manager.project_sync(assistants=["cursor"], project_dir=str(project_dir))
+
+    assert all(op.path.is_file() for op in writes)
+    assert sum(op.path.stat().st_size for op in writes) == plan.total_bytes
+    mkdirs = [op.path for op in plan.ops if op.kind == "mkdir"]
+    assert len(mkdirs) == len(set(mkdirs))
+
+
+def test_plan_after_sync_is_empty(light_spec_project):
+    manager, project_dir = light_spec_project()
+    manager.project_sync(assistants=["cursor", "warp"], project_dir=str(project_dir))
+
+    plan = manager._plan_sync(project_dir, ["cursor", "warp"], None, None, False, 1, False)
+    assert plan.ops == []
+    assert plan.affected_assistants == []
+
+    forced = manager._plan_sync(project_dir, ["cursor", "warp"], None, None, True, 1, False)
+    assert forced.ops == []  # outputs already byte-identical
+
+
+def test_plan_deletes_stale_outputs(light_spec_project):
+    manager, project_dir = light_spec_project()
+    manager.project_sync(assistants=["cursor"], project_dir=str(project_dir))
+    stale = project_dir / ".cursor" / "rules" / "old" / "stale.mdc"
+    stale.parent.mkdir(parents=True)
+    stale.write_text("stale")
+
+    plan = manager._plan_sync(project_dir, ["cursor"], None, None, True, 1, False)
+    counts = plan.counts()
+    assert counts["delete"] == 1 and counts["rmdir"] == 1
+
+    manager.project_sync(assistants=["cursor"], project_dir=str(project_dir), force=True)
+    assert not stale.parent.exists()
+
+
+def test_failed_output_is_retried_on_next_sync(light_spec_project, monkeypatch, capsys):
+    manager, project_dir = light_spec_project()
+    real_apply = sync_plan._apply
+    failing = []
+
+    def flaky_apply(op):
+        if op.assistant == "cursor" and not failing:
+            failing.append(op.path)
+            raise OSError("disk full")
+        real_apply(op)
+
+    monkeypatch.setattr(sync_plan, "_apply", flaky_apply)
+    assert manager.project_sync(assistants=["cursor"], project_dir=str(project_dir)) == 1
+    out = capsys.readouterr().out
+    assert "Failed to generate Cursor rules" in out
+    assert "Sync complete." not in out
+    assert not failing[0].exists()
+
+    assert manager.project_sync(assistants=["cursor"], project_dir=str(project_dir)) == 0
+    assert "up to date" not in capsys.readouterr().out
+    assert failing[0].is_file()
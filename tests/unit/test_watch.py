@@ -0,0 +1,75 @@
+"""Tests for ``project sync --watch``."""
+
+import threading
+import time
+
+from rulebook_ai import cli
+from rulebook_ai.core import RuleManager
+from rulebook_ai.watch import watch_project
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _start_watch(manager, project_dir, **kwargs):
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=watch_project,
+        args=(manager, str(project_dir)),
+        kwargs={"interval": 0.05, "debounce": 0.1, "stop_event": stop, **kwargs},
+        daemon=True,
+    )
+    thread.start()
+    return stop, thread
+
+
+def test_watch_resyncs_after_installed_pack_edit(light_spec_project):
+    manager, project_dir = light_spec_project()
+    warp = project_dir / "WARP.md"
+
+    stop, thread = _start_watch(manager, project_dir, assistants=["warp"])
+    try:
+        assert _wait_for(warp.is_file)
+        rules = project_dir / ".rulebook-ai" / "packs" / "light-spec" / "rules"
+        rule_file = sorted(rules.rglob("*.md"))[0]
+        rule_file.write_text(rule_file.read_text() + "\nWATCHED-EDIT\n")
+        assert _wait_for(lambda: "WATCHED-EDIT" in warp.read_text())
+    finally:
+        stop.set()
+        thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_watch_refreshes_local_pack_source(tmp_path):
+    source = tmp_path / "my-pack"
+    rules_dir = source / "rules" / "01-rules"
+    rules_dir.mkdir(parents=True)
+    (rules_dir / "01-rule.md").write_text("first version")
+    (source / "manifest.yaml").write_text("name: my-pack\nversion: 1.0.0\nsummary: s\n")
+    (source / "README.md").write_text("readme")
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+    manager = RuleManager(str(project_dir))
+    manager.add_pack(f"local:{source}", project_dir=str(project_dir))
+    claude = project_dir / "CLAUDE.md"
+
+    stop, thread = _start_watch(manager, project_dir, assistants=["claude-code"])
+    try:
+        assert _wait_for(lambda: claude.is_file() and "first version" in claude.read_text())
+        (rules_dir / "01-rule.md").write_text("second version")
+        assert _wait_for(lambda: "second version" in claude.read_text())
+    finally:
+        stop.set()
+        thread.join(5)
+
+
+def test_watch_rejects_plan(tmp_path, capsys):
+    rc = cli.main(["project", "sync", "--watch", "--plan", "--project-dir", str(tmp_path)])
+    assert rc == 1
+    assert "Cannot combine --watch" in capsys.readouterr().out